@@ -1,84 +1,115 @@
+import logging
+
+from django.conf import settings
 from django.contrib import admin
 from django.contrib.auth.models import User
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.html import format_html
 from django.contrib import messages
-from .models import UserProfile, Category, Post, PostFile, Announcement, BlockedIP
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import Count, Exists, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import UserProfile, Category, Post, PostFile, Announcement, BlockedIP, UploadSession, Blob, Job, BULK_BATCH_SIZE
+from .jobs import enqueue, overdue_jobs
+from .ipblock import blocked_ips
+from .log import log_event
+from .search import search_post_ids
+
+logger = logging.getLogger(__name__)
+
+def post_count_subquery(**filters):
+    """조건에 맞는 게시물 수 상관 서브쿼리 (행마다 COUNT 쿼리를 보내지 않도록 annotate 용)"""
+    counts = (
+        Post.objects.filter(**filters)
+        .order_by()
+        .values(*filters)
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+    return Coalesce(Subquery(counts), 0, output_field=IntegerField())
+
+def block_profile_ips(request, queryset, reason):
+    """선택된 프로필들의 IP 를 한꺼번에 차단하고 새로 차단된 개수 반환
+
+    reason 은 '{username}' 자리표시자를 쓸 수 있다. 이미 차단된 IP 는 건너뛴다.
+    """
+    ips = {}
+    for ip_address, username in queryset.order_by().values_list('ip_address', 'user__username'):
+        ips.setdefault(ip_address, username)
+    
+    blocked_count = 0
+    ip_list = list(ips)
+    with transaction.atomic():
+        for start in range(0, len(ip_list), BULK_BATCH_SIZE):
+            chunk = ip_list[start:start + BULK_BATCH_SIZE]
+            existing = set(
+                BlockedIP.objects.filter(ip_address__in=chunk, prefix_length__isnull=True)
+                .values_list('ip_address', flat=True)
+            )
+            new_blocks = [
+                BlockedIP(ip_address=ip, reason=reason.format(username=ips[ip]), blocked_by=request.user)
+                for ip in chunk if ip not in existing
+            ]
+            # 동시에 같은 IP 가 차단된 경우는 무시
+            BlockedIP.objects.bulk_create(new_blocks, ignore_conflicts=True)
+            blocked_count += len(new_blocks)
+        # bulk_create 는 post_save 를 보내지 않으므로 직접 갱신
+        transaction.on_commit(blocked_ips.invalidate)
+    return blocked_count
 
 # 1. IP만 차단 (계정은 유지)
 def block_ip_only(modeladmin, request, queryset):
     """선택된 사용자들의 IP만 차단 (계정은 유지)"""
-    blocked_count = 0
-    for user_profile in queryset:
-        blocked_ip, created = BlockedIP.objects.get_or_create(
-            ip_address=user_profile.ip_address,
-            defaults={
-                'reason': f'{user_profile.user.username} 사용자 IP 차단',
-                'blocked_by': request.user
-            }
-        )
-        if created:
-            blocked_count += 1
-    
+    blocked_count = block_profile_ips(request, queryset, '{username} 사용자 IP 차단')
+    log_event(logger, 'moderation.block_ips', user=request.user, blocked=blocked_count)
     messages.success(request, f'{blocked_count}개의 IP가 차단되었습니다. (계정은 유지됨)')
 
 block_ip_only.short_description = "🚫 선택된 사용자의 IP만 차단"
 
+def warn_if_worker_idle(request):
+    """삭제 같은 예약 작업은 runworker 가 있어야 실행된다 - 대기열이 밀려 있으면 관리자에게 경고"""
+    if settings.JOBS_ALWAYS_EAGER:
+        return
+    overdue = overdue_jobs(settings.JOBS_OVERDUE_WARNING)
+    if overdue:
+        messages.warning(
+            request,
+            f'대기 중인 작업 {overdue}개가 {settings.JOBS_OVERDUE_WARNING}초 넘게 실행되지 않았습니다. '
+            f'워커(python manage.py runworker)가 실행 중인지 확인하세요 - 워커가 없으면 삭제가 진행되지 않습니다.',
+        )
+
 # 2. 계정만 삭제 (IP는 차단하지 않음)
 def delete_user_only(modeladmin, request, queryset):
-    """선택된 사용자만 삭제 (IP는 차단하지 않음)"""
-    deleted_users = 0
-    deleted_posts = 0
+    """선택된 사용자만 삭제 (IP는 차단하지 않음) - 삭제는 백그라운드 작업으로 처리"""
+    user_ids = list(queryset.values_list('user_id', flat=True))
+    post_count = Post.objects.filter(author_id__in=user_ids).count()
     
-    for user_profile in queryset:
-        user = user_profile.user
-        
-        # 사용자의 모든 게시물 삭제
-        posts_count = Post.objects.filter(author=user).count()
-        Post.objects.filter(author=user).delete()
-        deleted_posts += posts_count
-        
-        # 사용자 삭제 (UserProfile은 CASCADE로 자동 삭제)
-        user.delete()
-        deleted_users += 1
+    # 게시물/첨부파일 CASCADE 삭제는 오래 걸리므로 작업 큐로 넘김
+    enqueue('moderation.delete_users', user_ids, priority=20)
+    log_event(logger, 'moderation.delete_users', user=request.user, user_ids=user_ids, posts=post_count)
     
-    messages.success(request, f'{deleted_users}명의 사용자와 {deleted_posts}개의 게시물이 삭제되었습니다. (IP는 차단되지 않음)')
+    messages.success(request, f'{len(user_ids)}명의 사용자와 {post_count}개의 게시물 삭제가 예약되었습니다. (IP는 차단되지 않음, runworker 가 처리하며 진행 상황은 백그라운드 작업 목록에서 확인)')
+    warn_if_worker_idle(request)
 
 delete_user_only.short_description = "👤 선택된 사용자만 삭제 (IP 차단 안함)"
 
 # 3. 계정 삭제 + IP 차단 (재가입 방지)
 def delete_user_and_block_ip(modeladmin, request, queryset):
-    """선택된 사용자 삭제 + IP 차단으로 재가입 방지"""
-    deleted_users = 0
-    deleted_posts = 0
-    blocked_ips = 0
+    """선택된 사용자 삭제 + IP 차단으로 재가입 방지 - 삭제는 백그라운드 작업으로 처리"""
+    # IP 차단은 즉시 처리 (재가입 방지)
+    blocked_count = block_profile_ips(request, queryset, '{username} 사용자 탈퇴 + 재가입 방지')
     
-    for user_profile in queryset:
-        user = user_profile.user
-        username = user.username
-        ip_address = user_profile.ip_address
-        
-        # IP 차단 먼저 처리
-        blocked_ip, created = BlockedIP.objects.get_or_create(
-            ip_address=ip_address,
-            defaults={
-                'reason': f'{username} 사용자 탈퇴 + 재가입 방지',
-                'blocked_by': request.user
-            }
-        )
-        if created:
-            blocked_ips += 1
-        
-        # 사용자의 모든 게시물 삭제
-        posts_count = Post.objects.filter(author=user).count()
-        Post.objects.filter(author=user).delete()
-        deleted_posts += posts_count
-        
-        # 사용자 삭제
-        user.delete()
-        deleted_users += 1
+    user_ids = list(queryset.values_list('user_id', flat=True))
+    post_count = Post.objects.filter(author_id__in=user_ids).count()
+    enqueue('moderation.delete_users', user_ids, priority=20)
+    log_event(
+        logger, 'moderation.delete_users', user=request.user, user_ids=user_ids, posts=post_count, blocked=blocked_count,
+    )
     
-    messages.success(request, f'{deleted_users}명의 사용자와 {deleted_posts}개의 게시물이 삭제되고, {blocked_ips}개의 IP가 차단되었습니다.')
+    messages.success(request, f'{blocked_count}개의 IP가 차단되었고, {len(user_ids)}명의 사용자와 {post_count}개의 게시물 삭제가 예약되었습니다. (runworker 가 처리하며 진행 상황은 백그라운드 작업 목록에서 확인)')
+    warn_if_worker_idle(request)
 
 delete_user_and_block_ip.short_description = "🔒 사용자 삭제 + IP 차단 (재가입 방지)"
 
@@ -115,30 +146,40 @@ class UserProfileAdmin(admin.ModelAdmin):
         })
     )
     
+    def get_queryset(self, request):
+        # 목록 한 페이지를 행 수와 상관없이 고정된 쿼리 수로
+        return super().get_queryset(request).select_related('user').annotate(
+            post_count=post_count_subquery(author=OuterRef('user_id')),
+            ip_blocked=Exists(BlockedIP.objects.filter(ip_address=OuterRef('ip_address'))),
+        )
+    
     def get_email(self, obj):
         return obj.user.email
     get_email.short_description = '이메일'
+    get_email.admin_order_field = 'user__email'
     
     def get_post_count(self, obj):
-        count = Post.objects.filter(author=obj.user).count()
+        count = obj.post_count
         return format_html(
             '<span style="color: {};">{}</span>',
             'red' if count > 10 else 'green',
             count
         )
     get_post_count.short_description = '게시물 수'
+    get_post_count.admin_order_field = 'post_count'
     
     def get_user_status(self, obj):
-        # IP 차단 상태 체크
-        if BlockedIP.objects.filter(ip_address=obj.ip_address).exists():
+        # IP 차단 상태 체크 - 정확히 일치하는 차단은 annotate 값, 대역 차단은 메모리 인덱스
+        if obj.ip_blocked or blocked_ips.is_blocked(obj.ip_address):
             return format_html('<span style="color: red; font-weight: bold;">IP 차단됨</span>')
         else:
             return format_html('<span style="color: green;">정상</span>')
     get_user_status.short_description = 'IP 상태'
+    get_user_status.admin_order_field = 'ip_blocked'
     
     def get_user_info(self, obj):
         # IP 차단 상태 확인
-        ip_blocked = BlockedIP.objects.filter(ip_address=obj.ip_address).exists()
+        ip_blocked = blocked_ips.is_blocked(obj.ip_address)
         ip_status = '<span style="color: red;">차단됨</span>' if ip_blocked else '<span style="color: green;">정상</span>'
         
         return format_html(
@@ -181,15 +222,20 @@ class UserProfileAdmin(admin.ModelAdmin):
 # IP 차단 해제 액션
 def unblock_ip(modeladmin, request, queryset):
     """선택된 IP 차단 해제"""
-    count = queryset.count()
+    ips = list(queryset.values_list('ip_address', 'prefix_length'))
     queryset.delete()
+    count = len(ips)
+    log_event(
+        logger, 'moderation.unblock_ips', user=request.user,
+        ips=[ip if prefix is None else f'{ip}/{prefix}' for ip, prefix in ips],
+    )
     messages.success(request, f'{count}개의 IP 차단이 해제되었습니다.')
 
 unblock_ip.short_description = "🔓 선택된 IP 차단 해제"
 
 @admin.register(BlockedIP)
 class BlockedIPAdmin(admin.ModelAdmin):
-    list_display = ['ip_address', 'reason', 'blocked_date', 'blocked_by']
+    list_display = ['ip_address', 'prefix_length', 'reason', 'blocked_date', 'blocked_by']
     list_filter = ['blocked_date', 'blocked_by']
     search_fields = ['ip_address', 'reason']
     readonly_fields = ['blocked_date']
@@ -197,7 +243,8 @@ class BlockedIPAdmin(admin.ModelAdmin):
     
     fieldsets = (
         ('차단 정보', {
-            'fields': ('ip_address', 'reason')
+            'fields': ('ip_address', 'prefix_length', 'reason'),
+            'description': '프리픽스 길이를 입력하면 대역 전체를 차단합니다. (예: 203.0.113.0 / 24)'
         }),
         ('차단 기록', {
             'fields': ('blocked_by', 'blocked_date')
@@ -212,16 +259,13 @@ class PostFileInline(admin.TabularInline):
     
     def get_file_size(self, obj):
         if obj.file:
-            try:
-                size = obj.file.size
-                if size < 1024:
-                    return f"{size} B"
-                elif size < 1024*1024:
-                    return f"{size/1024:.1f} KB"
-                else:
-                    return f"{size/(1024*1024):.1f} MB"
-            except:
-                return "알 수 없음"
+            size = obj.get_file_size()
+            if size < 1024:
+                return f"{size} B"
+            elif size < 1024*1024:
+                return f"{size/1024:.1f} KB"
+            else:
+                return f"{size/(1024*1024):.1f} MB"
         return "파일 없음"
     get_file_size.short_description = '파일 크기'
     
@@ -237,29 +281,45 @@ class PostAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at']
     inlines = [PostFileInline]
     
+    def get_search_results(self, request, queryset, search_term):
+        # LIKE '%검색어%' 전체 스캔 대신 전문 검색 색인 + 작성자명 일치
+        if not search_term:
+            return queryset, False
+        ids = search_post_ids(search_term)
+        return queryset.filter(Q(pk__in=ids) | Q(author__username=search_term.strip())), False
+    
+    def get_queryset(self, request):
+        return (
+            super().get_queryset(request)
+            .select_related('author__userprofile', 'category')
+            .with_file_count()
+        )
+    
     def get_author_ip(self, obj):
         try:
-            profile = UserProfile.objects.get(user=obj.author)
-            return profile.ip_address
-        except UserProfile.DoesNotExist:
+            return obj.author.userprofile.ip_address
+        except ObjectDoesNotExist:
             return "IP 없음"
     get_author_ip.short_description = '작성자 IP'
+    get_author_ip.admin_order_field = 'author__userprofile__ip_address'
     
     def get_file_count(self, obj):
-        count = obj.postfile_set.count()
+        count = obj.get_file_count()
         return f"{count}개" if count > 0 else "없음"
     get_file_count.short_description = '첨부파일'
+    get_file_count.admin_order_field = 'file_count'
 
 @admin.register(PostFile)
 class PostFileAdmin(admin.ModelAdmin):
     list_display = ['post', 'original_name', 'get_file_type', 'get_file_size', 'uploaded_at']
-    list_filter = ['uploaded_at']
+    list_filter = ['file_type', 'uploaded_at']
     search_fields = ['post__title', 'original_name']
-    readonly_fields = ['uploaded_at']
+    readonly_fields = ['uploaded_at', 'file_size', 'mime_type', 'file_type', 'width', 'height', 'duration']
     
     def get_file_type(self, obj):
         return obj.get_file_type().upper()
     get_file_type.short_description = '파일 타입'
+    get_file_type.admin_order_field = 'file_type'
     
     def get_file_size(self, obj):
         size = obj.get_file_size()
@@ -270,16 +330,20 @@ class PostFileAdmin(admin.ModelAdmin):
         else:
             return f"{size/(1024*1024):.1f} MB"
     get_file_size.short_description = '파일 크기'
+    get_file_size.admin_order_field = 'file_size'
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ['name', 'slug', 'get_post_count']
     prepopulated_fields = {'slug': ('name',)}
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(post_count=post_count_subquery(category=OuterRef('pk')))
+    
     def get_post_count(self, obj):
-        count = Post.objects.filter(category=obj).count()
-        return count
+        return obj.post_count
     get_post_count.short_description = '게시물 수'
+    get_post_count.admin_order_field = 'post_count'
 
 @admin.register(Announcement)
 class AnnouncementAdmin(admin.ModelAdmin):
@@ -287,6 +351,50 @@ class AnnouncementAdmin(admin.ModelAdmin):
     search_fields = ['title', 'content']
     readonly_fields = ['created_at']
 
+@admin.register(Blob)
+class BlobAdmin(admin.ModelAdmin):
+    list_display = ['sha256', 'name', 'size', 'ref_count', 'created_at']
+    search_fields = ['sha256', 'name']
+    readonly_fields = ['sha256', 'name', 'size', 'ref_count', 'created_at']
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ['filename', 'user', 'get_progress', 'created_at', 'updated_at']
+    list_filter = ['created_at']
+    search_fields = ['filename', 'user__username']
+    readonly_fields = ['id', 'offset', 'created_at', 'updated_at']
+    
+    def get_progress(self, obj):
+        if obj.length == 0:
+            return "100%"
+        return f"{obj.offset * 100 // obj.length}%"
+    get_progress.short_description = '진행률'
+
+# 실패한 작업 재시도 액션
+def retry_jobs(modeladmin, request, queryset):
+    """선택된 작업을 다시 대기열에 넣음"""
+    count = queryset.exclude(status=Job.STATUS_RUNNING).update(
+        status=Job.STATUS_QUEUED, attempts=0, run_at=timezone.now(), locked_until=None, last_error=''
+    )
+    log_event(logger, 'moderation.retry_jobs', user=request.user, jobs=count)
+    messages.success(request, f'{count}개의 작업을 다시 대기열에 넣었습니다.')
+
+retry_jobs.short_description = "🔁 선택된 작업 다시 실행"
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'task', 'status', 'get_progress', 'priority', 'attempts', 'run_at', 'created_at', 'finished_at']
+    list_filter = ['status', 'task']
+    search_fields = ['task', 'last_error']
+    readonly_fields = ['created_at', 'finished_at', 'locked_until', 'locked_by', 'last_error', 'progress_done', 'progress_total']
+    actions = [retry_jobs]
+    
+    def get_progress(self, obj):
+        if not obj.progress_total:
+            return "-"
+        return f"{obj.progress_done}/{obj.progress_total} ({obj.progress_done * 100 // obj.progress_total}%)"
+    get_progress.short_description = '진행률'
+
 # Django 기본 User 모델 커스터마이징
 class UserProfileInline(admin.StackedInline):
     model = UserProfile
@@ -297,13 +405,16 @@ class CustomUserAdmin(BaseUserAdmin):
     inlines = (UserProfileInline,)
     list_display = BaseUserAdmin.list_display + ('get_ip_address',)
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('userprofile')
+    
     def get_ip_address(self, obj):
         try:
-            profile = UserProfile.objects.get(user=obj)
-            return profile.ip_address
-        except UserProfile.DoesNotExist:
+            return obj.userprofile.ip_address
+        except ObjectDoesNotExist:
             return "IP 없음"
     get_ip_address.short_description = 'IP 주소'
+    get_ip_address.admin_order_field = 'userprofile__ip_address'
 
 # 기존 User admin 등록 해제 후 새로운 것으로 등록
 admin.site.unregister(User)
@@ -4,3 +4,23 @@ from django.apps import AppConfig
 class MyappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'myapp'
+
+    def ready(self):
+        from django.conf import settings
+        from django.contrib.auth import user_logged_in
+        from django.contrib.auth.models import update_last_login
+        from django.db.backends.signals import connection_created
+
+        from .metrics import install_query_recorder
+        from .sqlite import apply_pragmas
+
+        from . import signals, tasks  # noqa: F401
+
+        # last_login 은 로그인 기록 버퍼(myapp.audit)가 모아서 기록
+        user_logged_in.disconnect(update_last_login, dispatch_uid='update_last_login')
+
+        # 요청별 SQL 수 / 시간 (myapp.metrics) - 요청 밖의 쿼리는 그대로 실행
+        connection_created.connect(install_query_recorder, dispatch_uid='myapp_metrics_queries')
+
+        if settings.SQLITE_TUNING:
+            connection_created.connect(apply_pragmas, dispatch_uid='myapp_sqlite_pragmas')
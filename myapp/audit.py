@@ -0,0 +1,121 @@
+import atexit
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from .log import log_event
+from .sqlite import retry_on_locked
+
+logger = logging.getLogger(__name__)
+
+
+class LoginAuditBuffer:
+    """로그인 기록(마지막 IP / 시각)을 프로세스 메모리에 모았다가 한꺼번에 기록하는 버퍼
+
+    로그인 요청은 버퍼에 넣기만 하고, LOGIN_AUDIT_FLUSH_INTERVAL 마다 또는
+    LOGIN_AUDIT_BATCH_SIZE 개가 모이면 bulk_update 로 기록한다. 같은 사용자의 기록은
+    마지막 것만 남기고, 값이 그대로이거나 다른 워커가 더 최근 시각을 기록했으면 건너뛴다.
+    """
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._pending = {}  # user_id → (ip, 시각)
+        self._thread = None
+
+    def record(self, user_id, ip, when):
+        if self._pid != os.getpid():
+            # fork 된 워커 - 부모의 버퍼 / 스레드는 물려받지 않는다
+            self._reset()
+        with self._lock:
+            previous = self._pending.get(user_id)
+            if previous is None or previous[1] <= when:
+                self._pending[user_id] = (ip, when)
+            full = len(self._pending) >= settings.LOGIN_AUDIT_BATCH_SIZE
+        if full or settings.LOGIN_AUDIT_FLUSH_INTERVAL <= 0:
+            self.flush()
+        else:
+            self._ensure_thread()
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='login-audit-flush', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(settings.LOGIN_AUDIT_FLUSH_INTERVAL)
+            try:
+                self.flush()
+            finally:
+                # 이 스레드의 DB 연결은 요청 주기와 무관하므로 매번 닫는다
+                connections.close_all()
+
+    def flush(self):
+        """모인 기록을 DB 에 반영 (실패하면 다음 flush 때 다시 시도)"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        try:
+            return self._write(pending)
+        except Exception as e:
+            with self._lock:
+                for user_id, entry in pending.items():
+                    current = self._pending.get(user_id)
+                    if current is None or current[1] < entry[1]:
+                        self._pending[user_id] = entry
+            # 다음 flush 때 다시 시도
+            log_event(logger, 'audit.flush_failed', logging.WARNING, count=len(pending), error=str(e))
+            return 0
+
+    @retry_on_locked
+    def _write(self, pending):
+        from django.contrib.auth.models import User
+        from .models import UserProfile
+
+        user_ids = list(pending)
+        with transaction.atomic():
+            users = User.objects.filter(pk__in=user_ids).only('pk', 'last_login')
+            changed_users = []
+            for user in users:
+                when = pending[user.pk][1]
+                if user.last_login is None or user.last_login < when:
+                    user.last_login = when
+                    changed_users.append(user)
+            User.objects.bulk_update(changed_users, ['last_login'])
+            # 다른 워커가 더 최근 로그인을 이미 기록했으면 IP 도 덮어쓰지 않는다
+            newer = {user.pk for user in changed_users}
+
+            profiles = {
+                profile.user_id: profile
+                for profile in UserProfile.objects.filter(user_id__in=user_ids).only('pk', 'user_id', 'last_login_ip')
+            }
+            changed_profiles = []
+            new_profiles = []
+            existing_users = {user.pk for user in users}
+            for user_id, (ip, when) in pending.items():
+                profile = profiles.get(user_id)
+                if profile is None:
+                    if user_id in existing_users:
+                        # 프로필이 없는 경우 생성
+                        new_profiles.append(UserProfile(user_id=user_id, ip_address=ip, last_login_ip=ip))
+                elif user_id in newer and profile.last_login_ip != ip:
+                    profile.last_login_ip = ip
+                    changed_profiles.append(profile)
+            UserProfile.objects.bulk_update(changed_profiles, ['last_login_ip'])
+            UserProfile.objects.bulk_create(new_profiles, ignore_conflicts=True)
+        return len(changed_users) + len(changed_profiles) + len(new_profiles)
+
+
+login_audit = LoginAuditBuffer()
+
+# 워커가 정상 종료될 때 남은 기록 저장 (gunicorn 은 SIGTERM 후 sys.exit 로 atexit 을 실행한다)
+atexit.register(login_audit.flush)
@@ -0,0 +1,116 @@
+import datetime
+import hashlib
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from . import fragments
+from .models import Post
+from .pagination import KeysetPaginator
+from .utils import aget_user
+
+
+def make_etag(*parts):
+    """검증값들을 이어 붙인 약한 비교용 해시 (revalidate 가 따옴표를 붙인다)"""
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def _has_messages(request):
+    return bool(len(messages.get_messages(request)))
+
+
+async def _cacheable(request):
+    """로그인 사용자이고 표시할 messages 가 없을 때만 304 를 허용
+
+    messages 는 렌더링될 때 소비되므로 304 로 건너뛰면 다음 페이지에 늦게 나타난다.
+    """
+    user = await aget_user(request)
+    return user.is_authenticated and not await sync_to_async(_has_messages)(request)
+
+
+async def _post_updated_at(request, post_id):
+    """게시물 갱신 시각 (etag / last_modified 가 같이 쓰도록 요청에 저장)"""
+    if not hasattr(request, '_post_updated_at'):
+        request._post_updated_at = await (
+            Post.objects.filter(pk=post_id).values_list('updated_at', flat=True).afirst()
+        )
+    return request._post_updated_at
+
+
+async def post_detail_etag(request, post_id):
+    if not await _cacheable(request):
+        return None
+    updated_at = await _post_updated_at(request, post_id)
+    if updated_at is None:
+        return None
+    # 사용자마다 헤더(이름 / 관리자 링크)가 다르고, 카테고리 이름은 조각 캐시 버전을 따른다
+    version = await sync_to_async(fragments.get_version)()
+    return make_etag('post', request.user.pk, version, updated_at.timestamp())
+
+
+async def post_detail_last_modified(request, post_id):
+    if not await _cacheable(request):
+        return None
+    return await _post_updated_at(request, post_id)
+
+
+async def post_list_etag(request, category_slug=None):
+    """현재 페이지 행들의 (id, updated_at) 과 커서 - 본문은 읽지 않는 가벼운 쿼리 하나
+
+    새 글 / 수정 / 삭제 / 첨부파일 변경이 모두 페이지의 행 목록이나 updated_at 을 바꾼다.
+    """
+    if not await _cacheable(request):
+        return None
+    posts = Post.objects.only('id', 'is_pinned', 'created_at', 'updated_at')
+    if category_slug:
+        category = await sync_to_async(fragments.get_category)(category_slug)
+        posts = posts.filter(category=category)
+    paginator = KeysetPaginator(posts, 10, max_offset_pages=settings.POST_LIST_OFFSET_PAGES)
+    page = await paginator.aget_page(request.GET)
+    rows = ','.join(f'{post.pk}:{post.updated_at.timestamp()}' for post in page)
+    version = await sync_to_async(fragments.get_version)()
+    return make_etag(
+        'list', request.user.pk, version, request.GET.urlencode(),
+        page.has_next(), page.has_previous(), rows,
+    )
+
+
+def revalidate(etag_func, last_modified_func=None):
+    """비동기 뷰의 조건부 GET(304) 처리 + 브라우저가 매번 검증하도록 Cache-Control: private, no-cache
+
+    django.views.decorators.http.condition 과 같지만 검증값 함수도 비동기(async def)로 받는다.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return await view_func(request, *args, **kwargs)
+
+            last_modified = None
+            if last_modified_func:
+                dt = await last_modified_func(request, *args, **kwargs)
+                if dt:
+                    if not timezone.is_aware(dt):
+                        dt = timezone.make_aware(dt, datetime.timezone.utc)
+                    last_modified = int(dt.timestamp())
+            etag = await etag_func(request, *args, **kwargs)
+            etag = quote_etag(etag) if etag is not None else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = await view_func(request, *args, **kwargs)
+            if last_modified and not response.has_header('Last-Modified'):
+                response.headers['Last-Modified'] = http_date(last_modified)
+            if etag:
+                response.headers.setdefault('ETag', etag)
+
+            if response.status_code in (200, 304) and response.has_header('ETag'):
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapper
+    return decorator
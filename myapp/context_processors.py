@@ -0,0 +1,12 @@
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from .fragments import get_version
+
+
+def fragments(request):
+    """템플릿 조각 캐시({% cache %}) 타임아웃과 vary_on 버전 - 버전은 쓰는 템플릿에서만 조회"""
+    return {
+        'fragments_timeout': settings.FRAGMENT_CACHE_TIMEOUT,
+        'fragments_version': SimpleLazyObject(get_version),
+    }
@@ -0,0 +1,162 @@
+import mimetypes
+import os
+
+# 파일 타입별 확장자 (업로드 경로 / 모델 / 템플릿 필터가 모두 이 표 하나를 사용)
+FILE_TYPE_EXTENSIONS = {
+    'image': ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.svg', '.ico', '.tiff', '.tif'),
+    'video': ('.mp4', '.avi', '.mov', '.webm', '.mkv', '.flv', '.wmv', '.m4v', '.3gp', '.ogv'),
+    'audio': ('.mp3', '.wav', '.ogg', '.m4a', '.aac', '.flac', '.wma'),
+    'pdf': ('.pdf',),
+    'text': ('.txt', '.md', '.log', '.cfg', '.ini', '.conf'),
+    'document': ('.doc', '.docx'),
+    'spreadsheet': ('.xls', '.xlsx'),
+    'presentation': ('.ppt', '.pptx'),
+    'archive': ('.zip', '.rar', '.7z', '.tar', '.gz', '.bz2', '.xz'),
+    'executable': ('.exe', '.msi', '.deb', '.rpm', '.dmg', '.app'),
+    'code': ('.py', '.js', '.html', '.css', '.php', '.java', '.cpp', '.c', '.h', '.json', '.xml', '.sql'),
+}
+
+DEFAULT_FILE_TYPE = 'file'
+
+# 확장자 → 파일 타입 (O(1) 조회용으로 미리 펼친 표)
+EXTENSION_TYPES = {
+    ext: file_type
+    for file_type, extensions in FILE_TYPE_EXTENSIONS.items()
+    for ext in extensions
+}
+
+# 파일 타입 → 업로드 폴더 (uploads/<폴더>/년/월/일/)
+UPLOAD_FOLDERS = {
+    'image': 'images',
+    'video': 'videos',
+    'audio': 'audio',
+    'pdf': 'documents',
+    'document': 'documents',
+    'spreadsheet': 'documents',
+    'presentation': 'documents',
+    'archive': 'archives',
+    'executable': 'executables',
+    'code': 'code',
+}
+DEFAULT_UPLOAD_FOLDER = 'others'
+
+# 내용 판별에 읽는 앞부분 크기
+SNIFF_SIZE = 4096
+
+# (오프셋, 시그니처, 파일 타입, MIME)
+MAGIC_SIGNATURES = [
+    (0, b'\x89PNG\r\n\x1a\n', 'image', 'image/png'),
+    (0, b'\xff\xd8\xff', 'image', 'image/jpeg'),
+    (0, b'GIF87a', 'image', 'image/gif'),
+    (0, b'GIF89a', 'image', 'image/gif'),
+    (0, b'II*\x00', 'image', 'image/tiff'),
+    (0, b'MM\x00*', 'image', 'image/tiff'),
+    (0, b'\x00\x00\x01\x00', 'image', 'image/vnd.microsoft.icon'),
+    (8, b'WEBP', 'image', 'image/webp'),
+    (8, b'AVI ', 'video', 'video/x-msvideo'),
+    (8, b'WAVE', 'audio', 'audio/wav'),
+    (4, b'ftypM4A', 'audio', 'audio/mp4'),
+    (4, b'ftypqt', 'video', 'video/quicktime'),
+    (4, b'ftyp', 'video', 'video/mp4'),
+    (0, b'\x1aE\xdf\xa3', 'video', 'video/webm'),
+    (0, b'FLV\x01', 'video', 'video/x-flv'),
+    (0, b'0&\xb2u\x8ef\xcf\x11', 'video', 'video/x-ms-wmv'),
+    (0, b'ID3', 'audio', 'audio/mpeg'),
+    (0, b'\xff\xfb', 'audio', 'audio/mpeg'),
+    (0, b'\xff\xf3', 'audio', 'audio/mpeg'),
+    (0, b'\xff\xf2', 'audio', 'audio/mpeg'),
+    (0, b'fLaC', 'audio', 'audio/flac'),
+    (0, b'OggS', 'audio', 'audio/ogg'),
+    (0, b'%PDF-', 'pdf', 'application/pdf'),
+    (0, b'PK\x03\x04', 'archive', 'application/zip'),
+    (0, b'Rar!\x1a\x07', 'archive', 'application/vnd.rar'),
+    (0, b"7z\xbc\xaf'\x1c", 'archive', 'application/x-7z-compressed'),
+    (0, b'\x1f\x8b', 'archive', 'application/gzip'),
+    (0, b'BZh', 'archive', 'application/x-bzip2'),
+    (0, b'\xfd7zXZ\x00', 'archive', 'application/x-xz'),
+    (257, b'ustar', 'archive', 'application/x-tar'),
+    (0, b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'document', 'application/x-ole-storage'),
+    (0, b'MZ', 'executable', 'application/vnd.microsoft.portable-executable'),
+    (0, b'\x7fELF', 'executable', 'application/x-executable'),
+]
+
+# 시그니처를 오프셋 + 첫 바이트 기준으로 묶어 둔 표 (긴 시그니처 우선)
+_MAGIC_INDEX = {}
+for _offset, _magic, _file_type, _mime in sorted(MAGIC_SIGNATURES, key=lambda sig: -len(sig[1])):
+    _MAGIC_INDEX.setdefault((_offset, _magic[0]), []).append((_magic, _file_type, _mime))
+_MAGIC_OFFSETS = sorted({offset for offset, _ in _MAGIC_INDEX})
+
+# 같은 컨테이너 형식을 쓰는 타입 - 내용이 컨테이너로 판별되면 확장자 분류를 따른다
+# (docx/xlsx/pptx 는 zip, doc/xls/ppt 는 OLE, ogv 는 ogg, m4v 는 mp4)
+_CONTAINER_TYPES = {
+    'archive': {'document', 'spreadsheet', 'presentation'},
+    'document': {'spreadsheet', 'presentation', 'executable'},
+    'audio': {'video'},
+    'video': {'audio'},
+}
+# 여러 세부 형식이 공유하는 컨테이너 MIME - 확장자로 더 구체적인 MIME 을 알 수 있으면 그쪽을 쓴다
+_CONTAINER_MIMES = {'application/zip', 'application/x-ole-storage', 'audio/ogg', 'video/mp4'}
+
+
+def get_extension(name):
+    """파일명에서 소문자 확장자 추출"""
+    return os.path.splitext(name or '')[1].lower()
+
+
+def classify_extension(name):
+    """확장자만으로 파일 타입 분류"""
+    return EXTENSION_TYPES.get(get_extension(name), DEFAULT_FILE_TYPE)
+
+
+def sniff(head):
+    """파일 앞부분(매직 바이트)으로 (파일 타입, MIME) 판별 - 모르면 None"""
+    if not head:
+        return None
+    for offset in _MAGIC_OFFSETS:
+        if len(head) <= offset:
+            break
+        for magic, file_type, mime in _MAGIC_INDEX.get((offset, head[offset]), ()):
+            if head.startswith(magic, offset):
+                return file_type, mime
+    return None
+
+
+def read_head(fileobj, size=SNIFF_SIZE):
+    """파일 앞부분을 읽고 위치를 되돌린다"""
+    position = fileobj.tell()
+    fileobj.seek(0)
+    head = fileobj.read(size)
+    fileobj.seek(position)
+    return head
+
+
+def classify(name, head=None):
+    """파일 타입과 MIME 판별 - 내용(head)이 있으면 매직 바이트가 확장자보다 우선"""
+    file_type = classify_extension(name)
+    mime = mimetypes.guess_type(name or '')[0] or 'application/octet-stream'
+    sniffed = sniff(head)
+    if sniffed is None:
+        return file_type, mime
+
+    sniffed_type, sniffed_mime = sniffed
+    if file_type in _CONTAINER_TYPES.get(sniffed_type, ()):
+        return file_type, mime
+    if sniffed_type == file_type and sniffed_mime in _CONTAINER_MIMES and mime != 'application/octet-stream':
+        return file_type, mime
+    return sniffed_type, sniffed_mime
+
+
+def upload_folder(file_type):
+    """파일 타입에 해당하는 업로드 폴더"""
+    return UPLOAD_FOLDERS.get(file_type, DEFAULT_UPLOAD_FOLDER)
+
+
+def classify_queryset(queryset):
+    """PostFile queryset 전체를 한 번의 쿼리로 분류 ({pk: 파일 타입})
+
+    이미 기록된 file_type 은 그대로 쓰고, 비어 있는 행만 확장자로 분류한다.
+    """
+    return {
+        pk: file_type or classify_extension(name)
+        for pk, name, file_type in queryset.values_list('pk', 'file', 'file_type')
+    }
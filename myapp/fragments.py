@@ -0,0 +1,56 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+
+# 카테고리 / 공지사항이 바뀔 때마다 바뀌는 버전 - 모든 조각 캐시 키에 들어간다
+VERSION_CACHE_KEY = 'fragments:version'
+
+
+def get_version():
+    """현재 조각 캐시 버전 (없으면 새로 만든다)"""
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_CACHE_KEY)
+    return version
+
+
+def invalidate():
+    """버전을 바꿔 이전 조각 캐시를 모두 무효화 (이전 값은 타임아웃으로 사라진다)"""
+    cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+
+
+def cached_list(name, loader):
+    """버전별로 캐시한 쿼리 결과 목록 (오래 캐시되므로 loader 는 복제본이 아닌 기본 DB 에서 읽는다)"""
+    key = f'fragments:{get_version()}:{name}'
+    return cache.get_or_set(key, lambda: list(loader()), settings.FRAGMENT_CACHE_TIMEOUT)
+
+
+def get_categories():
+    from .models import Category
+
+    return cached_list('categories', lambda: Category.objects.using('default').order_by('id'))
+
+
+def get_category(slug):
+    """slug 로 카테고리 찾기 (캐시된 목록에서, 없으면 404)"""
+    for category in get_categories():
+        if category.slug == slug:
+            return category
+    raise Http404('카테고리를 찾을 수 없습니다.')
+
+
+def get_announcements(limit):
+    from .models import Announcement
+
+    return cached_list(
+        f'announcements:{limit}',
+        lambda: Announcement.objects.using('default').select_related('author').order_by('-created_at')[:limit],
+    )
+
+
+def announcements_loader(limit):
+    """템플릿 조각 캐시가 비었을 때만 불리도록 인자 없는 함수로 감싼다"""
+    return lambda: get_announcements(limit)
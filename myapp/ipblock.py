@@ -0,0 +1,122 @@
+import ipaddress
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+# 워커 프로세스 간 차단 목록 변경을 알리는 캐시 키
+VERSION_CACHE_KEY = 'blockedip:version'
+
+
+def parse_ip(value):
+    """문자열 IP 를 ipaddress 객체로 (IPv4-mapped IPv6 는 IPv4 로) - 잘못된 값이면 None"""
+    try:
+        address = ipaddress.ip_address((value or '').strip())
+    except ValueError:
+        return None
+    if address.version == 6 and address.ipv4_mapped:
+        return address.ipv4_mapped
+    return address
+
+
+class PrefixTree:
+    """비트 단위 이진 트라이 (radix/prefix tree)
+
+    노드는 [0 자식, 1 자식, 값] 리스트. 조회는 주소의 상위 비트부터 내려가며
+    처음 만나는 대역의 값을 돌려주므로 비용은 O(프리픽스 길이) 이다.
+    """
+
+    __slots__ = ('root', 'bits')
+
+    def __init__(self, bits):
+        self.root = [None, None, None]
+        self.bits = bits
+
+    def insert(self, network, value):
+        node = self.root
+        address = int(network.network_address)
+        for i in range(network.prefixlen):
+            bit = (address >> (self.bits - 1 - i)) & 1
+            if node[bit] is None:
+                node[bit] = [None, None, None]
+            node = node[bit]
+        if node[2] is None:
+            node[2] = value
+
+    def lookup(self, address):
+        node = self.root
+        value = int(address)
+        shift = self.bits - 1
+        while node is not None:
+            if node[2] is not None:
+                return node[2]
+            if shift < 0:
+                return None
+            node = node[(value >> shift) & 1]
+            shift -= 1
+        return None
+
+
+class BlockedIPIndex:
+    """차단 IP / 대역을 메모리에 올려 둔 인덱스 (조회 시 DB 쿼리 없음)
+
+    BlockedIP 가 바뀌면 캐시의 버전 값이 바뀌고, 각 워커는
+    BLOCKED_IP_RECHECK_SECONDS 마다 버전만 확인해 달라졌을 때만 다시 읽는다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._trees = None
+        self._version = None
+        self._checked_at = 0.0
+
+    def _load(self):
+        from .models import BlockedIP
+
+        trees = {4: PrefixTree(32), 6: PrefixTree(128)}
+        for ip_address, prefix_length, reason in BlockedIP.objects.values_list(
+            'ip_address', 'prefix_length', 'reason'
+        ):
+            network = BlockedIP.to_network(ip_address, prefix_length)
+            if network is not None:
+                trees[network.version].insert(network, reason or '')
+        return trees
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._trees is not None and now - self._checked_at < settings.BLOCKED_IP_RECHECK_SECONDS:
+            return
+        with self._lock:
+            if self._trees is not None and now - self._checked_at < settings.BLOCKED_IP_RECHECK_SECONDS:
+                return
+            version = cache.get(VERSION_CACHE_KEY)
+            if version is None:
+                version = uuid.uuid4().hex
+                cache.add(VERSION_CACHE_KEY, version, None)
+                version = cache.get(VERSION_CACHE_KEY, version)
+            if self._trees is None or version != self._version:
+                self._trees = self._load()
+                self._version = version
+            self._checked_at = now
+
+    def lookup(self, ip):
+        """차단된 IP 면 차단 사유(문자열), 아니면 None"""
+        address = ip if isinstance(ip, (ipaddress.IPv4Address, ipaddress.IPv6Address)) else parse_ip(ip)
+        if address is None:
+            return None
+        self._refresh()
+        return self._trees[address.version].lookup(address)
+
+    def is_blocked(self, ip):
+        return self.lookup(ip) is not None
+
+    def invalidate(self):
+        """모든 워커가 다음 확인 때 목록을 다시 읽도록 버전 변경"""
+        cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+        with self._lock:
+            self._trees = None
+
+
+blocked_ips = BlockedIPIndex()
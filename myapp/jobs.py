@@ -0,0 +1,164 @@
+import random
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+from .sqlite import retry_on_locked
+
+# 작업 이름 → 함수
+_tasks = {}
+
+# 지금 실행 중인 작업 (report_progress 용)
+_current = threading.local()
+
+
+def task(name):
+    """함수를 백그라운드 작업으로 등록하는 데코레이터"""
+    def decorator(func):
+        _tasks[name] = func
+        return func
+    return decorator
+
+
+def get_task(name):
+    try:
+        return _tasks[name]
+    except KeyError:
+        raise LookupError(f'등록되지 않은 작업: {name}')
+
+
+def enqueue(task_name, *args, priority=0, delay=0, max_attempts=3, **kwargs):
+    """작업을 큐에 넣는다 (JOBS_ALWAYS_EAGER 이면 커밋 후 바로 실행)"""
+    get_task(task_name)
+    if settings.JOBS_ALWAYS_EAGER:
+        transaction.on_commit(lambda: get_task(task_name)(*args, **kwargs))
+        return None
+    return Job.objects.create(
+        task=task_name,
+        args=list(args),
+        kwargs=kwargs,
+        priority=priority,
+        max_attempts=max_attempts,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def _claimable(now):
+    """실행 가능한 작업 - 대기 중이거나, 실행 중인데 가시성 타임아웃이 지났고 재시도 횟수가 남은 작업"""
+    return (
+        Q(status=Job.STATUS_QUEUED, run_at__lte=now)
+        | Q(status=Job.STATUS_RUNNING, locked_until__lt=now, attempts__lt=F('max_attempts'))
+    )
+
+
+def _fail_abandoned(now):
+    """워커가 죽어 잠금이 풀린 작업 중 재시도 횟수를 다 쓴 작업은 실패 처리 (워커를 죽이는 작업이 무한히 재시도되지 않도록)"""
+    Job.objects.filter(
+        status=Job.STATUS_RUNNING, locked_until__lt=now, attempts__gte=F('max_attempts')
+    ).update(
+        status=Job.STATUS_FAILED, locked_until=None, finished_at=now,
+        last_error='실행 중 워커가 종료되었고 재시도 횟수를 모두 사용했습니다.',
+    )
+
+
+@retry_on_locked
+def claim_jobs(worker_id, limit, visibility_timeout):
+    """우선순위 순으로 작업을 최대 limit 개 가져와 잠근다
+
+    후보를 고른 뒤 조건부 UPDATE 로 하나씩 잠그므로, 여러 워커가 동시에
+    돌아도 (SQLite 포함) 같은 작업을 두 번 가져가지 않는다.
+    """
+    now = timezone.now()
+    _fail_abandoned(now)
+    candidates = list(
+        Job.objects.filter(_claimable(now))
+        .order_by('-priority', 'run_at', 'id')
+        .values_list('id', flat=True)[:limit * 2]
+    )
+    claimed = []
+    for job_id in candidates:
+        updated = Job.objects.filter(_claimable(now), pk=job_id).update(
+            status=Job.STATUS_RUNNING,
+            locked_by=worker_id,
+            locked_until=now + timedelta(seconds=visibility_timeout),
+            attempts=F('attempts') + 1,
+        )
+        if updated:
+            claimed.append(job_id)
+            if len(claimed) >= limit:
+                break
+    return list(Job.objects.filter(pk__in=claimed).order_by('-priority', 'run_at', 'id'))
+
+
+@retry_on_locked
+def extend_lock(job_ids, worker_id, visibility_timeout):
+    """실행 중인 작업의 가시성 타임아웃 연장 (워커가 살아 있는 동안)"""
+    if job_ids:
+        Job.objects.filter(pk__in=job_ids, locked_by=worker_id, status=Job.STATUS_RUNNING).update(
+            locked_until=timezone.now() + timedelta(seconds=visibility_timeout)
+        )
+
+
+@retry_on_locked
+def mark_done(job):
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.STATUS_DONE, locked_until=None, finished_at=timezone.now(), last_error=''
+    )
+
+
+@retry_on_locked
+def mark_failed(job, error):
+    """실패 처리 - 재시도 횟수가 남았으면 지수 백오프 후 다시 대기열로"""
+    if job.attempts < job.max_attempts:
+        backoff = settings.JOBS_RETRY_BACKOFF * (2 ** (job.attempts - 1))
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.STATUS_QUEUED,
+            locked_until=None,
+            run_at=timezone.now() + timedelta(seconds=backoff * random.uniform(0.8, 1.2)),
+            last_error=error,
+        )
+    else:
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.STATUS_FAILED, locked_until=None, finished_at=timezone.now(), last_error=error
+        )
+
+
+class TaskError(Exception):
+    """작업 실패 (프로세스 경계를 넘어 traceback 전달)"""
+
+
+def run_task(task_name, args, kwargs, job_id=None):
+    """작업 함수 실행 - 실패 시 traceback 문자열을 담은 TaskError"""
+    _current.job_id = job_id
+    try:
+        get_task(task_name)(*args, **kwargs)
+    except Exception:
+        raise TaskError(traceback.format_exc())
+    finally:
+        _current.job_id = None
+
+
+def report_progress(done, total):
+    """실행 중인 작업의 진행 상황 기록 (관리자 화면에 표시, 즉시 실행 모드에서는 무시)"""
+    job_id = getattr(_current, 'job_id', None)
+    if job_id is not None:
+        Job.objects.filter(pk=job_id).update(progress_done=done, progress_total=total)
+
+
+def overdue_jobs(seconds):
+    """실행 시각이 seconds 초 넘게 지났는데 아직 대기 중인 작업 수 - 0 이 아니면 워커가 돌고 있지 않다는 신호"""
+    cutoff = timezone.now() - timedelta(seconds=seconds)
+    return Job.objects.filter(status=Job.STATUS_QUEUED, run_at__lt=cutoff).count()
+
+
+def purge_finished(days):
+    """끝난 지 오래된 완료 작업 삭제"""
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = Job.objects.filter(status=Job.STATUS_DONE, finished_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,164 @@
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from django.conf import settings
+
+# 지금 처리 중인 요청의 ID (RequestIdMiddleware 가 설정, sync_to_async 스레드로도 전달된다)
+request_id = ContextVar('request_id', default=None)
+
+# 클라이언트 / 프록시가 보낸 X-Request-ID 는 이 길이까지만 그대로 쓴다
+REQUEST_ID_MAX_LENGTH = 64
+
+
+def new_request_id(header=None):
+    """프록시가 붙인 요청 ID 가 있으면 그대로, 없거나 이상하면 새로 만든다"""
+    if header and len(header) <= REQUEST_ID_MAX_LENGTH and header.isprintable() and '"' not in header:
+        return header
+    return uuid.uuid4().hex
+
+
+def elapsed_ms(started):
+    """time.perf_counter() 로 잰 시작 시각부터 지금까지 (밀리초)"""
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def log_event(logger, event, level=logging.INFO, user=None, exc_info=None, **fields):
+    """구조화된 이벤트 하나 기록 - JsonFormatter 가 fields 를 JSON 키로 펼친다
+
+    LOG_SAMPLE_RATES 에 비율이 있는 이벤트는 그 비율만큼만 남긴다 (WARNING 이상은 항상).
+    남긴 이벤트에는 sample_rate 를 붙여 집계할 때 1 / sample_rate 배로 복원할 수 있게 한다.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    rate = settings.LOG_SAMPLE_RATES.get(event) if level < logging.WARNING else None
+    if rate is not None and rate < 1:
+        if random.random() >= rate:
+            return
+        fields['sample_rate'] = rate
+    if user is not None and user.is_authenticated:
+        fields['user_id'] = user.pk
+        fields['username'] = user.get_username()
+    logger.log(level, event, exc_info=exc_info, extra={'event_fields': fields})
+
+
+class RequestContextFilter(logging.Filter):
+    """레코드에 현재 요청 ID 를 붙인다 (핸들러 필터 - 로그를 남긴 스레드에서 실행된다)"""
+
+    def filter(self, record):
+        record.request_id = request_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """한 줄짜리 JSON 이벤트 - time / level / logger / event / request_id 와 log_event 의 필드"""
+
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'event': record.getMessage(),
+        }
+        if getattr(record, 'request_id', None):
+            data['request_id'] = record.request_id
+        data.update(getattr(record, 'event_fields', None) or {})
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exception'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class QueuedStreamHandler(QueueHandler):
+    """요청 스레드는 큐에 넣기만 하고 백그라운드 스레드가 스트림에 쓰는 핸들러
+
+    stdout 파이프가 막혀도 요청이 기다리지 않도록 큐가 가득 차면 레코드를 버리고 개수만 센다.
+    버린 개수는 다음에 쓸 수 있을 때 log.dropped 이벤트로 남긴다. fork 된 워커는 자기 스레드를 따로 띄운다.
+    """
+
+    def __init__(self, stream=None, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.target = logging.StreamHandler(stream or sys.stdout)
+        self.dropped = 0
+        self._pid = None
+        self._listener = None
+        self._start_lock = threading.Lock()
+
+    def setFormatter(self, fmt):
+        # JSON 변환은 백그라운드 스레드에서 (prepare 가 요청 스레드에서 포맷하지 않도록)
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        return _copy_record(record)
+
+    def enqueue(self, record):
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_listener(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # fork 된 워커 - 부모의 큐 내용과 (복제되지 않은) 스레드는 버린다
+                self.queue = queue.Queue(self.queue.maxsize)
+                self.dropped = 0
+            self._listener = QueueListener(self.queue, _DropReporter(self), respect_handler_level=False)
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def close(self):
+        """남은 레코드를 모두 쓰고 스레드 종료 (logging.shutdown - 프로세스 종료 시)"""
+        if self._pid == os.getpid() and self._listener is not None:
+            try:
+                self._listener.stop()
+            except queue.Full:
+                # 종료 표시를 넣을 자리도 없으면 기다리지 않는다 (데몬 스레드)
+                pass
+        self._listener = None
+        self._pid = None
+        self.target.flush()
+        super().close()
+
+
+class _DropReporter(logging.Handler):
+    """QueueListener 가 쓰는 대상 - 버려진 레코드가 있었으면 먼저 그 개수를 기록"""
+
+    def __init__(self, owner):
+        super().__init__()
+        self.owner = owner
+
+    def handle(self, record):
+        dropped, self.owner.dropped = self.owner.dropped, 0
+        if dropped:
+            notice = logging.LogRecord(record.name, logging.WARNING, __file__, 0, 'log.dropped', None, None)
+            notice.event_fields = {'count': dropped}
+            self.owner.target.handle(notice)
+        self.owner.target.handle(record)
+
+
+def _copy_record(record):
+    """큐로 넘길 레코드 - 메시지 인자는 지금 합치고(원본 객체가 바뀌기 전에) 예외는 문자열로"""
+    copy = logging.makeLogRecord(record.__dict__)
+    copy.msg = record.getMessage()
+    copy.args = None
+    if record.exc_info:
+        copy.exc_text = logging.Formatter().formatException(record.exc_info)
+        copy.exc_info = None
+    return copy
+
@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+
+from myapp.filetypes import classify_queryset
+from myapp.metadata import extract_metadata
+from myapp.models import Post, PostFile
+
+METADATA_FIELDS = ['file_size', 'mime_type', 'file_type', 'width', 'height', 'duration']
+
+
+class Command(BaseCommand):
+    help = '기존 첨부파일의 크기 / MIME / 분류 / 가로세로 / 재생시간을 DB 컬럼에 채웁니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='한 번에 저장할 행 수')
+        parser.add_argument('--all', action='store_true', help='이미 기록된 행도 다시 계산')
+        parser.add_argument('--types-only', action='store_true',
+                            help='파일을 열지 않고 확장자로 file_type 만 채움')
+
+    def handle(self, *args, **options):
+        if options['types_only']:
+            return self.fill_types(options['batch_size'])
+
+        batch_size = options['batch_size']
+        queryset = PostFile.objects.order_by('id')
+        if not options['all']:
+            queryset = queryset.filter(file_size__isnull=True)
+
+        updated = missing = 0
+        batch = []
+        for post_file in queryset.iterator(chunk_size=batch_size):
+            try:
+                metadata = extract_metadata(post_file)
+            except OSError:
+                missing += 1
+                self.stderr.write(f'파일 없음: #{post_file.id} {post_file.file.name}')
+                continue
+            for field, value in metadata.items():
+                setattr(post_file, field, value)
+            batch.append(post_file)
+            if len(batch) >= batch_size:
+                PostFile.objects.bulk_update(batch, METADATA_FIELDS)
+                Post.touch({post_file.post_id for post_file in batch})
+                updated += len(batch)
+                batch = []
+                self.stdout.write(f'{updated}개 처리...')
+        if batch:
+            PostFile.objects.bulk_update(batch, METADATA_FIELDS)
+            Post.touch({post_file.post_id for post_file in batch})
+            updated += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'{updated}개 갱신, 파일 없음 {missing}개'))
+
+    def fill_types(self, batch_size):
+        """file_type 이 비어 있는 행을 배치 분류 API 로 한 번에 채움"""
+        updated = 0
+        while True:
+            pks = list(PostFile.objects.filter(file_type='').values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            types = classify_queryset(PostFile.objects.filter(pk__in=pks))
+            PostFile.objects.bulk_update(
+                [PostFile(pk=pk, file_type=file_type) for pk, file_type in types.items()],
+                ['file_type'],
+            )
+            updated += len(types)
+        self.stdout.write(self.style.SUCCESS(f'{updated}개 file_type 갱신'))
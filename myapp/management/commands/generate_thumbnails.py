@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from myapp.models import PostFile
+from myapp.thumbnails import generate_thumbnails
+
+
+class Command(BaseCommand):
+    help = '썸네일이 없는 기존 이미지 첨부파일의 썸네일을 생성합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='이미 생성된 것도 다시 확인')
+
+    def handle(self, *args, **options):
+        queryset = PostFile.objects.filter(file_type='image')
+        if not options['all']:
+            queryset = queryset.filter(thumbnails_ready=False)
+
+        done = failed = 0
+        for post_file_id in queryset.values_list('id', flat=True).iterator():
+            if generate_thumbnails(post_file_id):
+                done += 1
+            else:
+                failed += 1
+        self.stdout.write(self.style.SUCCESS(f'{done}개 생성, {failed}개 실패(지원하지 않는 형식)'))
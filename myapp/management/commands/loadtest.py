@@ -0,0 +1,225 @@
+import http.client
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from collections import defaultdict
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.models import Category
+
+CSRF_RE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+POST_LINK_RE = re.compile(r'href="/post/(\d+)/"')
+NEXT_CURSOR_RE = re.compile(r'href="\?after=([^"]+)"')
+
+# 로그인 뒤 반복하는 동작과 비율
+DEFAULT_MIX = {'post_list': 50, 'post_list_next': 20, 'post_detail': 25, 'post_create': 5}
+
+
+def percentile(sorted_values, fraction):
+    """정렬된 값의 백분위수 (nearest-rank)"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+class Client:
+    """keep-alive 연결 하나와 쿠키를 가진 가상 사용자 (리다이렉트는 따라가지 않는다)"""
+
+    def __init__(self, base_url, timeout):
+        parts = urlsplit(base_url)
+        connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.connection = connection_class(parts.hostname, parts.port, timeout=timeout)
+        self.host = parts.netloc
+        self.cookies = {}
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        headers['Host'] = self.host
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+        try:
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            content = response.read()
+        except (OSError, http.client.HTTPException):
+            # 서버가 keep-alive 연결을 닫았으면 다음 요청에서 새로 연결
+            self.connection.close()
+            raise
+        for header in response.headers.get_all('Set-Cookie') or []:
+            for name, morsel in SimpleCookie(header).items():
+                self.cookies[name] = morsel.value
+        return response.status, content.decode('utf-8', 'replace')
+
+
+def multipart_body(fields, files):
+    """multipart/form-data 본문 - files 는 (필드명, 파일명, 내용) 목록"""
+    boundary = uuid.uuid4().hex
+    lines = []
+    for name, value in fields:
+        lines.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, filename, content in files:
+        lines.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n'.encode() + content + b'\r\n'
+        )
+    lines.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(lines), f'multipart/form-data; boundary={boundary}'
+
+
+class Command(BaseCommand):
+    help = ('실행 중인 서버에 여러 가상 사용자로 로그인 / 목록 페이징 / 상세 / 다중 첨부 글쓰기 부하를 주고 '
+            '엔드포인트별 p50/p95/p99 지연과 처리량을 보고합니다. (seed_scale 로 만든 사용자로 로그인, 글쓰기는 실제로 저장됨)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='대상 서버 주소')
+        parser.add_argument('--clients', type=int, default=20, help='동시 가상 사용자 수')
+        parser.add_argument('--duration', type=float, default=30, help='측정 시간(초)')
+        parser.add_argument('--prefix', default='seed', help='seed_scale 사용자 이름 접두사')
+        parser.add_argument('--password', default='seed-password', help='seed_scale 사용자 비밀번호')
+        parser.add_argument('--create-ratio', type=float, default=None,
+                            help='글쓰기 비율 (0~1, 기본 0.05 - 0 이면 읽기만)')
+        parser.add_argument('--files', type=int, default=3, help='글쓰기 한 번에 첨부할 파일 수')
+        parser.add_argument('--file-size', type=int, default=256 * 1024, help='첨부파일 하나의 크기(바이트)')
+        parser.add_argument('--max-pages', type=int, default=5, help='다음 페이지를 따라갈 최대 깊이')
+        parser.add_argument('--timeout', type=float, default=30, help='요청 타임아웃(초)')
+        parser.add_argument('--json', dest='json_path', help='결과를 JSON 파일로도 저장 (회귀 비교용)')
+
+    def handle(self, *args, **options):
+        usernames = list(
+            User.objects.filter(username__startswith=f"{options['prefix']}_")
+            .order_by('pk').values_list('username', flat=True)[:options['clients']]
+        )
+        if not usernames:
+            raise CommandError(f"'{options['prefix']}_' 로 시작하는 사용자가 없습니다. 먼저 manage.py seed_scale 을 실행하세요.")
+        category_slugs = list(Category.objects.values_list('slug', flat=True))
+
+        mix = dict(DEFAULT_MIX)
+        if options['create_ratio'] is not None:
+            reads = sum(weight for action, weight in mix.items() if action != 'post_create')
+            ratio = min(max(options['create_ratio'], 0.0), 0.99)
+            mix['post_create'] = reads * ratio / (1 - ratio)
+        self.options = options
+        self.category_slugs = category_slugs
+        self.actions, self.weights = zip(*mix.items())
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+        self.stdout.write(f"{options['base_url']} 에 가상 사용자 {options['clients']}명, {options['duration']}초")
+        deadline = time.monotonic() + options['duration']
+        threads = [
+            threading.Thread(target=self.run_client, args=(usernames[index % len(usernames)], deadline, index))
+            for index in range(options['clients'])
+        ]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.report(time.monotonic() - started)
+
+    def record(self, endpoint, started, ok):
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            self.samples[endpoint].append(elapsed)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def call(self, client, endpoint, method, path, expected, body=None, headers=None):
+        """요청 하나를 보내고 지연 / 실패를 기록 - (상태 코드, 본문) 또는 연결 실패 시 (None, '')"""
+        started = time.perf_counter()
+        try:
+            status, content = client.request(method, path, body, headers)
+        except (OSError, http.client.HTTPException):
+            self.record(endpoint, started, False)
+            return None, ''
+        self.record(endpoint, started, status in expected)
+        return status, content
+
+    def run_client(self, username, deadline, index):
+        rng = random.Random(index)
+        client = Client(self.options['base_url'], self.options['timeout'])
+
+        status, content = self.call(client, 'login_form', 'GET', '/login/', (200,))
+        match = CSRF_RE.search(content)
+        body = urlencode({
+            'username': username, 'password': self.options['password'],
+            'csrfmiddlewaretoken': match.group(1) if match else '',
+        })
+        status, content = self.call(client, 'login', 'POST', '/login/', (302,), body, {
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'Referer': self.options['base_url'] + '/login/',
+        })
+        if status != 302:
+            self.stderr.write(f'{username} 로그인 실패 (HTTP {status})')
+            return
+
+        post_ids = []
+        list_path = '/posts/'
+        next_cursor = None
+        depth = 0
+        while time.monotonic() < deadline:
+            action = rng.choices(self.actions, self.weights)[0]
+            if action == 'post_list_next' and depth and depth < self.options['max_pages'] and next_cursor:
+                status, content = self.call(client, 'post_list_next', 'GET', f'{list_path}?after={next_cursor}', (200,))
+                depth += 1
+            elif action == 'post_detail' and post_ids:
+                self.call(client, 'post_detail', 'GET', f'/post/{rng.choice(post_ids)}/', (200,))
+                continue
+            elif action == 'post_create' and self.category_slugs:
+                self.create_post(client, rng)
+                continue
+            else:
+                slug = rng.choice(self.category_slugs + [None]) if self.category_slugs else None
+                list_path = f'/posts/{slug}/' if slug else '/posts/'
+                status, content = self.call(client, 'post_list', 'GET', list_path, (200,))
+                depth = 1
+            post_ids = POST_LINK_RE.findall(content) or post_ids
+            match = NEXT_CURSOR_RE.search(content)
+            next_cursor = match.group(1) if match else None
+
+    def create_post(self, client, rng):
+        files = [
+            ('files', f'load-{rng.getrandbits(32):08x}.bin', os.urandom(self.options['file_size']))
+            for _ in range(self.options['files'])
+        ]
+        body, content_type = multipart_body([('title', '부하 테스트'), ('content', '부하 테스트 글입니다.')], files)
+        self.call(
+            client, 'post_create', 'POST', f'/posts/{rng.choice(self.category_slugs)}/create/', (302,),
+            body, {'Content-Type': content_type},
+        )
+
+    def report(self, elapsed):
+        results = {}
+        self.stdout.write(f"\n{'endpoint':<16}{'count':>8}{'err':>6}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  (ms)")
+        for endpoint in sorted(self.samples):
+            values = sorted(self.samples[endpoint])
+            row = {
+                'count': len(values),
+                'errors': self.errors[endpoint],
+                'rps': len(values) / elapsed,
+                'p50': percentile(values, 0.50) * 1000,
+                'p95': percentile(values, 0.95) * 1000,
+                'p99': percentile(values, 0.99) * 1000,
+                'max': values[-1] * 1000,
+            }
+            results[endpoint] = row
+            self.stdout.write(
+                f"{endpoint:<16}{row['count']:>8}{row['errors']:>6}{row['rps']:>9.1f}"
+                f"{row['p50']:>9.1f}{row['p95']:>9.1f}{row['p99']:>9.1f}{row['max']:>9.1f}"
+            )
+        total = sum(len(values) for values in self.samples.values())
+        self.stdout.write(f'전체 {total}건, {total / elapsed:.1f} req/s, {elapsed:.1f}초')
+
+        if self.options['json_path']:
+            with open(self.options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump({'duration': elapsed, 'clients': self.options['clients'], 'endpoints': results}, f, indent=2)
@@ -0,0 +1,198 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from myapp.models import Blob, PostFile, UploadSession
+from myapp.storage import blob_digest, file_sha256
+from myapp.thumbnails import thumbnail_owner
+from myapp.uploads import discard_session
+
+# MEDIA_ROOT 아래에서 첨부파일이 저장되는 폴더 (날짜별 저장 / 내용 기반 저장)
+SCAN_ROOTS = ('uploads', 'blobs')
+
+
+def scan_directory(root, relative):
+    """폴더 하나를 os.scandir 로 읽어 (파일 목록, 하위 폴더 목록) 반환"""
+    files = []
+    subdirs = []
+    try:
+        with os.scandir(os.path.join(root, relative)) as entries:
+            for entry in entries:
+                name = f'{relative}/{entry.name}'
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(name)
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    files.append((name, stat.st_size, stat.st_mtime))
+    except FileNotFoundError:
+        pass
+    return files, subdirs
+
+
+def source_key(name):
+    """원본 경로의 (폴더, 확장자 뺀 파일명) - 썸네일이 어떤 원본에 딸렸는지 비교할 때 사용"""
+    directory, filename = os.path.split(name)
+    return directory, os.path.splitext(filename)[0]
+
+
+def verify_checksum(path, name):
+    """blob 파일 내용이 경로의 해시값과 같은지 확인"""
+    try:
+        with open(path, 'rb') as f:
+            return file_sha256(f) == blob_digest(name)
+    except OSError:
+        return False
+
+
+class Command(BaseCommand):
+    help = 'MEDIA_ROOT 를 DB 와 비교해 참조되지 않는 파일과 파일이 없는 행을 찾고 정리합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--delete', action='store_true',
+                            help='고아 파일 / 만료된 업로드 / 참조 없는 blob 을 실제로 삭제 (없으면 보고만)')
+        parser.add_argument('--delete-dangling', action='store_true',
+                            help='파일이 없는 PostFile 행도 삭제')
+        parser.add_argument('--verify-checksums', action='store_true',
+                            help='참조되는 blob 파일의 SHA-256 을 다시 계산해 손상 여부 확인')
+        parser.add_argument('--workers', type=int, default=8, help='폴더 탐색 / 해시 계산 스레드 수')
+        parser.add_argument('--batch-size', type=int, default=2000, help='한 번에 읽을 DB 행 수')
+        parser.add_argument('--min-age', type=float, default=24,
+                            help='이 시간(시간)보다 최근에 수정된 파일은 업로드 중일 수 있으므로 건너뜀')
+
+    def handle(self, *args, **options):
+        root = str(settings.MEDIA_ROOT)
+        batch_size = options['batch_size']
+        delete = options['delete']
+        cutoff = time.time() - options['min_age'] * 3600
+
+        # PostFile 목록은 탐색 전에 읽어 둔다 - 탐색 중에 생긴 첨부파일을 '파일 없음' 으로 보지 않도록
+        referenced, live_sources, post_files = self.load_referenced(batch_size)
+        self.stdout.write(f'DB 참조 파일 {len(referenced)}개')
+
+        found = set()
+        orphans = []
+        orphan_bytes = recent = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            for name, size, mtime in self.scan(pool, root):
+                if name in referenced:
+                    found.add(name)
+                    continue
+                owner = thumbnail_owner(name)
+                if owner is not None and owner in live_sources:
+                    continue
+                if mtime > cutoff:
+                    recent += 1
+                    continue
+                orphans.append(name)
+                orphan_bytes += size
+
+            corrupt = []
+            if options['verify_checksums']:
+                blob_files = [name for name in found if blob_digest(name)]
+                results = pool.map(lambda name: verify_checksum(os.path.join(root, name), name), blob_files)
+                corrupt = [name for name, ok in zip(blob_files, results) if not ok]
+
+        for name in orphans:
+            self.stdout.write(f'고아 파일: {name}')
+        for name in corrupt:
+            self.stderr.write(f'체크섬 불일치: {name}')
+
+        dangling = self.find_dangling(post_files, found)
+        unreferenced_blobs = list(Blob.objects.filter(ref_count=0).values_list('id', flat=True))
+        expired_sessions, orphan_parts = self.find_stale_uploads(cutoff)
+
+        if delete:
+            for name in orphans:
+                try:
+                    os.remove(os.path.join(root, name))
+                except FileNotFoundError:
+                    pass
+            if unreferenced_blobs:
+                Blob.purge_many(unreferenced_blobs)
+            for session in expired_sessions:
+                discard_session(session)
+            for path in orphan_parts:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        if options['delete_dangling']:
+            for start in range(0, len(dangling), batch_size):
+                with transaction.atomic(), Blob.bulk_release():
+                    # 탐색 뒤에 파일이 생기거나 경로가 바뀐 행은 남긴다
+                    current = PostFile.objects.filter(pk__in=dangling[start:start + batch_size]).values_list('id', 'file')
+                    missing = [
+                        post_file_id for post_file_id, name in current
+                        if not os.path.exists(os.path.join(root, name))
+                    ]
+                    PostFile.objects.filter(pk__in=missing).delete()
+
+        prefix = '' if delete else '[보고만] '
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}고아 파일 {len(orphans)}개 ({orphan_bytes / (1024 * 1024):.1f} MB), '
+            f'최근 파일 건너뜀 {recent}개, 참조 없는 blob {len(unreferenced_blobs)}개, '
+            f'만료된 업로드 {len(expired_sessions)}개, 남은 임시 파일 {len(orphan_parts)}개'
+        ))
+        if dangling:
+            action = '삭제' if options['delete_dangling'] else '발견'
+            self.stdout.write(self.style.WARNING(f'파일이 없는 PostFile 행 {len(dangling)}개 {action}'))
+        if corrupt:
+            self.stdout.write(self.style.ERROR(f'체크섬 불일치 {len(corrupt)}개'))
+
+    def load_referenced(self, batch_size):
+        """DB 가 참조하는 파일 경로, 썸네일을 가질 수 있는 원본의 (폴더, 파일명) 집합, PostFile id → 경로"""
+        referenced = set()
+        live_sources = set()
+        post_files = {}
+        for post_file_id, name in PostFile.objects.values_list('id', 'file').iterator(chunk_size=batch_size):
+            post_files[post_file_id] = name
+            if name:
+                referenced.add(name)
+                live_sources.add(source_key(name))
+        for name in Blob.objects.values_list('name', flat=True).iterator(chunk_size=batch_size):
+            if name:
+                referenced.add(name)
+                live_sources.add(source_key(name))
+        return referenced, live_sources, post_files
+
+    def scan(self, pool, root):
+        """첨부파일 폴더를 스레드 풀에서 병렬로 탐색하며 (경로, 크기, 수정 시각) 을 내보낸다"""
+        pending = {pool.submit(scan_directory, root, folder) for folder in SCAN_ROOTS}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, subdirs = future.result()
+                yield from files
+                for subdir in subdirs:
+                    pending.add(pool.submit(scan_directory, root, subdir))
+
+    def find_dangling(self, post_files, found):
+        """탐색 전에 읽은 PostFile 중 파일이 디스크에 없는 행 id"""
+        dangling = []
+        for post_file_id, name in post_files.items():
+            if name not in found:
+                self.stderr.write(f'파일 없음: #{post_file_id} {name}')
+                dangling.append(post_file_id)
+        return dangling
+
+    def find_stale_uploads(self, cutoff):
+        """만료된 이어올리기 세션과, 세션 없이 남은 임시 파일"""
+        expiry = timezone.now() - timedelta(seconds=settings.RESUMABLE_UPLOAD_EXPIRY)
+        expired = list(UploadSession.objects.filter(updated_at__lt=expiry))
+
+        orphan_parts = []
+        upload_dir = settings.RESUMABLE_UPLOAD_DIR
+        if os.path.isdir(upload_dir):
+            active = {str(session_id) for session_id in UploadSession.objects.values_list('id', flat=True)}
+            with os.scandir(upload_dir) as entries:
+                for entry in entries:
+                    session_id = entry.name.removesuffix('.part')
+                    if entry.is_file() and session_id not in active and entry.stat().st_mtime < cutoff:
+                        orphan_parts.append(entry.path)
+        return expired, orphan_parts
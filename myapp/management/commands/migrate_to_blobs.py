@@ -0,0 +1,99 @@
+import os
+import shutil
+from functools import partial
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from myapp.jobs import enqueue
+from myapp.models import Blob, PostFile
+from myapp.storage import blob_name, content_storage, file_sha256
+from myapp.thumbnails import thumbnail_names
+
+
+def place_file(source, target):
+    """source 는 그대로 두고 같은 내용을 target 에 둔다 (하드 링크, 안 되면 임시 파일에 복사한 뒤 교체)"""
+    if os.path.exists(target):
+        return
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.link(source, target)
+    except FileExistsError:
+        pass
+    except OSError:
+        # 다른 파일 시스템 등 - 반쯤 복사된 파일이 target 으로 보이지 않도록
+        temp = f'{target}.{os.getpid()}.tmp'
+        shutil.copyfile(source, temp)
+        os.replace(temp, target)
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class Command(BaseCommand):
+    help = '기존 media/uploads 첨부파일을 내용(SHA-256) 기반 blob 저장소로 옮기고 중복을 제거합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='실제로 옮기지 않고 결과만 출력')
+        parser.add_argument('--batch-size', type=int, default=500, help='한 번에 읽을 PostFile 행 수')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        moved = deduplicated = missing = 0
+        saved_bytes = 0
+        seen = set()
+
+        queryset = PostFile.objects.filter(blob__isnull=True).only('id', 'file', 'file_type', 'thumbnails_ready')
+        for post_file in queryset.iterator(chunk_size=options['batch_size']):
+            source = content_storage.path(post_file.file.name)
+            if not os.path.exists(source):
+                missing += 1
+                self.stderr.write(f'파일 없음: #{post_file.id} {post_file.file.name}')
+                continue
+
+            size = os.path.getsize(source)
+            with open(source, 'rb') as f:
+                digest = file_sha256(f)
+            target_name = blob_name(digest, os.path.splitext(post_file.file.name)[1])
+            duplicate = digest in seen or content_storage.exists(target_name)
+            seen.add(digest)
+
+            if duplicate:
+                deduplicated += 1
+                saved_bytes += size
+            else:
+                moved += 1
+
+            if dry_run:
+                continue
+
+            # blob 파일을 먼저 두고 DB 를 바꾼 뒤, 커밋된 다음에만 원래 파일을 지운다
+            # (DB 갱신이 실패해도 행이 가리키는 파일은 그대로 남는다)
+            place_file(source, content_storage.path(target_name))
+            old_thumbs = [content_storage.path(name) for name in thumbnail_names(post_file.file.name)]
+            new_thumbs = [content_storage.path(name) for name in thumbnail_names(target_name)]
+            # 썸네일도 새 원본 옆 thumbs/ 로 (serve_post_file 은 새 경로 기준으로 찾는다)
+            for old_thumb, new_thumb in zip(old_thumbs, new_thumbs):
+                if os.path.exists(old_thumb):
+                    place_file(old_thumb, new_thumb)
+            thumbnails_ready = post_file.thumbnails_ready and all(os.path.exists(path) for path in new_thumbs)
+            with transaction.atomic():
+                blob = Blob.acquire(target_name, size)
+                PostFile.objects.filter(pk=post_file.pk).update(
+                    file=target_name, blob=blob, thumbnails_ready=thumbnails_ready
+                )
+                if post_file.thumbnails_ready and not thumbnails_ready and post_file.get_file_type() == 'image':
+                    # 옮길 썸네일이 없던 이미지는 새 경로에서 다시 생성
+                    enqueue('thumbnails.generate', post_file.pk, priority=10)
+                for path in [source] + old_thumbs:
+                    transaction.on_commit(partial(remove_file, path))
+
+        prefix = '[dry-run] ' if dry_run else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}이동 {moved}개, 중복 제거 {deduplicated}개 ({saved_bytes / (1024 * 1024):.1f} MB 절약), '
+            f'파일 없음 {missing}개'
+        ))
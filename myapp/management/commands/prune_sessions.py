@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from myapp.sessions import prune_expired_sessions
+
+
+class Command(BaseCommand):
+    help = '만료된 세션을 작은 배치로 나눠 삭제합니다. (clearsessions 대신 사용)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='한 번에 삭제할 세션 수')
+        parser.add_argument('--max-batches', type=int, default=None, help='이 횟수만큼만 삭제하고 종료')
+        parser.add_argument('--pause', type=float, default=0.05, help='배치 사이 쉬는 시간(초)')
+
+    def handle(self, *args, **options):
+        deleted = prune_expired_sessions(
+            batch_size=options['batch_size'],
+            max_batches=options['max_batches'],
+            pause=options['pause'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'만료된 세션 {deleted}개 삭제'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from myapp.models import Post
+from myapp.search import get_backend, rebuild_index
+
+
+class Command(BaseCommand):
+    help = '게시물 전문 검색 색인을 다시 만듭니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reinstall', action='store_true', help='색인 구조(FTS 테이블 / 인덱스)를 지우고 새로 생성')
+
+    def handle(self, *args, **options):
+        if options['reinstall']:
+            backend = get_backend()
+            with connection.cursor() as cursor:
+                backend.uninstall(cursor)
+                backend.install(cursor)
+        rebuild_index()
+        self.stdout.write(self.style.SUCCESS(
+            f'검색 색인 재생성 완료 ({connection.vendor}, 게시물 {Post.objects.count()}개)'
+        ))
@@ -0,0 +1,100 @@
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+
+from myapp import worker
+from myapp.jobs import claim_jobs, extend_lock, mark_done, mark_failed, purge_finished
+from myapp.sessions import prune_expired_sessions
+from myapp.sqlite import run_maintenance
+
+
+class Command(BaseCommand):
+    help = 'DB 작업 큐(Job)를 프로세스 풀에서 실행하는 워커를 시작합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=settings.JOBS_WORKER_PROCESSES,
+                            help='작업을 실행할 프로세스 수')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='대기열이 비었을 때 다시 확인하는 간격(초)')
+        parser.add_argument('--visibility-timeout', type=int, default=settings.JOBS_VISIBILITY_TIMEOUT,
+                            help='워커가 죽었을 때 작업이 다시 대기열로 돌아가기까지의 시간(초)')
+        parser.add_argument('--once', action='store_true', help='대기열이 빌 때까지만 처리하고 종료')
+
+    def handle(self, *args, **options):
+        processes = options['processes']
+        poll_interval = options['poll_interval']
+        timeout = options['visibility_timeout']
+        worker_id = f'{socket.gethostname()}:{os.getpid()}'
+
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        connections.close_all()
+        pool = self.create_pool(processes)
+        self.stdout.write(f'워커 시작: {worker_id} (프로세스 {processes}개)')
+
+        running = {}  # future → (job, 실행한 풀)
+        last_purge = 0
+        try:
+            while not self.stopping or running:
+                if not self.stopping and len(running) < processes:
+                    for job in claim_jobs(worker_id, processes - len(running), timeout):
+                        future = pool.submit(worker.execute, job.pk, job.task, job.args, job.kwargs)
+                        running[future] = (job, pool)
+
+                if not running:
+                    if options['once']:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+
+                done, _ = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job, job_pool = running.pop(future)
+                    error = future.exception()
+                    if isinstance(error, BrokenProcessPool) and job_pool is pool:
+                        # 자식 프로세스가 비정상 종료 - 풀을 새로 만들고 작업은 재시도
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        pool = self.create_pool(processes)
+                    if error is None:
+                        mark_done(job)
+                    else:
+                        mark_failed(job, str(error))
+                        self.stderr.write(f'작업 실패: {job} (시도 {job.attempts}/{job.max_attempts})')
+
+                # 살아 있는 동안은 실행 중 작업을 다른 워커가 가져가지 않도록 연장
+                extend_lock([job.pk for job, _ in running.values()], worker_id, timeout)
+
+                if time.monotonic() - last_purge > 3600:
+                    purge_finished(settings.JOBS_KEEP_DONE_DAYS)
+                    # 만료 세션도 조금씩 정리 (한 번에 최대 10만 개)
+                    prune_expired_sessions(batch_size=1000, max_batches=100, pause=0.05)
+                    if connection.vendor == 'sqlite' and settings.SQLITE_TUNING:
+                        # WAL 이 계속 커지지 않도록 가벼운 체크포인트
+                        with connection.cursor() as cursor:
+                            run_maintenance(cursor, analyze=False, checkpoint='PASSIVE')
+                    last_purge = time.monotonic()
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            self.stdout.write('워커 종료')
+
+    def create_pool(self, processes):
+        # 자식 프로세스가 부모의 DB 연결을 물려받지 않도록 spawn 사용
+        return ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=worker.init_process,
+        )
+
+    def stop(self, signum, frame):
+        """SIGTERM/SIGINT - 새 작업은 가져오지 않고 실행 중인 작업만 마무리"""
+        self.stopping = True
@@ -0,0 +1,270 @@
+import hashlib
+import mimetypes
+import os
+import random
+import re
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from myapp import search
+from myapp.filetypes import classify_extension
+from myapp.ipblock import blocked_ips
+from myapp.models import Blob, BlockedIP, Category, Post, PostFile, UserProfile
+from myapp.storage import blob_name
+
+CATEGORY_NAMES = ['자유게시판', '질문답변', '정보공유', '사진', '동영상', '자료실', '유머', '뉴스', '취미', '장터']
+# 글이 몰리는 게시판이 있도록 앞쪽 카테고리에 가중치
+CATEGORY_WEIGHTS = [30, 20, 15, 10, 8, 6, 4, 3, 2, 2]
+
+TITLE_WORDS = [
+    '오늘', '질문', '후기', '정리', '공유', '추천', '사진', '영상', '자료', '업데이트', '버그', '해결',
+    '방법', '설치', '서버', '게시판', '파일', '다운로드', '이벤트', '공지', '정보', '리뷰', '비교', '팁',
+]
+CONTENT_SENTENCES = [
+    '안녕하세요, 오랜만에 글 남깁니다.',
+    '자세한 내용은 첨부파일을 확인해 주세요.',
+    '혹시 비슷한 문제를 겪으신 분 계신가요?',
+    '설정을 바꾸고 나서 훨씬 빨라졌습니다.',
+    '다음에 더 자세히 정리해서 올리겠습니다.',
+    '댓글로 의견 남겨 주시면 감사하겠습니다.',
+    '링크가 깨졌으면 알려 주세요.',
+    '이번 주말에 테스트해 본 결과입니다.',
+]
+
+# (확장자, 비율, 평균 크기 배수) - 동영상은 드물지만 크고 이미지는 흔하고 작다
+ATTACHMENT_KINDS = [
+    ('.jpg', 40, 0.3), ('.png', 15, 0.2), ('.mp4', 8, 20.0), ('.pdf', 12, 0.5),
+    ('.zip', 10, 5.0), ('.txt', 8, 0.01), ('.mp3', 5, 1.0), ('.xlsx', 2, 0.1),
+]
+
+SIZE_RE = re.compile(r'^(\d+(?:\.\d+)?)\s*([KMGT]?)B?$', re.IGNORECASE)
+SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+def parse_size(value):
+    """'512K', '10M', '1.5G' 같은 크기 문자열 → 바이트"""
+    match = SIZE_RE.match(value.strip())
+    if not match:
+        raise CommandError(f'크기 형식이 잘못되었습니다: {value}')
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+
+def format_size(size):
+    for unit in ('B', 'KB', 'MB', 'GB', 'TB'):
+        if size < 1024 or unit == 'TB':
+            return f'{size:.1f} {unit}'
+        size /= 1024
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """auto_now / auto_now_add 를 잠시 꺼서 생성 시각을 과거로 흩뿌릴 수 있게 한다"""
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def bulk_insert(model, objs, batch_size):
+    """bulk_create 후 pk 가 채워진 객체 목록 반환
+
+    INSERT ... RETURNING 을 못 하는 DB(MySQL)는 방금 넣은 마지막 행들의 pk 를 읽어 채운다.
+    시드 데이터는 다른 쓰기가 없는 상태에서 넣는다고 가정한다.
+    """
+    created = model.objects.bulk_create(objs, batch_size=batch_size)
+    if created and created[0].pk is None:
+        pks = list(model.objects.order_by('-pk').values_list('pk', flat=True)[:len(created)])
+        for obj, pk in zip(created, reversed(pks)):
+            obj.pk = pk
+    return created
+
+
+def random_ip(rng):
+    return '.'.join(str(part) for part in (rng.randint(1, 223), rng.randint(0, 255), rng.randint(0, 255), rng.randint(1, 254)))
+
+
+class Command(BaseCommand):
+    help = '대규모 데이터로 성능을 확인하기 위한 가짜 카테고리 / 사용자 / 게시물 / 차단 IP / 첨부파일을 한꺼번에 생성합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='생성할 사용자 수')
+        parser.add_argument('--posts', type=int, default=10000, help='생성할 게시물 수')
+        parser.add_argument('--categories', type=int, default=len(CATEGORY_NAMES), help=f'카테고리 수 (최대 {len(CATEGORY_NAMES)})')
+        parser.add_argument('--blocked-ips', type=int, default=100, help='차단 IP 수 (일부는 CIDR 대역)')
+        parser.add_argument('--files-per-post', type=float, default=0.5, help='게시물당 평균 첨부파일 수')
+        parser.add_argument('--avg-file-size', default='2M', help='첨부파일 평균 크기 (예: 512K, 10M) - 종류별로 크기가 다르고 꼬리가 길다')
+        parser.add_argument('--files', choices=['sparse', 'none'], default='sparse',
+                            help='sparse: 디스크를 거의 쓰지 않는 희소 파일 생성, none: DB 행만 (파일 없음)')
+        parser.add_argument('--days', type=int, default=365, help='게시물 작성 시각을 흩뿌릴 기간(일)')
+        parser.add_argument('--prefix', default='seed', help='사용자 이름 / 카테고리 slug 접두사')
+        parser.add_argument('--password', default='seed-password', help='생성한 사용자의 비밀번호 (부하 테스트 로그인용)')
+        parser.add_argument('--batch-size', type=int, default=2000, help='bulk_create 한 번에 넣을 행 수')
+        parser.add_argument('--seed', type=int, default=None, help='난수 시드 (같은 값이면 같은 데이터)')
+        parser.add_argument('--skip-index', action='store_true', help='마지막 검색 색인 재구성을 건너뜀')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.prefix = options['prefix']
+        self.now = timezone.now()
+        self.days = options['days']
+        if options['categories'] < 1 or options['categories'] > len(CATEGORY_NAMES):
+            raise CommandError(f'--categories 는 1 ~ {len(CATEGORY_NAMES)} 이어야 합니다.')
+        if options['posts'] and not options['users']:
+            raise CommandError('게시물을 만들려면 --users 가 1 이상이어야 합니다.')
+
+        started = time.monotonic()
+        categories = self.create_categories(options['categories'])
+        user_ids = self.create_users(options['users'], options['password'])
+        self.create_blocked_ips(options['blocked_ips'])
+
+        avg_file_size = parse_size(options['avg_file_size'])
+        total_files = total_bytes = 0
+        for start in range(0, options['posts'], self.batch_size):
+            count = min(self.batch_size, options['posts'] - start)
+            with transaction.atomic():
+                posts = self.create_posts(count, categories, user_ids)
+                files, size = self.create_files(posts, options['files_per_post'], avg_file_size, options['files'])
+            total_files += files
+            total_bytes += size
+            self.stdout.write(f'  게시물 {start + count}/{options["posts"]}개, 첨부파일 {total_files}개 ({format_size(total_bytes)})')
+
+        if options['posts'] and not options['skip_index']:
+            self.stdout.write('검색 색인 재구성...')
+            search.rebuild_index()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'완료: 카테고리 {len(categories)}개, 사용자 {len(user_ids)}명, 게시물 {options["posts"]}개, '
+            f'첨부파일 {total_files}개 ({format_size(total_bytes)}), {time.monotonic() - started:.1f}초'
+        ))
+
+    def random_time(self):
+        # 최근 글이 더 많도록 (경과 시간을 제곱 분포로)
+        return self.now - timedelta(seconds=self.days * 86400 * self.rng.random() ** 2)
+
+    def create_categories(self, count):
+        categories = []
+        for index, name in enumerate(CATEGORY_NAMES[:count]):
+            category, _ = Category.objects.get_or_create(
+                slug=f'{self.prefix}-{index + 1}', defaults={'name': f'{name} ({self.prefix})'}
+            )
+            categories.append(category)
+        self.stdout.write(f'카테고리 {len(categories)}개')
+        return categories
+
+    def create_users(self, count, password):
+        """사용자 + 프로필 (비밀번호 해시는 한 번만 계산해 모두 같은 값을 쓴다)"""
+        existing = User.objects.filter(username__startswith=f'{self.prefix}_').count()
+        hashed = make_password(password)
+        user_ids = []
+        for start in range(existing, existing + count, self.batch_size):
+            stop = min(start + self.batch_size, existing + count)
+            with transaction.atomic():
+                with explicit_timestamps(UserProfile._meta.get_field('join_date')):
+                    users = bulk_insert(User, [
+                        User(username=f'{self.prefix}_{index:07d}', password=hashed, date_joined=self.random_time())
+                        for index in range(start, stop)
+                    ], self.batch_size)
+                    UserProfile.objects.bulk_create([
+                        UserProfile(user=user, ip_address=random_ip(self.rng), join_date=user.date_joined)
+                        for user in users
+                    ], batch_size=self.batch_size)
+            user_ids.extend(user.pk for user in users)
+        self.stdout.write(f'사용자 {len(user_ids)}명 (기존 {existing}명 이후)')
+        # 이전 실행에서 만든 사용자도 글쓴이로 쓴다
+        return user_ids or list(User.objects.filter(username__startswith=f'{self.prefix}_').values_list('pk', flat=True))
+
+    def create_blocked_ips(self, count):
+        if not count:
+            return
+        admin = User.objects.filter(is_superuser=True).first() or User.objects.filter(username__startswith=f'{self.prefix}_').first()
+        if admin is None:
+            self.stdout.write('차단 IP 건너뜀 (차단한 사용자로 쓸 계정이 없음)')
+            return
+        blocked = []
+        for _ in range(count):
+            # 10% 는 /16 ~ /24 대역
+            prefix_length = self.rng.choice([16, 20, 24]) if self.rng.random() < 0.1 else None
+            blocked.append(BlockedIP(
+                ip_address=random_ip(self.rng), prefix_length=prefix_length,
+                reason='시드 데이터', blocked_by=admin,
+            ))
+        BlockedIP.objects.bulk_create(blocked, batch_size=self.batch_size, ignore_conflicts=True)
+        # bulk_create 는 시그널을 보내지 않는다
+        blocked_ips.invalidate()
+        self.stdout.write(f'차단 IP {count}개')
+
+    def create_posts(self, count, categories, user_ids):
+        posts = []
+        for _ in range(count):
+            created_at = self.random_time()
+            title = ' '.join(self.rng.choices(TITLE_WORDS, k=self.rng.randint(2, 6)))
+            content = '\n'.join(self.rng.choices(CONTENT_SENTENCES, k=self.rng.randint(1, 20)))
+            posts.append(Post(
+                title=title, content=content,
+                category=self.rng.choices(categories, CATEGORY_WEIGHTS[:len(categories)])[0],
+                author_id=self.rng.choice(user_ids),
+                created_at=created_at, updated_at=created_at,
+                is_pinned=self.rng.random() < 0.001,
+            ))
+        with explicit_timestamps(Post._meta.get_field('created_at'), Post._meta.get_field('updated_at')):
+            return bulk_insert(Post, posts, self.batch_size)
+
+    def create_files(self, posts, files_per_post, avg_file_size, mode):
+        """게시물마다 첨부파일 0~여러 개 - blob 과 PostFile 행을 만들고 희소 파일로 크기만 채운다
+
+        내용은 0 바이트로 채워지므로 blob 경로의 해시는 실제 내용과 다르다 (media_gc --verify-checksums 에 걸림).
+        """
+        extensions, weights, scales = zip(*ATTACHMENT_KINDS)
+        # 종류를 섞은 전체 평균이 avg_file_size 가 되도록 배수를 정규화
+        mean_scale = sum(w * s for w, s in zip(weights, scales)) / sum(weights)
+        pending = []
+        for post in posts:
+            # 평균이 files_per_post 인 기하분포 - 대부분 0~1개, 가끔 여러 개
+            count = 0
+            while self.rng.random() < files_per_post / (1 + files_per_post):
+                count += 1
+            for _ in range(count):
+                index = self.rng.choices(range(len(extensions)), weights)[0]
+                ext = extensions[index]
+                # 로그정규분포(평균 e^0.5)로 꼬리가 긴 크기
+                size = max(1, int(self.rng.lognormvariate(0, 1) / 1.6487 * avg_file_size * scales[index] / mean_scale))
+                digest = hashlib.sha256(f'{post.pk}:{len(pending)}:{self.rng.random()}'.encode()).hexdigest()
+                pending.append((post, ext, size, blob_name(digest, ext), digest))
+        if not pending:
+            return 0, 0
+
+        blobs = bulk_insert(Blob, [
+            Blob(sha256=digest, name=name, size=size, ref_count=1)
+            for post, ext, size, name, digest in pending
+        ], self.batch_size)
+        with explicit_timestamps(PostFile._meta.get_field('uploaded_at')):
+            PostFile.objects.bulk_create([
+                PostFile(
+                    post=post, file=name, original_name=f'{post.pk}{ext}', blob=blob,
+                    uploaded_at=post.created_at, file_size=size,
+                    mime_type=mimetypes.guess_type(name)[0] or 'application/octet-stream',
+                    file_type=classify_extension(name),
+                )
+                for (post, ext, size, name, digest), blob in zip(pending, blobs)
+            ], batch_size=self.batch_size)
+
+        if mode == 'sparse':
+            for post, ext, size, name, digest in pending:
+                path = os.path.join(settings.MEDIA_ROOT, name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as f:
+                    f.truncate(size)
+        return len(pending), sum(size for post, ext, size, name, digest in pending)
@@ -0,0 +1,101 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from myapp.sqlite import pragma_statements
+
+
+def _worker(path, setup, stop, stats, lock, write):
+    conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+    for statement in setup:
+        conn.execute(statement)
+    ops = errors = 0
+    while not stop.is_set():
+        try:
+            if write:
+                conn.execute('BEGIN IMMEDIATE')
+                conn.execute(
+                    'INSERT INTO post (title, content, created_at) VALUES (?, ?, ?)',
+                    ('벤치마크', 'x' * 500, time.time()),
+                )
+                conn.execute('UPDATE post SET views = views + 1 WHERE id = ?', (random.randint(1, 1000),))
+                conn.execute('COMMIT')
+            else:
+                conn.execute(
+                    'SELECT id, title, created_at FROM post ORDER BY id DESC LIMIT 10 OFFSET ?',
+                    (random.randint(0, 100),),
+                ).fetchall()
+            ops += 1
+        except sqlite3.OperationalError:
+            errors += 1
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+    conn.close()
+    with lock:
+        key = 'writes' if write else 'reads'
+        stats[key] += ops
+        stats[key + '_errors'] += errors
+
+
+def run_profile(path, setup, readers, writers, duration):
+    """읽기/쓰기 스레드를 duration 초 동안 돌려 처리량과 잠금 오류 수를 잰다"""
+    stats = dict(reads=0, writes=0, reads_errors=0, writes_errors=0)
+    stop = threading.Event()
+    lock = threading.Lock()
+    threads = [
+        threading.Thread(target=_worker, args=(path, setup, stop, stats, lock, write))
+        for write in [False] * readers + [True] * writers
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return stats
+
+
+class Command(BaseCommand):
+    help = '임시 DB 파일에서 기본 저널과 SQLITE_PRAGMAS 프로필의 동시 읽기/쓰기 처리량을 비교합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8, help='읽기 스레드 수')
+        parser.add_argument('--writers', type=int, default=2, help='쓰기 스레드 수')
+        parser.add_argument('--duration', type=float, default=5.0, help='프로필마다 실행할 시간(초)')
+        parser.add_argument('--rows', type=int, default=10000, help='미리 넣어 둘 행 수')
+
+    def handle(self, *args, **options):
+        profiles = [
+            # 잠금 대기는 두 프로필 모두 같은 조건으로 - busy_timeout 만 다르면 비교가 안 된다
+            ('기본 (rollback journal)', ['PRAGMA busy_timeout = 5000']),
+            ('성능 프로필 (SQLITE_PRAGMAS)', pragma_statements()),
+        ]
+        duration = options['duration']
+        for name, setup in profiles:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'bench.sqlite3')
+                self._prepare(path, options['rows'])
+                stats = run_profile(path, setup, options['readers'], options['writers'], duration)
+            self.stdout.write(
+                f"{name}: 읽기 {stats['reads'] / duration:.0f}/s (잠금 오류 {stats['reads_errors']}), "
+                f"쓰기 {stats['writes'] / duration:.0f}/s (잠금 오류 {stats['writes_errors']})"
+            )
+
+    def _prepare(self, path, rows):
+        conn = sqlite3.connect(path, isolation_level=None)
+        conn.execute(
+            'CREATE TABLE post (id INTEGER PRIMARY KEY, title TEXT, content TEXT, '
+            'views INTEGER NOT NULL DEFAULT 0, created_at REAL)'
+        )
+        conn.execute('BEGIN')
+        conn.executemany(
+            'INSERT INTO post (title, content, created_at) VALUES (?, ?, ?)',
+            (('게시물', 'x' * 500, time.time()) for _ in range(rows)),
+        )
+        conn.execute('COMMIT')
+        conn.close()
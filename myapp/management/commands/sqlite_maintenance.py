@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from myapp.sqlite import run_maintenance
+
+
+class Command(BaseCommand):
+    help = 'SQLite WAL 체크포인트, 통계 갱신(ANALYZE), 점진적 VACUUM 을 실행합니다. (cron 등으로 주기 실행)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checkpoint', default='TRUNCATE', choices=['PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'],
+                            help='wal_checkpoint 모드 (TRUNCATE 는 WAL 파일 크기도 0 으로)')
+        parser.add_argument('--no-analyze', action='store_true', help='ANALYZE 대신 가벼운 PRAGMA optimize 만 실행')
+        parser.add_argument('--vacuum-pages', type=int, default=1000, help='한 번에 반환할 빈 페이지 수 (0 이면 건너뜀)')
+        parser.add_argument('--enable-auto-vacuum', action='store_true',
+                            help='auto_vacuum=INCREMENTAL 로 전환 (전체 VACUUM 1회 - DB 크기만큼 시간이 걸림)')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError(f'SQLite 전용 명령입니다. (현재 DB: {connection.vendor})')
+
+        with connection.cursor() as cursor:
+            if options['enable_auto_vacuum']:
+                cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                cursor.execute('VACUUM')
+                self.stdout.write('auto_vacuum=INCREMENTAL 전환 완료')
+            for line in run_maintenance(
+                cursor,
+                analyze=not options['no_analyze'],
+                vacuum_pages=options['vacuum_pages'],
+                checkpoint=options['checkpoint'],
+            ):
+                self.stdout.write(line)
+        self.stdout.write(self.style.SUCCESS('SQLite 유지보수 완료'))
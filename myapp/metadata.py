@@ -0,0 +1,84 @@
+import json
+import shutil
+import subprocess
+
+from django.conf import settings
+
+from .filetypes import classify, read_head
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow 가 없으면 이미지 크기는 기록하지 않는다
+    Image = None
+
+FFPROBE_TIMEOUT = 15
+
+
+def probe_image(path):
+    """이미지 (width, height) - 헤더만 읽는다"""
+    if Image is None:
+        return None, None
+    try:
+        with Image.open(path) as image:
+            return image.size
+    except Exception:
+        return None, None
+
+
+def probe_media(path):
+    """ffprobe 로 동영상/오디오의 (width, height, duration) 추출"""
+    ffprobe = shutil.which('ffprobe')
+    if not ffprobe or not settings.ATTACHMENT_PROBE_MEDIA:
+        return None, None, None
+    try:
+        result = subprocess.run(
+            [ffprobe, '-v', 'error', '-print_format', 'json',
+             '-show_entries', 'stream=codec_type,width,height:format=duration', path],
+            capture_output=True, timeout=FFPROBE_TIMEOUT, check=True,
+        )
+        info = json.loads(result.stdout or b'{}')
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return None, None, None
+
+    width = height = None
+    for stream in info.get('streams', []):
+        if stream.get('codec_type') == 'video':
+            width, height = stream.get('width'), stream.get('height')
+            break
+    try:
+        duration = float(info.get('format', {}).get('duration'))
+    except (TypeError, ValueError):
+        duration = None
+    return width, height, duration
+
+
+def extract_metadata(post_file, probe=True):
+    """PostFile 의 크기 / MIME / 분류 / 가로세로 / 재생시간 계산
+
+    probe=False 이면 ffprobe 는 건너뛴다 (업로드 요청 중에는 작업 큐에서 따로 실행).
+    """
+    head = None
+    if settings.ATTACHMENT_SNIFF_CONTENT:
+        with post_file.file.storage.open(post_file.file.name, 'rb') as f:
+            head = read_head(f)
+    file_type, mime_type = classify(post_file.file.name, head)
+
+    metadata = {
+        'file_size': post_file.file.size,
+        'mime_type': mime_type,
+        'file_type': file_type,
+        'width': None,
+        'height': None,
+        'duration': None,
+    }
+
+    try:
+        path = post_file.file.path
+    except NotImplementedError:
+        return metadata
+
+    if metadata['file_type'] == 'image':
+        metadata['width'], metadata['height'] = probe_image(path)
+    elif probe and metadata['file_type'] in ('video', 'audio'):
+        metadata['width'], metadata['height'], metadata['duration'] = probe_media(path)
+    return metadata
@@ -0,0 +1,298 @@
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler
+from django.template.backends.django import DjangoTemplates
+
+# 요청 지연 히스토그램 구간(초)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 요청별로 누적하는 시간 항목 (Server-Timing 이름, 설명 - 헤더 값이므로 ASCII)
+TIMINGS = (
+    ('db_time', 'db', 'SQL'),
+    ('template_time', 'tpl', 'templates'),
+    ('storage_time', 'storage', 'attachment storage'),
+    ('upload_time', 'upload', 'upload receive'),
+)
+
+# 지금 처리 중인 요청의 측정값 (sync_to_async 스레드로도 같은 객체가 전달된다)
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """요청 하나의 SQL 수 / 시간, 템플릿 / 저장소 / 업로드 시간, 업로드 바이트"""
+
+    __slots__ = ('started', 'queries', 'db_time', 'template_time', 'storage_time',
+                 'upload_time', 'upload_bytes', 'active')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = self.template_time = self.storage_time = self.upload_time = 0.0
+        self.upload_bytes = 0
+        # 중첩된 측정(저장소 _save 안의 exists 등)을 두 번 세지 않도록
+        self.active = set()
+
+    def server_timing(self, total):
+        """Server-Timing 헤더 값 (밀리초)"""
+        parts = []
+        for field, name, description in TIMINGS:
+            value = getattr(self, field)
+            if not value:
+                continue
+            if field == 'db_time':
+                description = f'{self.queries} queries'
+            elif field == 'upload_time':
+                description = f'{self.upload_bytes} bytes'
+            parts.append(f'{name};dur={value * 1000:.1f};desc="{description}"')
+        parts.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(parts)
+
+
+def start_request():
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def finish_request(token):
+    _current.reset(token)
+
+
+@contextmanager
+def timed(field):
+    """블록 실행 시간을 현재 요청의 field 에 더한다 (요청 밖이면 아무것도 안 함)"""
+    metrics = _current.get()
+    if metrics is None or field in metrics.active:
+        yield
+        return
+    metrics.active.add(field)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        setattr(metrics, field, getattr(metrics, field) + time.perf_counter() - started)
+        metrics.active.discard(field)
+
+
+def add_upload(nbytes, seconds):
+    """받은 업로드 바이트와 수신 시간 기록 (이어올리기 PATCH 등 업로드 핸들러를 거치지 않는 경로)"""
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.upload_bytes += nbytes
+        metrics.upload_time += seconds
+
+
+def record_query(execute, sql, params, many, context):
+    """connection.execute_wrappers 에 상시 걸어 두는 SQL 계측 (요청 밖에서는 그대로 실행)"""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += time.perf_counter() - started
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """connection_created 시그널 - 같은 연결 객체가 다시 연결될 때 중복으로 걸지 않는다"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class TimedTemplate:
+    """렌더링 시간을 재는 템플릿 래퍼"""
+
+    def __init__(self, template):
+        self.template = template
+
+    @property
+    def origin(self):
+        return self.template.origin
+
+    def render(self, context=None, request=None):
+        with timed('template_time'):
+            return self.template.render(context, request)
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """최상위 템플릿 렌더링 시간을 요청 측정값에 더하는 템플릿 백엔드 (include / extends 는 그 안에 포함)"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+class UploadMetricsHandler(FileUploadHandler):
+    """multipart 업로드 본문의 바이트 수와 수신 시간을 기록하고 데이터는 다음 핸들러로 그대로 넘긴다"""
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        self.started = time.perf_counter()
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+    def upload_complete(self):
+        add_upload(self.received, time.perf_counter() - self.started)
+
+
+class MetricsRegistry:
+    """프로세스별 누적 지표 - METRICS_FLUSH_INTERVAL 마다 METRICS_DIR/<pid>.json 으로 기록
+
+    /metrics 는 모든 워커의 파일을 합쳐 보여 주므로 gunicorn 워커 여러 개의 값이 한곳에 모인다.
+    """
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._views = {}
+        self._last_flush = time.monotonic()
+
+    def observe(self, view, method, status, duration, metrics):
+        if self._pid != os.getpid():
+            # fork 된 워커 - 부모의 값은 물려받지 않는다
+            self._reset()
+        with self._lock:
+            stats = self._views.get(view)
+            if stats is None:
+                stats = self._views[view] = empty_stats()
+            key = f'{method} {status}'
+            stats['requests'][key] = stats['requests'].get(key, 0) + 1
+            for index, bound in enumerate(BUCKETS):
+                if duration <= bound:
+                    stats['buckets'][index] += 1
+                    break
+            stats['count'] += 1
+            stats['sum'] += duration
+            stats['db_queries'] += metrics.queries
+            stats['db_seconds'] += metrics.db_time
+            stats['template_seconds'] += metrics.template_time
+            stats['storage_seconds'] += metrics.storage_time
+            stats['upload_bytes'] += metrics.upload_bytes
+            stats['upload_seconds'] += metrics.upload_time
+            due = time.monotonic() - self._last_flush >= settings.METRICS_FLUSH_INTERVAL
+        if due:
+            self.flush()
+
+    def flush(self):
+        """이 프로세스의 누적값을 파일로 (임시 파일에 쓴 뒤 교체하므로 읽는 쪽이 반쯤 쓴 파일을 보지 않는다)"""
+        if self._pid != os.getpid():
+            return
+        with self._lock:
+            data = json.dumps(self._views)
+            self._last_flush = time.monotonic()
+        directory = str(settings.METRICS_DIR)
+        path = os.path.join(directory, f'{self._pid}.json')
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with open(f'{path}.tmp', 'w') as f:
+                f.write(data)
+            os.replace(f'{path}.tmp', path)
+        except OSError:
+            pass
+
+
+def empty_stats():
+    return {
+        'requests': {}, 'buckets': [0] * len(BUCKETS), 'count': 0, 'sum': 0.0,
+        'db_queries': 0, 'db_seconds': 0.0, 'template_seconds': 0.0, 'storage_seconds': 0.0,
+        'upload_bytes': 0, 'upload_seconds': 0.0,
+    }
+
+
+registry = MetricsRegistry()
+
+# 워커가 정상 종료될 때 마지막 값 기록
+atexit.register(registry.flush)
+
+
+def collect():
+    """모든 워커 파일을 합친 뷰별 지표 (METRICS_FILE_MAX_AGE 보다 오래 갱신되지 않은 파일은 삭제)"""
+    registry.flush()
+    directory = str(settings.METRICS_DIR)
+    merged = {}
+    now = time.time()
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return merged
+    for entry in entries:
+        if not entry.name.endswith('.json'):
+            continue
+        try:
+            if now - entry.stat().st_mtime > settings.METRICS_FILE_MAX_AGE:
+                os.remove(entry.path)
+                continue
+            with open(entry.path) as f:
+                views = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for view, stats in views.items():
+            total = merged.setdefault(view, empty_stats())
+            for key, count in stats['requests'].items():
+                total['requests'][key] = total['requests'].get(key, 0) + count
+            total['buckets'] = [a + b for a, b in zip(total['buckets'], stats['buckets'])]
+            for key in ('count', 'sum', 'db_queries', 'db_seconds', 'template_seconds',
+                        'storage_seconds', 'upload_bytes', 'upload_seconds'):
+                total[key] += stats[key]
+    return merged
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus(views):
+    """Prometheus 텍스트 형식 (0.0.4)"""
+    lines = []
+
+    def metric(name, kind, description, samples):
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        lines.extend(samples)
+
+    metric('null1_http_requests_total', 'counter', 'Requests by view, method and status.', [
+        f'null1_http_requests_total{{view="{_label(view)}",method="{key.split()[0]}",status="{key.split()[1]}"}} {count}'
+        for view, stats in sorted(views.items()) for key, count in sorted(stats['requests'].items())
+    ])
+
+    samples = []
+    for view, stats in sorted(views.items()):
+        cumulative = 0
+        for bound, count in zip(BUCKETS, stats['buckets']):
+            cumulative += count
+            samples.append(f'null1_http_request_duration_seconds_bucket{{view="{_label(view)}",le="{bound}"}} {cumulative}')
+        samples.append(f'null1_http_request_duration_seconds_bucket{{view="{_label(view)}",le="+Inf"}} {stats["count"]}')
+        samples.append(f'null1_http_request_duration_seconds_sum{{view="{_label(view)}"}} {stats["sum"]:.6f}')
+        samples.append(f'null1_http_request_duration_seconds_count{{view="{_label(view)}"}} {stats["count"]}')
+    metric('null1_http_request_duration_seconds', 'histogram', 'Request latency by view.', samples)
+
+    for key, name, description in (
+        ('db_queries', 'null1_db_queries_total', 'SQL queries executed.'),
+        ('db_seconds', 'null1_db_query_seconds_total', 'Time spent in SQL.'),
+        ('template_seconds', 'null1_template_render_seconds_total', 'Time spent rendering templates.'),
+        ('storage_seconds', 'null1_storage_seconds_total', 'Time spent in attachment storage I/O.'),
+        ('upload_bytes', 'null1_upload_bytes_total', 'Uploaded request body bytes.'),
+        ('upload_seconds', 'null1_upload_seconds_total', 'Time spent receiving uploads.'),
+    ):
+        metric(name, 'counter', description, [
+            f'{name}{{view="{_label(view)}"}} {stats[key]}' for view, stats in sorted(views.items())
+        ])
+    return '\n'.join(lines) + '\n'
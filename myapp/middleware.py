@@ -0,0 +1,148 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponseForbidden
+from django.utils.deprecation import MiddlewareMixin
+
+from . import log, metrics
+from .ipblock import blocked_ips
+from .routers import PIN_COOKIE, replica_available
+from .sessions import mark_refreshed, needs_refresh
+from .utils import get_client_ip
+
+# process_request / process_response 형태(MiddlewareMixin)로 두어 WSGI / ASGI 모두에서 동작한다.
+# 동기 전용 미들웨어가 하나라도 있으면 ASGI 에서도 비동기 뷰가 요청마다 스레드로 감싸진다.
+
+
+class BlockedIPMiddleware(MiddlewareMixin):
+    """차단된 IP / 대역의 요청을 세션·인증 처리 전에 거부 (메모리 인덱스 조회, DB 쿼리 없음)"""
+
+    def process_request(self, request):
+        reason = blocked_ips.lookup(get_client_ip(request))
+        if reason is not None:
+            return HttpResponseForbidden(f'차단된 IP입니다. (사유: {reason})')
+        return None
+
+
+class SessionRefreshMiddleware(MiddlewareMixin):
+    """세션 만료 연장을 SESSION_REFRESH_INTERVAL 마다 한 번으로 묶는다
+
+    SESSION_SAVE_EVERY_REQUEST 대신 사용 - 데이터가 바뀌었거나 연장 간격이 지났을 때만
+    SessionMiddleware 가 세션을 저장하고 쿠키 만료 시각을 갱신한다.
+    """
+
+    def process_response(self, request, response):
+        session = getattr(request, 'session', None)
+        # 빈 (익명) 세션은 만들지 않는다
+        if session is None or session.is_empty():
+            return response
+        # 어차피 저장될 세션이면 연장 시각도 함께 기록
+        if session.modified or needs_refresh(session, settings.SESSION_REFRESH_INTERVAL):
+            mark_refreshed(session)
+        return response
+
+
+class ReplicaPinMiddleware(MiddlewareMixin):
+    """쓰기 요청(POST 등)에 성공하면 REPLICA_PIN_SECONDS 동안 기본 DB 에서 읽도록 쿠키 설정"""
+
+    def process_response(self, request, response):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400 and replica_available():
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax'
+            )
+        return response
+
+
+class RequestIdMiddleware:
+    """요청마다 ID 를 정해 로그 이벤트(myapp.log)에 붙이고 X-Request-ID 응답 헤더로 돌려준다
+
+    프록시가 X-Request-ID 를 붙여 보내면 그 값을 그대로 써서 프록시 로그와 이어 볼 수 있다.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            log.request_id.reset(token)
+        response.headers['X-Request-ID'] = request.request_id
+        return response
+
+    async def __acall__(self, request):
+        token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            log.request_id.reset(token)
+        response.headers['X-Request-ID'] = request.request_id
+        return response
+
+    def start(self, request):
+        request.request_id = log.new_request_id(request.headers.get('X-Request-ID'))
+        return log.request_id.set(request.request_id)
+
+
+class MetricsMiddleware:
+    """요청별 SQL 수 / 시간, 템플릿 / 저장소 / 업로드 시간을 모아 Server-Timing 헤더와 /metrics 지표로
+
+    다른 미들웨어의 시간까지 포함하도록 MIDDLEWARE 맨 앞에 둔다.
+    ContextVar 로 측정값을 넘기므로 WSGI / ASGI 어느 쪽이든 요청 경계를 직접 감싸야 해서
+    MiddlewareMixin 대신 동기 / 비동기 호출을 모두 구현한다.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        measured, token = metrics.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.finish_request(token)
+        return self.finish(request, response, measured)
+
+    async def __acall__(self, request):
+        measured, token = metrics.start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.finish_request(token)
+        return self.finish(request, response, measured)
+
+    def finish(self, request, response, measured):
+        total = time.perf_counter() - measured.started
+        match = request.resolver_match
+        view = match.view_name if match is not None else '<unmatched>'
+        metrics.registry.observe(view, request.method, response.status_code, total, measured)
+        if self.show_server_timing(request):
+            response.headers['Server-Timing'] = measured.server_timing(total)
+        return response
+
+    def show_server_timing(self, request):
+        """SERVER_TIMING - 'all': 모두, 'staff': 스태프에게만, 'off': 보내지 않음"""
+        mode = settings.SERVER_TIMING
+        if mode == 'all':
+            return True
+        if mode != 'staff':
+            return False
+        # 이미 불러온 사용자만 확인 - 헤더 때문에 세션 / 사용자 쿼리를 만들지 않는다
+        user = getattr(request, '_cached_user', None) or getattr(request, '_acached_user', None)
+        return user is not None and user.is_staff
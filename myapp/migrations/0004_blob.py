@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:31
+
+import django.db.models.deletion
+import myapp.models
+import myapp.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0003_uploadsession'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('name', models.CharField(max_length=255)),
+                ('size', models.BigIntegerField(default=0)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': '파일 원본(blob)',
+                'verbose_name_plural': '파일 원본(blob) 목록',
+            },
+        ),
+        migrations.AlterField(
+            model_name='postfile',
+            name='file',
+            field=models.FileField(storage=myapp.storage.attachment_storage, upload_to=myapp.models.get_upload_path),
+        ),
+        migrations.AddField(
+            model_name='postfile',
+            name='blob',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, to='myapp.blob'),
+        ),
+    ]
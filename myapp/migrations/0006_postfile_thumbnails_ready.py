@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0005_postfile_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postfile',
+            name='thumbnails_ready',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
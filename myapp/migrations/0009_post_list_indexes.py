@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0008_blockedip_prefix_length'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['category', '-is_pinned', '-created_at', '-id'], name='post_category_list_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-is_pinned', '-created_at', '-id'], name='post_list_idx'),
+        ),
+    ]
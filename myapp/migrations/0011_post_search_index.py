@@ -0,0 +1,30 @@
+from django.db import migrations
+
+
+def install_search_index(apps, schema_editor):
+    from myapp.search import get_backend
+
+    backend = get_backend(schema_editor.connection.vendor)
+    with schema_editor.connection.cursor() as cursor:
+        backend.install(cursor)
+        if schema_editor.connection.vendor == 'sqlite':
+            # 기존 게시물 색인
+            backend.rebuild(cursor)
+
+
+def uninstall_search_index(apps, schema_editor):
+    from myapp.search import get_backend
+
+    with schema_editor.connection.cursor() as cursor:
+        get_backend(schema_editor.connection.vendor).uninstall(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0010_job_progress'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0012_post_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='blockedip',
+            name='ip_address',
+            field=models.GenericIPAddressField(),
+        ),
+        migrations.AddConstraint(
+            model_name='blockedip',
+            constraint=models.UniqueConstraint(fields=('ip_address', 'prefix_length'), name='blockedip_unique_network', violation_error_message='이미 차단된 IP / 대역입니다.'),
+        ),
+        migrations.AddConstraint(
+            model_name='blockedip',
+            constraint=models.UniqueConstraint(condition=models.Q(('prefix_length__isnull', True)), fields=('ip_address',), name='blockedip_unique_single_ip', violation_error_message='이미 차단된 IP입니다.'),
+        ),
+    ]
@@ -1,7 +1,29 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+import ipaddress
 import os
+import uuid
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
 from datetime import datetime
+from .storage import attachment_storage, blob_digest
+from .metadata import extract_metadata
+from .filetypes import classify_extension, get_extension, upload_folder
+from .thumbnails import delete_thumbnails
+from .ipblock import parse_ip
+from .sqlite import retry_on_locked
+
+# IN (...) 목록 하나에 넣는 최대 개수 (SQLite 파라미터 제한 고려)
+BULK_BATCH_SIZE = 500
+
+# Blob.bulk_release() 안에서 모으는 참조 해제 (스레드별)
+_deferred_release = threading.local()
 
 def get_upload_path(instance, filename):
     """파일 업로드 경로를 동적으로 생성"""
@@ -11,26 +33,8 @@ def get_upload_path(instance, filename):
     month = now.strftime('%m')
     day = now.strftime('%d')
     
-    # 파일 확장자 추출
-    ext = os.path.splitext(filename)[1].lower()
-    
     # 파일 타입별 폴더 분류
-    if ext in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.svg']:
-        folder = 'images'
-    elif ext in ['.mp4', '.avi', '.mov', '.webm', '.mkv', '.flv', '.wmv']:
-        folder = 'videos'
-    elif ext in ['.mp3', '.wav', '.ogg', '.m4a', '.aac', '.flac']:
-        folder = 'audio'
-    elif ext in ['.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx']:
-        folder = 'documents'
-    elif ext in ['.zip', '.rar', '.7z', '.tar', '.gz']:
-        folder = 'archives'
-    elif ext in ['.exe', '.msi', '.deb', '.rpm']:
-        folder = 'executables'
-    elif ext in ['.py', '.js', '.html', '.css', '.php', '.java', '.cpp', '.c', '.h']:
-        folder = 'code'
-    else:
-        folder = 'others'
+    folder = upload_folder(classify_extension(filename))
     
     # 최종 경로: uploads/타입/년/월/일/파일명
     return f'uploads/{folder}/{year}/{month}/{day}/{filename}'
@@ -51,37 +55,217 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+class PostQuerySet(models.QuerySet):
+    def with_file_count(self):
+        """첨부파일 수를 file_count 로 함께 조회 (GROUP BY 없이 상관 서브쿼리로)"""
+        file_counts = (
+            PostFile.objects.filter(post=models.OuterRef('pk'))
+            .order_by()
+            .values('post')
+            .annotate(count=models.Count('pk'))
+            .values('count')
+        )
+        return self.annotate(
+            file_count=Coalesce(models.Subquery(file_counts), 0, output_field=models.IntegerField())
+        )
+
+    def for_list(self):
+        """게시판 목록에 필요한 작성자 / 카테고리 / 첨부파일 수를 한 번에"""
+        return self.select_related('author', 'category').with_file_count()
+
+    def for_detail(self):
+        """상세 페이지에 필요한 작성자 / 카테고리 / 첨부파일을 한 번에"""
+        return self.select_related('author', 'category').prefetch_related(
+            models.Prefetch('postfile_set', queryset=PostFile.objects.order_by('uploaded_at', 'id'))
+        )
+
+
 class Post(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField()
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
+    # 게시물이나 첨부파일이 바뀐 시각 - 조건부 GET(ETag / Last-Modified) 검증값
+    updated_at = models.DateTimeField(auto_now=True)
     is_pinned = models.BooleanField(default=False)
 
+    objects = PostQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # 게시판 목록의 커서 페이지네이션 (myapp.pagination) 정렬 순서와 동일
+            models.Index(fields=['category', '-is_pinned', '-created_at', '-id'], name='post_category_list_idx'),
+            models.Index(fields=['-is_pinned', '-created_at', '-id'], name='post_list_idx'),
+        ]
+
     def __str__(self):
         return self.title
     
+    @classmethod
+    @retry_on_locked
+    def touch(cls, post_ids):
+        """save() 를 거치지 않는 변경(첨부파일 추가/삭제, 썸네일 생성 등) 뒤 updated_at 갱신"""
+        cls.objects.filter(pk__in=post_ids).update(updated_at=timezone.now())
+    
     def get_files(self):
-        """게시물에 첨부된 모든 파일 반환"""
+        """게시물에 첨부된 모든 파일 반환 (prefetch_related 했으면 쿼리 없이)"""
         return self.postfile_set.all()
     
+    def get_file_count(self):
+        """첨부파일 수 (with_file_count() 로 annotate 했거나 prefetch 했으면 쿼리 없이)"""
+        file_count = getattr(self, 'file_count', None)
+        if file_count is not None:
+            return file_count
+        return self.postfile_set.count()
+    
     def has_files(self):
         """파일이 첨부되어 있는지 확인"""
-        return self.postfile_set.exists()
+        return self.get_file_count() > 0
+
+class Blob(models.Model):
+    """내용(SHA-256) 기준으로 한 번만 저장되는 첨부파일 원본 (참조 카운트 관리)"""
+    sha256 = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255)  # 스토리지 상 경로
+    size = models.BigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.ref_count}개 참조)"
+
+    @classmethod
+    def acquire(cls, name, size):
+        """blob 경로에 대한 참조를 하나 늘리고 Blob 반환"""
+        digest = blob_digest(name)
+        if not digest:
+            return None
+        blob, created = cls.objects.get_or_create(
+            sha256=digest, defaults={'name': name, 'size': size}
+        )
+        cls.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+        return blob
+
+    @classmethod
+    def release(cls, blob_id):
+        """참조를 하나 줄이고, 더 이상 참조가 없으면 커밋 후 파일 삭제"""
+        pending = getattr(_deferred_release, 'counts', None)
+        if pending is not None:
+            pending[blob_id] += 1
+            return
+        cls.objects.filter(pk=blob_id, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+        transaction.on_commit(lambda: cls.purge(blob_id))
+
+    @classmethod
+    @contextmanager
+    def bulk_release(cls):
+        """블록 안의 release() 를 모아 blob 별로 한 번에 차감하고, 파일 삭제는 커밋 후 한꺼번에
+
+        대량 CASCADE 삭제 때 첨부파일마다 UPDATE 와 on_commit 정리가 붙지 않도록 한다.
+        """
+        if getattr(_deferred_release, 'counts', None) is not None:
+            # 바깥 블록이 모아서 처리
+            yield
+            return
+        _deferred_release.counts = pending = Counter()
+        try:
+            yield
+        finally:
+            _deferred_release.counts = None
+        cls.release_many(pending)
+
+    @classmethod
+    def release_many(cls, counts):
+        """{blob_id: 해제할 참조 수} 를 blob 별로 한 번에 차감하고, 파일 삭제는 커밋 후 한꺼번에"""
+        by_count = defaultdict(list)
+        for blob_id, count in counts.items():
+            by_count[count].append(blob_id)
+        for count, blob_ids in by_count.items():
+            for start in range(0, len(blob_ids), BULK_BATCH_SIZE):
+                chunk = blob_ids[start:start + BULK_BATCH_SIZE]
+                # 참조 수가 모자란 blob 은 0 으로 (먼저 처리해야 차감된 blob 이 다시 걸리지 않는다)
+                cls.objects.filter(pk__in=chunk, ref_count__lt=count).update(ref_count=0)
+                cls.objects.filter(pk__in=chunk, ref_count__gte=count).update(ref_count=F('ref_count') - count)
+        if counts:
+            blob_ids = list(counts)
+            transaction.on_commit(lambda: cls.purge_many(blob_ids))
+
+    @classmethod
+    def purge(cls, blob_id):
+        """참조가 없는 blob 의 행과 파일 삭제"""
+        blob = cls.objects.filter(pk=blob_id, ref_count=0).first()
+        if blob is None:
+            return
+        deleted, _ = cls.objects.filter(pk=blob_id, ref_count=0).delete()
+        if deleted:
+            storage = attachment_storage()
+            storage.delete(blob.name)
+            delete_thumbnails(storage, blob.name)
+
+    @classmethod
+    def purge_many(cls, blob_ids):
+        """purge() 의 일괄 버전 - 참조가 없는 blob 들의 행과 파일 삭제"""
+        storage = attachment_storage()
+        for start in range(0, len(blob_ids), BULK_BATCH_SIZE):
+            chunk = blob_ids[start:start + BULK_BATCH_SIZE]
+            names = dict(cls.objects.filter(pk__in=chunk, ref_count=0).values_list('pk', 'name'))
+            if not names:
+                continue
+            cls.objects.filter(pk__in=list(names), ref_count=0).delete()
+            # 그 사이 다시 참조되어 남은 blob 은 파일도 남긴다
+            survivors = set(cls.objects.filter(pk__in=list(names)).values_list('pk', flat=True))
+            for blob_id, name in names.items():
+                if blob_id not in survivors:
+                    storage.delete(name)
+                    delete_thumbnails(storage, name)
+
+    class Meta:
+        verbose_name = "파일 원본(blob)"
+        verbose_name_plural = "파일 원본(blob) 목록"
 
 class PostFile(models.Model):
     """게시물 첨부파일 모델 (여러 파일 지원)"""
     post = models.ForeignKey(Post, on_delete=models.CASCADE)
-    file = models.FileField(upload_to=get_upload_path)
+    file = models.FileField(upload_to=get_upload_path, storage=attachment_storage)
     original_name = models.CharField(max_length=255)  # 원본 파일명 저장
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    # 내용 기반 저장 모드에서 공유하는 원본 (기존 날짜별 파일은 None)
+    blob = models.ForeignKey(Blob, null=True, blank=True, editable=False, on_delete=models.PROTECT)
+    
+    # 업로드 시 기록하는 메타데이터 (렌더링 때 파일시스템을 보지 않도록)
+    file_size = models.BigIntegerField(null=True, blank=True, db_index=True, editable=False)
+    mime_type = models.CharField(max_length=100, blank=True, db_index=True, editable=False)
+    file_type = models.CharField(max_length=20, blank=True, db_index=True, editable=False)
+    width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    duration = models.FloatField(null=True, blank=True, editable=False)  # 초
+    thumbnails_ready = models.BooleanField(default=False, editable=False)  # 썸네일 생성 완료 여부
     
     def __str__(self):
         return f"{self.post.title} - {self.original_name}"
     
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            # 파일을 먼저 저장해야 내용 기반 경로(blob)를 알 수 있다
+            file_changed = bool(self.file) and not self.file._committed
+            if file_changed:
+                self.file.save(self.file.name, self.file.file, save=False)
+            if file_changed or (self.file and self.file_size is None):
+                # 동영상/오디오 분석(ffprobe)은 작업 큐에서 처리
+                self.update_metadata(probe=False)
+            if self.blob_id is None and self.file:
+                self.blob = Blob.acquire(self.file.name, self.file_size)
+            super().save(*args, **kwargs)
+    
+    def update_metadata(self, probe=True):
+        """크기 / MIME / 분류 / 가로세로 / 재생시간을 파일에서 읽어 필드에 기록"""
+        for field, value in extract_metadata(self, probe=probe).items():
+            setattr(self, field, value)
+    
     def get_file_size(self):
         """파일 크기 반환"""
+        if self.file_size is not None:
+            return self.file_size
         try:
             return self.file.size
         except:
@@ -90,37 +274,16 @@ class PostFile(models.Model):
     def get_file_extension(self):
         """파일 확장자 반환"""
         if self.file:
-            return os.path.splitext(self.file.name)[1].lower()
+            return get_extension(self.file.name)
         return ''
     
     def get_file_type(self):
         """파일 타입 반환"""
-        ext = self.get_file_extension()
-        
-        if ext in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.svg', '.ico', '.tiff', '.tif']:
-            return "image"
-        elif ext in ['.mp4', '.avi', '.mov', '.webm', '.mkv', '.flv', '.wmv', '.m4v', '.3gp', '.ogv']:
-            return "video"
-        elif ext in ['.mp3', '.wav', '.ogg', '.m4a', '.aac', '.flac', '.wma']:
-            return "audio"
-        elif ext in ['.pdf']:
-            return "pdf"
-        elif ext in ['.txt', '.md', '.log', '.cfg', '.ini', '.conf']:
-            return "text"
-        elif ext in ['.doc', '.docx']:
-            return "document"
-        elif ext in ['.xls', '.xlsx']:
-            return "spreadsheet"
-        elif ext in ['.ppt', '.pptx']:
-            return "presentation"
-        elif ext in ['.zip', '.rar', '.7z', '.tar', '.gz', '.bz2', '.xz']:
-            return "archive"
-        elif ext in ['.exe', '.msi', '.deb', '.rpm', '.dmg', '.app']:
-            return "executable"
-        elif ext in ['.py', '.js', '.html', '.css', '.php', '.java', '.cpp', '.c', '.h', '.json', '.xml', '.sql']:
-            return "code"
-        else:
-            return "file"
+        return self.file_type or self.classify_extension()
+    
+    def classify_extension(self):
+        """확장자로 파일 타입 분류"""
+        return classify_extension(self.file.name if self.file else '')
 
 class Announcement(models.Model):
     title = models.CharField(max_length=200)
@@ -132,16 +295,119 @@ class Announcement(models.Model):
         return self.title
 
 class BlockedIP(models.Model):
-    ip_address = models.GenericIPAddressField(unique=True)
+    ip_address = models.GenericIPAddressField()
+    # CIDR 대역 차단용 프리픽스 길이 (비어 있으면 해당 IP 하나만 차단)
+    prefix_length = models.PositiveSmallIntegerField(null=True, blank=True)
     reason = models.CharField(max_length=200, default="관리자에 의한 차단")
     blocked_date = models.DateTimeField(auto_now_add=True)
     blocked_by = models.ForeignKey(User, on_delete=models.CASCADE)
 
     def __str__(self):
-        return f"차단된 IP: {self.ip_address}"
+        return f"차단된 IP: {self.get_network_display()}"
+
+    @staticmethod
+    def to_network(ip_address, prefix_length=None):
+        """IP + 프리픽스 길이를 ipaddress 네트워크로 (잘못된 값이면 None)"""
+        address = parse_ip(ip_address)
+        if address is None:
+            return None
+        try:
+            return ipaddress.ip_network(
+                (address, address.max_prefixlen if prefix_length is None else prefix_length),
+                strict=False,
+            )
+        except ValueError:
+            return None
+
+    def get_network_display(self):
+        if self.prefix_length is None:
+            return self.ip_address
+        return f"{self.ip_address}/{self.prefix_length}"
+
+    def clean(self):
+        if self.ip_address and self.to_network(self.ip_address, self.prefix_length) is None:
+            raise ValidationError({'prefix_length': '프리픽스 길이가 IP 버전에 맞지 않습니다. (IPv4: 0-32, IPv6: 0-128)'})
 
     class Meta:
         verbose_name = "차단된 IP"
         verbose_name_plural = "차단된 IP 목록"
+        # 같은 주소라도 단일 IP 와 대역(10.0.0.0 과 10.0.0.0/24, /32)은 따로 차단할 수 있다
+        constraints = [
+            models.UniqueConstraint(
+                fields=['ip_address', 'prefix_length'], name='blockedip_unique_network',
+                violation_error_message='이미 차단된 IP / 대역입니다.',
+            ),
+            # prefix_length 가 NULL 인 행끼리는 위 제약이 걸리지 않으므로 (NULL 은 서로 다른 값)
+            models.UniqueConstraint(
+                fields=['ip_address'], condition=models.Q(prefix_length__isnull=True),
+                name='blockedip_unique_single_ip', violation_error_message='이미 차단된 IP입니다.',
+            ),
+        ]
+
+
+
+
+class UploadSession(models.Model):
+    """이어올리기(resumable) 업로드 세션 - 청크 단위로 받은 뒤 PostFile로 확정"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    length = models.BigIntegerField()  # 전체 파일 크기
+    offset = models.BigIntegerField(default=0)  # 지금까지 받은 바이트 수
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.length})"
+
+    def get_temp_path(self):
+        """청크가 기록되는 임시 파일 경로"""
+        return os.path.join(settings.RESUMABLE_UPLOAD_DIR, f'{self.id}.part')
+
+    def is_complete(self):
+        return self.offset >= self.length
+
+    class Meta:
+        verbose_name = "업로드 세션"
+        verbose_name_plural = "업로드 세션 목록"
 
 
+class Job(models.Model):
+    """DB 기반 백그라운드 작업 큐 - manage.py runworker 가 처리"""
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, '대기'),
+        (STATUS_RUNNING, '실행 중'),
+        (STATUS_DONE, '완료'),
+        (STATUS_FAILED, '실패'),
+    ]
+
+    task = models.CharField(max_length=100)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    priority = models.SmallIntegerField(default=0)  # 클수록 먼저 실행
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_at = models.DateTimeField(default=timezone.now)  # 이 시각 이후에 실행
+    locked_until = models.DateTimeField(null=True, blank=True)  # 가시성 타임아웃 - 지나면 다른 워커가 다시 가져감
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    # 오래 걸리는 작업의 진행 상황 (jobs.report_progress 로 갱신)
+    progress_done = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.get_status_display()})"
+
+    class Meta:
+        verbose_name = "백그라운드 작업"
+        verbose_name_plural = "백그라운드 작업 목록"
+        indexes = [
+            models.Index(fields=['status', '-priority', 'run_at'], name='job_claim_idx'),
+        ]
@@ -0,0 +1,148 @@
+import base64
+import binascii
+from functools import partial
+
+from django.db.models import Q
+from django.http import Http404
+from django.utils.dateparse import parse_datetime
+
+# 게시물 목록 정렬 키 (모두 내림차순) - Post 의 목록 인덱스와 같은 순서
+POST_ORDERING = ('is_pinned', 'created_at', 'id')
+
+
+def encode_cursor(post):
+    """게시물의 정렬 키를 URL 에 넣을 수 있는 커서 문자열로"""
+    raw = f'{int(post.is_pinned)}|{post.created_at.isoformat()}|{post.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(value):
+    """커서 문자열을 (is_pinned, created_at, id) 로 - 잘못된 값이면 None"""
+    if not value:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)).decode()
+        pinned, created_at, pk = raw.split('|')
+        created_at = parse_datetime(created_at)
+        if created_at is None or pinned not in ('0', '1'):
+            return None
+        return pinned == '1', created_at, int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def _after(key):
+    """정렬 순서상 key 보다 뒤에 오는 행 (is_pinned, created_at, id) < key"""
+    pinned, created_at, pk = key
+    return (
+        Q(is_pinned__lt=pinned)
+        | Q(is_pinned=pinned, created_at__lt=created_at)
+        | Q(is_pinned=pinned, created_at=created_at, id__lt=pk)
+    )
+
+
+def _before(key):
+    """정렬 순서상 key 보다 앞에 오는 행 (is_pinned, created_at, id) > key"""
+    pinned, created_at, pk = key
+    return (
+        Q(is_pinned__gt=pinned)
+        | Q(is_pinned=pinned, created_at__gt=created_at)
+        | Q(is_pinned=pinned, created_at=created_at, id__gt=pk)
+    )
+
+
+class KeysetPage:
+    """커서 기반 페이지 - COUNT(*) 없이 이전/다음 여부만 안다"""
+
+    def __init__(self, object_list, has_next, has_previous, number=None):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        # ?page=N 으로 들어온 앞쪽 페이지만 번호가 있다
+        self.number = number
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    def next_cursor(self):
+        return encode_cursor(self.object_list[-1]) if self._has_next else None
+
+    def previous_cursor(self):
+        return encode_cursor(self.object_list[0]) if self._has_previous and self.object_list else None
+
+    def previous_page_number(self):
+        """앞쪽 번호 페이지에서는 ?page=N-1 링크를 그대로 사용"""
+        if self.number and self.number > 1:
+            return self.number - 1
+        return None
+
+
+class KeysetPaginator:
+    """(is_pinned, created_at, id) 키 기준 커서 페이지네이션
+
+    OFFSET 대신 마지막 행의 키 다음부터 인덱스를 읽으므로 깊은 페이지도
+    첫 페이지와 비용이 같다. 예전 ?page=N 링크는 max_offset_pages 까지만
+    OFFSET 으로 처리하고 그 뒤 번호는 404 (다른 페이지를 보여 주지 않는다).
+    """
+
+    def __init__(self, queryset, per_page, max_offset_pages=5):
+        self.queryset = queryset.order_by(*(f'-{field}' for field in POST_ORDERING))
+        self.per_page = per_page
+        self.max_offset_pages = max_offset_pages
+
+    def _query(self, params):
+        """요청 파라미터 → (읽을 쿼리셋, 읽은 행으로 페이지를 만드는 함수)"""
+        after = decode_cursor(params.get('after'))
+        if after is not None:
+            return self.queryset.filter(_after(after))[:self.per_page + 1], self._after_page
+
+        before = decode_cursor(params.get('before'))
+        if before is not None:
+            reverse = self.queryset.filter(_before(before)).order_by(*POST_ORDERING)
+            return reverse[:self.per_page + 1], self._before_page
+
+        try:
+            number = int(params.get('page', 1))
+        except (TypeError, ValueError):
+            number = 1
+        if number > self.max_offset_pages:
+            raise Http404('번호로는 앞쪽 페이지만 열 수 있습니다. 목록의 이전 / 다음 링크를 이용하세요.')
+        number = max(number, 1)
+        offset = (number - 1) * self.per_page
+        return self.queryset[offset:offset + self.per_page + 1], partial(self._number_page, number)
+
+    def _after_page(self, rows):
+        return KeysetPage(rows[:self.per_page], len(rows) > self.per_page, True)
+
+    def _before_page(self, rows):
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        rows.reverse()
+        if not has_previous:
+            # 맨 앞에 도달 - 첫 페이지와 같은 주소로 보이도록 번호를 붙인다
+            return KeysetPage(rows, True, False, number=1)
+        return KeysetPage(rows, True, True)
+
+    def _number_page(self, number, rows):
+        return KeysetPage(rows[:self.per_page], len(rows) > self.per_page, number > 1, number=number)
+
+    def get_page(self, params):
+        queryset, make_page = self._query(params)
+        return make_page(list(queryset))
+
+    async def aget_page(self, params):
+        """get_page 의 비동기 버전 (비동기 ORM 으로 행을 읽는다)"""
+        queryset, make_page = self._query(params)
+        return make_page([row async for row in queryset])
@@ -0,0 +1,67 @@
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+# 이 요청(컨텍스트)의 읽기를 복제본으로 보낼지
+_use_replica = ContextVar('use_replica', default=False)
+
+# 쓰기 요청 뒤 기본 DB 에 고정하는 쿠키
+PIN_COOKIE = 'db_pin'
+
+# 복제본에서 읽어도 되는 앱 - 세션 / 인증은 로그인 직후에도 항상 기본 DB
+REPLICA_APPS = {'myapp'}
+
+
+def replica_available():
+    return 'replica' in connections.databases
+
+
+class ReplicaRouter:
+    """read_replica 로 감싼 뷰 안에서만 myapp 읽기를 복제본으로, 나머지는 모두 기본 DB"""
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and model._meta.app_label in REPLICA_APPS and replica_available():
+            return 'replica'
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # 복제본은 같은 데이터의 사본
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+def read_replica(view_func):
+    """읽기 전용 뷰 - 최근에 글을 쓴 사용자(고정 쿠키)가 아니면 복제본에서 읽는다
+
+    비동기 뷰도 감쌀 수 있다 (ContextVar 는 sync_to_async 스레드로 그대로 전달된다).
+    """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            if PIN_COOKIE in request.COOKIES:
+                return await view_func(request, *args, **kwargs)
+            token = _use_replica.set(True)
+            try:
+                return await view_func(request, *args, **kwargs)
+            finally:
+                _use_replica.reset(token)
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if PIN_COOKIE in request.COOKIES:
+            return view_func(request, *args, **kwargs)
+        token = _use_replica.set(True)
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            _use_replica.reset(token)
+    return wrapper
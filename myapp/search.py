@@ -0,0 +1,189 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+
+# 검색어에서 단어만 뽑는다 (한글 포함, FTS 문법 문자는 버림)
+TERM_RE = re.compile(r'\w+')
+MAX_TERMS = 10
+
+FTS_TABLE = 'myapp_post_fts'
+INDEX_NAME = 'post_search_idx'
+
+
+def parse_terms(query):
+    """검색어 문자열 → 단어 목록 (최대 MAX_TERMS 개)"""
+    return TERM_RE.findall(query or '')[:MAX_TERMS]
+
+
+class SQLiteSearch:
+    """SQLite FTS5 가상 테이블 (rowid = Post.id) - 시그널로 동기화
+
+    unicode61 토크나이저는 공백 단위로 나누므로 '게시판에서' 같은 조사 붙은 단어도
+    찾을 수 있게 모든 단어를 접두사 검색("단어"*)으로 만든다.
+    """
+
+    def install(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+            f"USING fts5(title, content, tokenize='unicode61 remove_diacritics 2')"
+        )
+
+    def uninstall(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+    def index(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, content) VALUES (%s, %s, %s)',
+                [post.pk, post.title, post.content],
+            )
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+
+    def remove_many(self, posts):
+        """게시물 쿼리셋에 해당하는 색인을 DELETE 하나로 (서브쿼리 - id 목록을 읽지 않는다)"""
+        sql, params = posts.values('id').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({sql})', params)
+
+    def rebuild(self, cursor):
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, content) SELECT id, title, content FROM myapp_post'
+        )
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+
+    def search(self, terms, category_id, limit):
+        match = ' '.join('"%s"*' % term for term in terms)
+        sql = (
+            f'SELECT p.id FROM {FTS_TABLE} f JOIN myapp_post p ON p.id = f.rowid '
+            f'WHERE {FTS_TABLE} MATCH %s'
+        )
+        params = [match]
+        if category_id is not None:
+            sql += ' AND p.category_id = %s'
+            params.append(category_id)
+        # bm25 는 작을수록 관련도가 높다 - 제목 일치에 가중치
+        sql += f' ORDER BY bm25({FTS_TABLE}, 10.0, 1.0), p.id DESC LIMIT %s'
+        params.append(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+
+class PostgreSQLSearch:
+    """PostgreSQL tsvector 식 GIN 인덱스 - Post 테이블 자체를 색인하므로 별도 동기화 불필요"""
+
+    VECTOR = "to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(content, ''))"
+
+    def install(self, cursor):
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON myapp_post USING GIN (({self.VECTOR}))')
+
+    def uninstall(self, cursor):
+        cursor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+    def index(self, post):
+        pass
+
+    def remove(self, post_id):
+        pass
+
+    def remove_many(self, posts):
+        pass
+
+    def rebuild(self, cursor):
+        cursor.execute(f'REINDEX INDEX {INDEX_NAME}')
+
+    def search(self, terms, category_id, limit):
+        query = ' & '.join(f'{term}:*' for term in terms)
+        sql = (
+            f"SELECT id FROM myapp_post WHERE {self.VECTOR} @@ to_tsquery('simple', %s)"
+        )
+        params = [query]
+        if category_id is not None:
+            sql += ' AND category_id = %s'
+            params.append(category_id)
+        sql += f" ORDER BY ts_rank({self.VECTOR}, to_tsquery('simple', %s)) DESC, id DESC LIMIT %s"
+        params += [query, limit]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+
+class MySQLSearch:
+    """MySQL FULLTEXT 인덱스 (ngram 파서 - 한글처럼 띄어쓰기와 단어가 다른 언어용)"""
+
+    def install(self, cursor):
+        cursor.execute(
+            f'ALTER TABLE myapp_post ADD FULLTEXT INDEX {INDEX_NAME} (title, content) WITH PARSER ngram'
+        )
+
+    def uninstall(self, cursor):
+        cursor.execute(f'ALTER TABLE myapp_post DROP INDEX {INDEX_NAME}')
+
+    def index(self, post):
+        pass
+
+    def remove(self, post_id):
+        pass
+
+    def remove_many(self, posts):
+        pass
+
+    def rebuild(self, cursor):
+        cursor.execute('OPTIMIZE TABLE myapp_post')
+
+    def search(self, terms, category_id, limit):
+        query = ' '.join(f'+"{term}"' for term in terms)
+        sql = 'SELECT id FROM myapp_post WHERE MATCH (title, content) AGAINST (%s IN BOOLEAN MODE)'
+        params = [query]
+        if category_id is not None:
+            sql += ' AND category_id = %s'
+            params.append(category_id)
+        sql += ' ORDER BY MATCH (title, content) AGAINST (%s IN BOOLEAN MODE) DESC, id DESC LIMIT %s'
+        params += [query, limit]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearch,
+    'postgresql': PostgreSQLSearch,
+    'mysql': MySQLSearch,
+}
+
+
+def get_backend(vendor=None):
+    """DB 종류에 맞는 검색 백엔드"""
+    return BACKENDS[vendor or connection.vendor]()
+
+
+def search_post_ids(query, category=None, limit=None):
+    """검색어와 일치하는 게시물 id 를 관련도 순으로 (최대 SEARCH_MAX_RESULTS 개)"""
+    terms = parse_terms(query)
+    if not terms:
+        return []
+    category_id = category.pk if category is not None else None
+    return get_backend().search(terms, category_id, limit or settings.SEARCH_MAX_RESULTS)
+
+
+def index_post(post):
+    get_backend().index(post)
+
+
+def remove_post(post_id):
+    get_backend().remove(post_id)
+
+
+def remove_posts(posts):
+    get_backend().remove_many(posts)
+
+
+def rebuild_index():
+    with connection.cursor() as cursor:
+        get_backend().rebuild(cursor)
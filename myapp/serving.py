@@ -0,0 +1,242 @@
+import mimetypes
+import os
+import uuid
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import (
+    FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse,
+)
+from django.shortcuts import redirect
+from django.utils.http import (
+    content_disposition_header, http_date, parse_etags, parse_http_date_safe,
+)
+
+from .thumbnails import THUMBNAIL_EXTENSION, thumbnail_name
+
+# 한 요청에서 허용하는 최대 Range 개수 (과도한 multipart 응답 방지)
+MAX_RANGES = 16
+
+# 스트리밍 전송 시 한 번에 읽는 크기
+STREAM_BLOCK_SIZE = 64 * 1024
+
+
+class FileRange:
+    """파일의 특정 구간만 읽는 file-like 객체
+
+    fileno()를 그대로 노출하므로 WSGI 서버의 wsgi.file_wrapper(gunicorn 등)가
+    os.sendfile()로 현재 위치부터 Content-Length 만큼 커널에서 바로 전송한다.
+    """
+
+    def __init__(self, fileobj, start, length):
+        self._file = fileobj
+        self._file.seek(start)
+        self._remaining = length
+
+    def fileno(self):
+        return self._file.fileno()
+
+    def read(self, size=-1):
+        if self._remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def close(self):
+        self._file.close()
+
+
+def parse_range_header(header, size):
+    """Range 헤더를 (start, end) 목록으로 변환 (end 포함)
+
+    헤더가 없거나 형식이 잘못되었으면 None (전체 전송),
+    만족 가능한 구간이 하나도 없으면 빈 리스트 (416) 를 반환한다.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or not spec:
+        return None
+
+    ranges = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        first, sep, last = part.partition('-')
+        if not sep:
+            return None
+        first, last = first.strip(), last.strip()
+        try:
+            if first:
+                start = int(first)
+                end = int(last) if last else size - 1
+                if last and start > end:
+                    return None
+            else:
+                # bytes=-N : 마지막 N바이트
+                suffix = int(last)
+                if suffix == 0:
+                    continue
+                start = max(size - suffix, 0)
+                end = size - 1
+        except ValueError:
+            return None
+        if start >= size:
+            continue
+        ranges.append((start, min(end, size - 1)))
+
+    if len(ranges) > MAX_RANGES:
+        return None
+    return _merge_ranges(ranges)
+
+
+def _merge_ranges(ranges):
+    """겹치거나 이어지는 구간을 합친다"""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def file_etag(stat_result):
+    """파일 크기와 수정 시각으로 강한 ETag 생성"""
+    return '"%x-%x"' % (int(stat_result.st_mtime), stat_result.st_size)
+
+
+def _not_modified(request, etag, mtime):
+    """If-None-Match / If-Modified-Since 검사"""
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        return '*' in etags or etag in etags
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE'))
+    return if_modified_since is not None and int(mtime) <= if_modified_since
+
+
+def _if_range_passes(request, etag, mtime):
+    """If-Range 조건이 맞을 때만 Range 요청을 처리"""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        # 약한 ETag는 Range에 사용할 수 없다
+        return not if_range.startswith('W/') and if_range == etag
+    return parse_http_date_safe(if_range) == int(mtime)
+
+
+def _multipart_body(path, ranges, size, content_type, boundary):
+    """multipart/byteranges 본문 생성기"""
+    with open(path, 'rb') as f:
+        for start, end in ranges:
+            yield _part_header(boundary, content_type, start, end, size)
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(STREAM_BLOCK_SIZE, remaining))
+                if not chunk:
+                    return
+                remaining -= len(chunk)
+                yield chunk
+        yield f'\r\n--{boundary}--\r\n'.encode()
+
+
+def _part_header(boundary, content_type, start, end, size):
+    return (
+        f'\r\n--{boundary}\r\n'
+        f'Content-Type: {content_type}\r\n'
+        f'Content-Range: bytes {start}-{end}/{size}\r\n\r\n'
+    ).encode()
+
+
+def _sendfile_response(name, path, content_type):
+    """프론트 프록시(nginx / apache)에 전송을 넘기는 응답"""
+    response = HttpResponse(content_type=content_type)
+    if settings.SENDFILE_BACKEND == 'nginx':
+        response['X-Accel-Redirect'] = settings.SENDFILE_URL + quote(name)
+    else:
+        response['X-Sendfile'] = path
+    return response
+
+
+def serve_post_file(request, post_file, as_attachment=False, thumbnail=None):
+    """PostFile을 Range / If-Range / ETag 를 지원하며 전송 (thumbnail 이 THUMBNAIL_SIZES 의 이름이면 그 썸네일)"""
+    storage = post_file.file.storage
+    name = post_file.file.name
+    filename = post_file.original_name or os.path.basename(name)
+    content_type = post_file.mime_type or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    if thumbnail in settings.THUMBNAIL_SIZES and post_file.thumbnails_ready:
+        name = thumbnail_name(name, thumbnail)
+        filename = os.path.splitext(filename)[0] + THUMBNAIL_EXTENSION
+        content_type = 'image/webp'
+
+    try:
+        path = storage.path(name)
+    except NotImplementedError:
+        # 로컬 파일시스템이 아닌 스토리지는 스토리지 URL로 넘긴다
+        return redirect(storage.url(name))
+
+    try:
+        stat_result = os.stat(path)
+    except FileNotFoundError:
+        return HttpResponse('파일을 찾을 수 없습니다.', status=404)
+
+    size = stat_result.st_size
+    mtime = stat_result.st_mtime
+    etag = file_etag(stat_result)
+
+    if _not_modified(request, etag, mtime):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    if settings.SENDFILE_BACKEND:
+        response = _sendfile_response(name, path, content_type)
+    else:
+        ranges = None
+        if _if_range_passes(request, etag, mtime):
+            ranges = parse_range_header(request.META.get('HTTP_RANGE'), size)
+
+        if ranges == []:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        if not ranges:
+            response = FileResponse(open(path, 'rb'), content_type=content_type)
+            response['Content-Length'] = size
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            length = end - start + 1
+            response = FileResponse(
+                FileRange(open(path, 'rb'), start, length),
+                status=206, content_type=content_type,
+            )
+            response['Content-Length'] = length
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        else:
+            boundary = uuid.uuid4().hex
+            length = sum(
+                len(_part_header(boundary, content_type, start, end, size)) + end - start + 1
+                for start, end in ranges
+            ) + len(f'\r\n--{boundary}--\r\n')
+            response = StreamingHttpResponse(
+                _multipart_body(path, ranges, size, content_type, boundary),
+                status=206,
+                content_type=f'multipart/byteranges; boundary={boundary}',
+            )
+            response['Content-Length'] = length
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(mtime)
+    response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+    response['Cache-Control'] = 'private, max-age=3600'
+    return response
@@ -0,0 +1,38 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.utils import timezone
+
+from .sqlite import retry_on_locked
+
+# 세션 만료 시각을 마지막으로 연장한 시각 (epoch 초) 을 담는 세션 키
+REFRESHED_AT_KEY = '_refreshed_at'
+
+
+def needs_refresh(session, interval):
+    """세션 데이터가 그대로여도 만료 시각을 연장할 때가 됐는지"""
+    refreshed_at = session.get(REFRESHED_AT_KEY, 0)
+    return time.time() - refreshed_at >= interval
+
+
+def mark_refreshed(session):
+    session[REFRESHED_AT_KEY] = int(time.time())
+
+
+def prune_expired_sessions(batch_size=1000, max_batches=None, pause=0):
+    """만료된 세션을 작은 배치로 나눠 삭제 (clearsessions 처럼 한 번에 큰 DELETE 를 하지 않음)"""
+    deleted = batches = 0
+    while max_batches is None or batches < max_batches:
+        keys = list(
+            Session.objects.filter(expire_date__lt=timezone.now())
+            .values_list('session_key', flat=True)[:batch_size]
+        )
+        if not keys:
+            break
+        count, _ = retry_on_locked(Session.objects.filter(session_key__in=keys).delete)()
+        deleted += count
+        batches += 1
+        if pause:
+            # 다른 요청이 쓰기 잠금을 얻을 틈을 준다 (SQLite)
+            time.sleep(pause)
+    return deleted
@@ -0,0 +1,74 @@
+from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import fragments, search
+from .audit import login_audit
+from .ipblock import blocked_ips
+from .models import Announcement, Blob, BlockedIP, Category, Post, PostFile
+from .jobs import enqueue
+from .utils import get_client_ip
+
+
+@receiver(post_delete, sender=PostFile)
+def release_post_file_blob(sender, instance, origin=None, **kwargs):
+    """첨부파일 삭제 시 공유 blob 참조 해제 (게시물/사용자 CASCADE 삭제 포함)"""
+    if instance.blob_id:
+        Blob.release(instance.blob_id)
+    # 첨부파일만 지운 경우 게시물 갱신 시각 변경 (게시물째 지우는 CASCADE 에서는 불필요)
+    if getattr(origin, 'model', type(origin)) is PostFile:
+        Post.touch([instance.post_id])
+
+
+@receiver(post_save, sender=PostFile)
+def process_uploaded_file(sender, instance, created, **kwargs):
+    """첨부파일이 생성되면 후처리 작업 예약 (이미지 썸네일 / 동영상·오디오 분석)"""
+    if not created:
+        return
+    Post.touch([instance.post_id])
+    file_type = instance.get_file_type()
+    if file_type == 'image':
+        enqueue('thumbnails.generate', instance.pk, priority=10)
+    elif file_type in ('video', 'audio'):
+        enqueue('attachments.probe_media', instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    """게시물 저장 시 검색 색인 갱신"""
+    search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    """게시물 삭제 시 검색 색인에서 제거 (사용자 CASCADE 삭제 포함)"""
+    search.remove_post(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Announcement)
+@receiver(post_delete, sender=Announcement)
+def invalidate_fragments(sender, **kwargs):
+    """카테고리 / 공지사항이 바뀌면 커밋 후 캐시된 목록과 템플릿 조각 무효화
+
+    커밋 전에 버전을 바꾸면 동시에 들어온 요청이 아직 이전 행을 읽어 새 버전으로 캐시할 수 있다.
+    """
+    transaction.on_commit(fragments.invalidate)
+
+
+@receiver(post_save, sender=BlockedIP)
+@receiver(post_delete, sender=BlockedIP)
+def invalidate_blocked_ips(sender, **kwargs):
+    """차단 목록이 바뀌면 커밋 후 모든 워커의 메모리 인덱스 갱신 (커밋 전이면 다른 워커가 이전 목록을 새 버전으로 읽는다)"""
+    transaction.on_commit(blocked_ips.invalidate)
+
+
+@receiver(user_logged_in)
+def record_login(sender, request, user, **kwargs):
+    """로그인 IP / 시각을 버퍼에 기록 (DB 에는 모아서 나중에 기록)"""
+    now = timezone.now()
+    user.last_login = now
+    login_audit.record(user.pk, get_client_ip(request), now)
@@ -0,0 +1,76 @@
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import OperationalError, connection
+
+
+def pragma_statements(pragmas=None):
+    """SQLITE_PRAGMAS 설정을 PRAGMA 문 목록으로"""
+    pragmas = settings.SQLITE_PRAGMAS if pragmas is None else pragmas
+    return [f'PRAGMA {name} = {value}' for name, value in pragmas.items()]
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    """connection_created 시그널 - 새 SQLite 연결마다 성능 프로필 적용"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for statement in pragma_statements():
+            cursor.execute(statement)
+
+
+def is_locked_error(error):
+    message = str(error).lower()
+    return 'database is locked' in message or 'database table is locked' in message
+
+
+def retry_on_locked(func):
+    """SQLite 잠금 오류('database is locked') 시 지터를 준 지수 백오프로 다시 실행
+
+    busy_timeout 으로도 풀리지 않는 경우(읽기 트랜잭션이 쓰기로 올라가다 충돌 등)용.
+    바깥 트랜잭션 안에서 불리면 트랜잭션 전체를 다시 해야 하므로 재시도하지 않는다.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        attempts = settings.SQLITE_LOCK_RETRIES
+        for attempt in range(attempts + 1):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as e:
+                if (
+                    connection.vendor != 'sqlite'
+                    or connection.in_atomic_block
+                    or not is_locked_error(e)
+                    or attempt == attempts
+                ):
+                    raise
+                delay = settings.SQLITE_LOCK_RETRY_DELAY * (2 ** attempt)
+                time.sleep(delay * random.uniform(0.5, 1.5))
+    return wrapper
+
+
+def run_maintenance(cursor, analyze=True, vacuum_pages=0, checkpoint='TRUNCATE'):
+    """WAL 체크포인트 / 통계 갱신 / 점진적 VACUUM - 실행한 작업 설명 목록 반환"""
+    done = []
+    cursor.execute(f'PRAGMA wal_checkpoint({checkpoint})')
+    busy, log_pages, checkpointed = cursor.fetchone()
+    done.append(f'wal_checkpoint({checkpoint}): WAL {log_pages}페이지 중 {checkpointed}페이지 반영' + (' (사용 중)' if busy else ''))
+    if analyze:
+        cursor.execute('ANALYZE')
+        done.append('ANALYZE')
+    else:
+        cursor.execute('PRAGMA optimize')
+        done.append('PRAGMA optimize')
+    if vacuum_pages:
+        cursor.execute('PRAGMA auto_vacuum')
+        if cursor.fetchone()[0] == 2:  # INCREMENTAL
+            cursor.execute('PRAGMA freelist_count')
+            free = cursor.fetchone()[0]
+            cursor.execute(f'PRAGMA incremental_vacuum({vacuum_pages})')
+            cursor.fetchall()
+            done.append(f'incremental_vacuum: 빈 페이지 {free}개 중 최대 {vacuum_pages}개 반환')
+        else:
+            done.append('incremental_vacuum 건너뜀 (auto_vacuum=INCREMENTAL 아님, --enable-auto-vacuum 으로 전환)')
+    return done
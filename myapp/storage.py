@@ -0,0 +1,91 @@
+import hashlib
+import os
+import re
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage
+
+from .metrics import timed
+
+# blobs/ab/cd/<sha256><확장자>
+BLOB_NAME_RE = re.compile(r'^blobs/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})(\.[^/]*)?$')
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_sha256(content):
+    """파일 객체 전체의 SHA-256 계산"""
+    digest = hashlib.sha256()
+    if hasattr(content, 'chunks'):
+        for chunk in content.chunks(HASH_BLOCK_SIZE):
+            digest.update(chunk)
+    else:
+        content.seek(0)
+        for chunk in iter(lambda: content.read(HASH_BLOCK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def blob_name(digest, ext=''):
+    """해시값으로 blob 저장 경로 생성"""
+    return f'blobs/{digest[:2]}/{digest[2:4]}/{digest}{ext.lower()}'
+
+
+def blob_digest(name):
+    """blob 경로에서 해시값 추출 (blob 이 아니면 None)"""
+    match = BLOB_NAME_RE.match(name or '')
+    return match.group(1) if match else None
+
+
+class TimedStorageMixin:
+    """저장 / 열기 / 삭제 / 존재 확인 시간을 요청 측정값(storage)에 더한다"""
+
+    def _save(self, name, content):
+        with timed('storage_time'):
+            return super()._save(name, content)
+
+    def _open(self, name, mode='rb'):
+        with timed('storage_time'):
+            return super()._open(name, mode)
+
+    def delete(self, name):
+        with timed('storage_time'):
+            return super().delete(name)
+
+    def exists(self, name):
+        with timed('storage_time'):
+            return super().exists(name)
+
+
+class ContentAddressedStorage(TimedStorageMixin, FileSystemStorage):
+    """내용(SHA-256) 기준으로 경로를 정해 같은 파일은 한 번만 저장하는 스토리지
+
+    upload_to 가 만든 이름은 확장자만 사용하고, 실제 경로는 내용 해시로 정해진다.
+    이미 같은 내용의 blob 이 있으면 다시 쓰지 않고 그 경로를 돌려준다.
+    """
+
+    def _save(self, name, content):
+        if name.startswith('blobs/'):
+            # blob 옆에 두는 파생 파일(썸네일 등)은 지정한 경로 그대로 저장
+            return super()._save(name, content)
+
+        ext = os.path.splitext(name)[1]
+        target = blob_name(file_sha256(content), ext)
+        if self.exists(target):
+            return target
+
+        saved = super()._save(target, content)
+        if saved != target:
+            # 동시에 같은 내용이 저장된 경우 - 먼저 저장된 blob 을 사용
+            self.delete(saved)
+        return target
+
+
+content_storage = ContentAddressedStorage()
+
+
+def attachment_storage():
+    """설정(ATTACHMENT_STORAGE_MODE)에 따라 첨부파일 스토리지 선택"""
+    if settings.ATTACHMENT_STORAGE_MODE == 'content':
+        return content_storage
+    return default_storage
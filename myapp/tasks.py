@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count
+
+from . import search
+from .jobs import report_progress, task
+from .metadata import probe_media
+from .models import Blob, Post, PostFile
+from .thumbnails import generate_thumbnails
+
+
+@task('thumbnails.generate')
+def generate_thumbnails_task(post_file_id):
+    """이미지 첨부파일 썸네일 생성"""
+    generate_thumbnails(post_file_id)
+
+
+@task('attachments.probe_media')
+def probe_media_task(post_file_id):
+    """동영상/오디오 첨부파일의 해상도와 재생시간 기록 (ffprobe)"""
+    post_file = PostFile.objects.filter(pk=post_file_id).first()
+    if post_file is None:
+        return
+    width, height, duration = probe_media(post_file.file.path)
+    PostFile.objects.filter(pk=post_file_id).update(width=width, height=height, duration=duration)
+    Post.touch([post_file.post_id])
+
+
+@task('moderation.delete_users')
+def delete_users_task(user_ids):
+    """사용자와 그 게시물 삭제 (관리자 액션에서 예약)
+
+    MODERATION_BATCH_SIZE 명씩 트랜잭션 하나에서 처리하고 진행 상황을 기록한다.
+    게시물 / 첨부파일은 행을 읽어 post_delete 시그널을 하나씩 보내는 대신 배치마다
+    blob 참조 해제, 검색 색인 삭제, 행 삭제를 각각 쿼리 하나로 한다 (파일은 커밋 후 삭제).
+    재시도되면 이미 지운 사용자는 건너뛰므로 남은 배치부터 이어서 처리된다.
+    """
+    batch_size = settings.MODERATION_BATCH_SIZE
+    total = len(user_ids)
+    for start in range(0, total, batch_size):
+        batch = user_ids[start:start + batch_size]
+        with transaction.atomic():
+            delete_posts(Post.objects.filter(author_id__in=batch))
+            # 남은 프로필 / 공지사항 / 업로드 세션 등은 일반 CASCADE 로 (게시물은 이미 없다)
+            User.objects.filter(id__in=batch).delete()
+        report_progress(min(start + batch_size, total), total)
+
+
+def delete_posts(posts):
+    """게시물과 첨부파일을 시그널 없이 일괄 삭제 - release_post_file_blob / unindex_post 가 할 일을 set 단위로"""
+    post_files = PostFile.objects.filter(post__in=posts)
+    counts = dict(
+        post_files.filter(blob__isnull=False).order_by().values_list('blob').annotate(Count('id'))
+    )
+    Blob.release_many(counts)
+    search.remove_posts(posts)
+    post_files._raw_delete(post_files.db)
+    posts._raw_delete(posts.db)
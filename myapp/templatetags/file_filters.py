@@ -1,35 +1,19 @@
 from django import template
+from django.urls import reverse
 import os
+from ..filetypes import classify_extension, get_extension
 
 register = template.Library()
 
 @register.filter
 def is_image(file_obj):
     """PostFile 객체가 이미지인지 확인하는 필터"""
-    if not file_obj or not hasattr(file_obj, 'file'):
-        return False
-    
-    try:
-        file_url = file_obj.file.url
-        image_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.svg', '.ico', '.tiff', '.tif']
-        file_extension = os.path.splitext(file_url.lower())[1]
-        return file_extension in image_extensions
-    except:
-        return False
+    return get_file_type(file_obj) == 'image'
 
 @register.filter
 def is_video(file_obj):
     """PostFile 객체가 동영상인지 확인하는 필터"""
-    if not file_obj or not hasattr(file_obj, 'file'):
-        return False
-    
-    try:
-        file_url = file_obj.file.url
-        video_extensions = ['.mp4', '.avi', '.mov', '.webm', '.mkv', '.flv', '.wmv', '.m4v', '.3gp', '.ogv']
-        file_extension = os.path.splitext(file_url.lower())[1]
-        return file_extension in video_extensions
-    except:
-        return False
+    return get_file_type(file_obj) == 'video'
 
 @register.filter
 def get_filename(file_obj):
@@ -51,7 +35,7 @@ def get_file_extension(file_obj):
         return ""
     
     try:
-        return os.path.splitext(file_obj.file.name.lower())[1]
+        return get_extension(file_obj.file.name)
     except:
         return ""
 
@@ -65,32 +49,7 @@ def get_file_type(file_obj):
         return file_obj.get_file_type()
     
     try:
-        ext = os.path.splitext(file_obj.file.name.lower())[1]
-        
-        if ext in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.svg', '.ico', '.tiff', '.tif']:
-            return "image"
-        elif ext in ['.mp4', '.avi', '.mov', '.webm', '.mkv', '.flv', '.wmv', '.m4v', '.3gp', '.ogv']:
-            return "video"
-        elif ext in ['.mp3', '.wav', '.ogg', '.m4a', '.aac', '.flac', '.wma']:
-            return "audio"
-        elif ext in ['.pdf']:
-            return "pdf"
-        elif ext in ['.txt', '.md', '.log', '.cfg', '.ini', '.conf']:
-            return "text"
-        elif ext in ['.doc', '.docx']:
-            return "document"
-        elif ext in ['.xls', '.xlsx']:
-            return "spreadsheet"
-        elif ext in ['.ppt', '.pptx']:
-            return "presentation"
-        elif ext in ['.zip', '.rar', '.7z', '.tar', '.gz', '.bz2', '.xz']:
-            return "archive"
-        elif ext in ['.exe', '.msi', '.deb', '.rpm', '.dmg', '.app']:
-            return "executable"
-        elif ext in ['.py', '.js', '.html', '.css', '.php', '.java', '.cpp', '.c', '.h', '.json', '.xml', '.sql']:
-            return "code"
-        else:
-            return "file"
+        return classify_extension(file_obj.file.name)
     except:
         return "unknown"
 
@@ -140,3 +99,11 @@ def get_file_icon(file_type):
         'file': '📎'
     }
     return icons.get(file_type, '📎')
+
+@register.filter
+def thumbnail_url(file_obj, size='medium'):
+    """이미지 썸네일 URL (썸네일이 아직 없으면 원본 URL)"""
+    url = reverse('file_download', args=[file_obj.id])
+    if getattr(file_obj, 'thumbnails_ready', False):
+        return f"{url}?size={size}"
+    return url
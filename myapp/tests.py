@@ -1,3 +1,1712 @@
-from django.test import TestCase
+import base64
+import ipaddress
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.db.backends.signals import connection_created
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from . import filetypes, jobs, log, search
+from .admin import PostAdmin
+from .audit import LoginAuditBuffer
+from .ipblock import BlockedIPIndex, PrefixTree, blocked_ips
+from .middleware import ReplicaPinMiddleware
+from .management.commands.media_gc import Command as MediaGCCommand
+from .models import Announcement, Blob, BlockedIP, Category, Job, Post, PostFile, UploadSession, UserProfile
+from .pagination import KeysetPaginator, encode_cursor
+from .routers import PIN_COOKIE, ReplicaRouter, read_replica
+from .serving import MAX_RANGES, parse_range_header
+from .sessions import REFRESHED_AT_KEY
+from .sqlite import apply_pragmas, retry_on_locked
+from .storage import blob_digest, blob_name
+from .tasks import delete_users_task
+from .thumbnails import thumbnail_names
+from .utils import get_client_ip
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 데이터 크기를 늘려 가며 같은 화면을 렌더링 - 쿼리 수가 행 수에 따라 늘면 N+1
+SIZES = (5, 40)
+
+# 화면별 쿼리 상한 (데이터 크기와 무관해야 한다)
+VIEW_QUERY_BUDGETS = {
+    'home': 1,
+    'post_list': 3,
+    'post_list_category': 3,
+    'post_list_next_page': 3,
+    'post_detail': 4,
+    'post_search': 3,
+    'login_form': 0,
+    'register_form': 0,
+    'login_submit': 9,
+}
+# 관리자 목록 화면별 쿼리 상한 (app_label.model)
+ADMIN_QUERY_BUDGETS = {
+    'auth.group': 4,
+    'auth.user': 5,
+    'myapp.announcement': 4,
+    'myapp.blob': 4,
+    'myapp.blockedip': 5,
+    'myapp.category': 4,
+    'myapp.job': 5,
+    'myapp.post': 5,
+    'myapp.postfile': 5,
+    'myapp.uploadsession': 4,
+    'myapp.userprofile': 4,
+}
+# 요청 하나의 벽시계 시간 상한(초) - 느린 CI 에서도 넘지 않을 만큼 넉넉하게, 몇 배 느려지는 회귀만 잡는다
+VIEW_TIME_LIMIT = 1.0
+ADMIN_TIME_LIMIT = 2.0
+
+
+def query_origin():
+    """쿼리를 만든 코드 위치 - 가장 안쪽 템플릿 태그 / 변수와 myapp 안의 호출 위치"""
+    template = None
+    frames = []
+    frame = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        if code.co_name == 'render_annotated' and template is None:
+            node = frame.f_locals.get('self')
+            origin = getattr(node, 'origin', None)
+            token = getattr(node, 'token', None)
+            if origin is not None and token is not None:
+                template = f'{origin.template_name}:{token.lineno} {token.contents[:60]}'
+        elif code.co_filename.startswith(APP_DIR) and code.co_filename != __file__ and len(frames) < 3:
+            frames.append(f'{os.path.relpath(code.co_filename, APP_DIR)}:{frame.f_lineno} {code.co_name}()')
+        frame = frame.f_back
+    return ([f'template {template}'] if template else []) + frames
+
+
+class QueryRecorder:
+    """connection.execute_wrapper - 실행된 SQL, 걸린 시간, 만든 위치 기록"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started, query_origin()))
+
+    def report(self):
+        lines = []
+        for index, (sql, elapsed, origin) in enumerate(self.queries, 1):
+            lines.append(f'{index:>3}. ({elapsed * 1000:.1f}ms) {sql[:300]}')
+            lines.extend(f'       ← {where}' for where in origin)
+        return '\n'.join(lines)
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    MEDIA_ROOT=tempfile.mkdtemp(),
+    LOGIN_AUDIT_FLUSH_INTERVAL=0,
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class QueryBudgetTestCase(TestCase):
+    """데이터를 SIZES 만큼 키워 가며 쿼리 수가 상한 안에서 변하지 않는지, 시간이 상한 안인지 확인"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser('budget-admin', 'admin@example.com', 'password')
+        cls.rows = 0
+
+    def grow(self, size):
+        """모든 모델의 행 수를 size 까지 늘린다 (seed_scale 로 사용자 / 게시물 / 차단 IP / 첨부파일)"""
+        added = size - self.rows
+        if added <= 0:
+            return
+        # 캐시 무효화는 커밋 후에 일어나므로 커밋된 것처럼 on_commit 콜백을 실행
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command(
+                'seed_scale', users=added, posts=added, blocked_ips=added, files='none',
+                files_per_post=1, seed=size, stdout=StringIO(),
+            )
+            now = timezone.now()
+            Announcement.objects.bulk_create(
+                [Announcement(title=f'공지 {index}', content='내용', author=self.admin_user) for index in range(added)]
+            )
+            UploadSession.objects.bulk_create(
+                [UploadSession(user=self.admin_user, filename=f'{index}.bin', length=100) for index in range(added)]
+            )
+            Job.objects.bulk_create([Job(task='noop', run_at=now) for _ in range(added)])
+        self.rows = size
+
+    def measure(self, method, url, **kwargs):
+        """요청 하나를 (캐시를 데운 뒤) 보내고 (응답, 기록기, 걸린 시간) 반환"""
+        getattr(self.client, method)(url, **kwargs)
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            started = time.perf_counter()
+            response = getattr(self.client, method)(url, **kwargs)
+            elapsed = time.perf_counter() - started
+        return response, recorder, elapsed
+
+    def assertBudget(self, name, budget, time_limit, method, url, expected_status=200, grow=None, **kwargs):
+        """SIZES 마다 같은 요청을 보내 쿼리 수가 같고 budget 이하인지, 시간이 time_limit 이하인지
+
+        grow(size) 로 데이터를 키운다 (기본은 모든 모델의 행 수를 늘리는 self.grow).
+        """
+        grow = grow or self.grow
+        counts = []
+        for size in SIZES:
+            grow(size)
+            response, recorder, elapsed = self.measure(method, url, **kwargs)
+            self.assertEqual(response.status_code, expected_status, f'{name} ({size}행): HTTP {response.status_code}')
+            counts.append(len(recorder.queries))
+            self.assertLessEqual(
+                len(recorder.queries), budget,
+                f'{name} ({size}행): 쿼리 {len(recorder.queries)}개, 상한 {budget}개\n{recorder.report()}',
+            )
+            if len(counts) > 1:
+                self.assertEqual(
+                    counts[-1], counts[0],
+                    f'{name}: 행이 {SIZES[0]} → {size} 개로 늘자 쿼리가 {counts[0]} → {counts[-1]}개\n{recorder.report()}',
+                )
+            self.assertLessEqual(elapsed, time_limit, f'{name} ({size}행): {elapsed:.3f}초, 상한 {time_limit}초')
+
+
+class ViewQueryBudgetTests(QueryBudgetTestCase):
+    def setUp(self):
+        self.client.force_login(self.admin_user)
+
+    def test_home(self):
+        self.assertBudget('home', VIEW_QUERY_BUDGETS['home'], VIEW_TIME_LIMIT, 'get', reverse('home'))
+
+    def test_post_list(self):
+        self.assertBudget('post_list', VIEW_QUERY_BUDGETS['post_list'], VIEW_TIME_LIMIT, 'get', reverse('post_list'))
+
+    def test_post_list_category(self):
+        # seed_scale 이 만드는 첫 카테고리 - 글이 가장 많이 몰린다
+        url = reverse('post_list', kwargs={'category_slug': 'seed-1'})
+        self.assertBudget('post_list_category', VIEW_QUERY_BUDGETS['post_list_category'], VIEW_TIME_LIMIT, 'get', url)
+
+    def test_post_list_next_page(self):
+        self.grow(SIZES[-1])
+        page = self.client.get(reverse('post_list')).context['posts']
+        url = f"{reverse('post_list')}?after={page.next_cursor()}"
+        self.assertBudget('post_list_next_page', VIEW_QUERY_BUDGETS['post_list_next_page'], VIEW_TIME_LIMIT, 'get', url)
+
+    def test_post_detail_with_many_attachments(self):
+        post = Post.objects.create(
+            title='첨부파일이 많은 글', content='내용', author=self.admin_user,
+            category=Category.objects.create(name='첨부', slug='attach'),
+        )
+
+        def add_attachments(size):
+            existing = post.postfile_set.count()
+            names = [blob_name(f'{post.pk:032x}{index:032x}', '.jpg') for index in range(existing, size)]
+            PostFile.objects.bulk_create([
+                PostFile(
+                    post=post, file=name, original_name=os.path.basename(name), file_size=1000,
+                    file_type='image', mime_type='image/jpeg', width=10, height=10, thumbnails_ready=True,
+                    blob=Blob.objects.create(sha256=blob_digest(name), name=name, size=1000, ref_count=1),
+                )
+                for name in names
+            ])
+
+        url = reverse('post_detail', args=[post.pk])
+        self.assertBudget(
+            'post_detail', VIEW_QUERY_BUDGETS['post_detail'], VIEW_TIME_LIMIT, 'get', url, grow=add_attachments,
+        )
+
+    def test_post_search(self):
+        Post.objects.create(
+            title='게시판 검색 확인', content='내용', author=self.admin_user, category=Category.objects.create(name='검색', slug='search'),
+        )
+        url = f"{reverse('post_search')}?q=게시판"
+        self.assertBudget('post_search', VIEW_QUERY_BUDGETS['post_search'], VIEW_TIME_LIMIT, 'get', url)
+
+
+class AnonymousViewQueryBudgetTests(QueryBudgetTestCase):
+    def test_login_form(self):
+        self.assertBudget('login_form', VIEW_QUERY_BUDGETS['login_form'], VIEW_TIME_LIMIT, 'get', reverse('login'))
+
+    def test_register_form(self):
+        self.assertBudget('register_form', VIEW_QUERY_BUDGETS['register_form'], VIEW_TIME_LIMIT, 'get', reverse('register'))
+
+    def test_login_submit(self):
+        self.assertBudget(
+            'login_submit', VIEW_QUERY_BUDGETS['login_submit'], VIEW_TIME_LIMIT, 'post', reverse('login'),
+            expected_status=302, data={'username': 'budget-admin', 'password': 'password'},
+        )
+
+
+class AdminChangelistQueryBudgetTests(QueryBudgetTestCase):
+    def setUp(self):
+        self.client.force_login(self.admin_user)
+
+    def test_every_changelist(self):
+        registered = {f'{model._meta.app_label}.{model._meta.model_name}' for model in admin.site._registry}
+        self.assertEqual(
+            registered, set(ADMIN_QUERY_BUDGETS),
+            '관리자에 등록된 모델과 ADMIN_QUERY_BUDGETS 가 다릅니다 - 새 ModelAdmin 의 상한을 추가하세요.',
+        )
+        for model in admin.site._registry:
+            key = f'{model._meta.app_label}.{model._meta.model_name}'
+            url = reverse(f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist')
+            with self.subTest(model=key):
+                self.assertBudget(key, ADMIN_QUERY_BUDGETS[key], ADMIN_TIME_LIMIT, 'get', url)
+
+
+class ParseRangeHeaderTests(TestCase):
+    def test_missing_or_malformed_means_whole_file(self):
+        for header in (None, '', 'items=0-9', 'bytes=', 'bytes=abc', 'bytes=9-5', 'bytes=5'):
+            with self.subTest(header=header):
+                self.assertIsNone(parse_range_header(header, 100))
+
+    def test_single_and_open_ended(self):
+        self.assertEqual(parse_range_header('bytes=0-9', 100), [(0, 9)])
+        self.assertEqual(parse_range_header('bytes=90-', 100), [(90, 99)])
+        # 파일 끝을 넘는 end 는 잘라낸다
+        self.assertEqual(parse_range_header('bytes=90-500', 100), [(90, 99)])
+
+    def test_suffix(self):
+        self.assertEqual(parse_range_header('bytes=-5', 100), [(95, 99)])
+        self.assertEqual(parse_range_header('bytes=-500', 100), [(0, 99)])
+        self.assertEqual(parse_range_header('bytes=-0', 100), [])
+
+    def test_overlapping_and_adjacent_ranges_are_merged(self):
+        self.assertEqual(parse_range_header('bytes=20-29, 0-9,5-14,15-19', 100), [(0, 29)])
+        self.assertEqual(parse_range_header('bytes=0-9,50-59', 100), [(0, 9), (50, 59)])
+
+    def test_unsatisfiable(self):
+        self.assertEqual(parse_range_header('bytes=100-', 100), [])
+        self.assertEqual(parse_range_header('bytes=200-300,150-', 100), [])
+
+    def test_too_many_ranges_means_whole_file(self):
+        header = 'bytes=' + ','.join(f'{index * 2}-{index * 2}' for index in range(MAX_RANGES + 1))
+        self.assertIsNone(parse_range_header(header, 1000))
+        header = 'bytes=' + ','.join(f'{index * 2}-{index * 2}' for index in range(MAX_RANGES))
+        self.assertEqual(len(parse_range_header(header, 1000)), MAX_RANGES)
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    MEDIA_ROOT=tempfile.mkdtemp(),
+    SENDFILE_BACKEND=None,
+)
+class FileDownloadTests(TestCase):
+    CONTENT = bytes(range(256)) * 4
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('reader', password='password')
+        post = Post.objects.create(
+            title='첨부', content='내용', author=cls.user, category=Category.objects.create(name='다운로드', slug='download'),
+        )
+        cls.post_file = PostFile.objects.create(
+            post=post, file=SimpleUploadedFile('data.bin', cls.CONTENT), original_name='data.bin',
+        )
+        cls.url = reverse('file_download', args=[cls.post_file.pk])
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def get(self, **headers):
+        response = self.client.get(self.url, **headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_requires_login(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+    def test_full_download(self):
+        response, body = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.CONTENT)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_single_range(self):
+        response, body = self.get(HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, self.CONTENT[10:20])
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.CONTENT)}')
+        self.assertEqual(response['Content-Length'], '10')
+
+    def test_multiple_ranges(self):
+        response, body = self.get(HTTP_RANGE='bytes=0-3,-4')
+        self.assertEqual(response.status_code, 206)
+        self.assertTrue(response['Content-Type'].startswith('multipart/byteranges; boundary='))
+        self.assertEqual(int(response['Content-Length']), len(body))
+        self.assertIn(self.CONTENT[:4], body)
+        self.assertIn(f'Content-Range: bytes {len(self.CONTENT) - 4}-{len(self.CONTENT) - 1}/'.encode(), body)
+
+    def test_unsatisfiable_range(self):
+        response, _ = self.get(HTTP_RANGE=f'bytes={len(self.CONTENT)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.CONTENT)}')
+
+    def test_if_range(self):
+        etag = self.get()[0]['ETag']
+        response, body = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, self.CONTENT[:10])
+        # 파일이 바뀌었으면 (ETag 불일치) 구간 대신 전체
+        response, body = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.CONTENT)
+
+    def test_if_none_match(self):
+        etag = self.get()[0]['ETag']
+        response, _ = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    MEDIA_ROOT=tempfile.mkdtemp(),
+    RESUMABLE_UPLOAD_DIR=tempfile.mkdtemp(),
+)
+class ResumableUploadTests(TestCase):
+    CONTENT = b'0123456789' * 100
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('uploader', password='password')
+        cls.category = Category.objects.create(name='업로드', slug='upload')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def create(self, length=None, filename='큰 파일.bin'):
+        encoded = base64.b64encode(filename.encode()).decode()
+        return self.client.post(
+            reverse('upload_create'),
+            HTTP_UPLOAD_LENGTH=str(len(self.CONTENT) if length is None else length),
+            HTTP_UPLOAD_METADATA=f'filename {encoded}',
+        )
+
+    def patch(self, location, offset, data):
+        return self.client.generic(
+            'PATCH', location, data, content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def test_create(self):
+        response = self.create()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response['Upload-Offset'], '0')
+        self.assertEqual(response['Upload-Length'], str(len(self.CONTENT)))
+        session = UploadSession.objects.get()
+        self.assertEqual(session.filename, '큰 파일.bin')
+        self.assertEqual(response['Location'], reverse('upload_detail', args=[session.pk]))
+
+    def test_create_requires_length(self):
+        response = self.client.post(reverse('upload_create'))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_chunks_advance_offset(self):
+        location = self.create()['Location']
+        response = self.patch(location, 0, self.CONTENT[:400])
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response['Upload-Offset'], '400')
+        response = self.client.head(location)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Upload-Offset'], '400')
+        self.assertEqual(self.patch(location, 400, self.CONTENT[400:])['Upload-Offset'], str(len(self.CONTENT)))
+        session = UploadSession.objects.get()
+        self.assertTrue(session.is_complete())
+        with open(session.get_temp_path(), 'rb') as f:
+            self.assertEqual(f.read(), self.CONTENT)
+
+    def test_offset_mismatch_is_conflict(self):
+        location = self.create()['Location']
+        self.patch(location, 0, self.CONTENT[:100])
+        # 이미 받은 청크를 다시 보내거나 건너뛰면 409 - 클라이언트는 HEAD 로 offset 을 다시 확인
+        for offset in (0, 200):
+            with self.subTest(offset=offset):
+                response = self.patch(location, offset, self.CONTENT[offset:offset + 100])
+                self.assertEqual(response.status_code, 409)
+        self.assertEqual(UploadSession.objects.get().offset, 100)
+
+    def test_chunk_past_length_is_rejected(self):
+        location = self.create(length=10)['Location']
+        self.assertEqual(self.patch(location, 0, self.CONTENT[:20]).status_code, 413)
+        self.assertEqual(UploadSession.objects.get().offset, 0)
+
+    def test_malformed_content_length_is_bad_request(self):
+        location = self.create()['Location']
+        for value in ('abc', '-5'):
+            with self.subTest(content_length=value):
+                response = self.client.generic(
+                    'PATCH', location, HTTP_UPLOAD_OFFSET='0',
+                    CONTENT_TYPE='application/offset+octet-stream', CONTENT_LENGTH=value,
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('Content-Length', response.json()['error'])
+        self.assertEqual(UploadSession.objects.get().offset, 0)
+
+    @override_settings(RESUMABLE_UPLOAD_CHUNK_SIZE=100)
+    def test_chunk_larger_than_chunk_size_is_rejected(self):
+        response = self.create()
+        self.assertEqual(response['Upload-Chunk-Size'], '100')
+        self.assertEqual(self.patch(response['Location'], 0, self.CONTENT[:101]).status_code, 413)
+        self.assertEqual(self.patch(response['Location'], 0, self.CONTENT[:100]).status_code, 204)
+        self.assertEqual(UploadSession.objects.get().offset, 100)
+
+    def test_wrong_content_type(self):
+        location = self.create()['Location']
+        response = self.client.generic('PATCH', location, b'abc', content_type='text/plain', HTTP_UPLOAD_OFFSET='0')
+        self.assertEqual(response.status_code, 415)
+
+    def test_other_users_session_is_not_found(self):
+        location = self.create()['Location']
+        self.client.force_login(User.objects.create_user('someone-else'))
+        self.assertEqual(self.client.head(location).status_code, 404)
+
+    def test_delete_discards_temp_file(self):
+        location = self.create()['Location']
+        path = UploadSession.objects.get().get_temp_path()
+        self.assertEqual(self.client.delete(location).status_code, 204)
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertFalse(os.path.exists(path))
+
+    def test_finalize_on_post_create(self):
+        complete = self.create()['Location']
+        self.patch(complete, 0, self.CONTENT)
+        incomplete = self.create()['Location']
+        self.patch(incomplete, 0, self.CONTENT[:10])
+        complete_id, incomplete_id = complete.rstrip('/').split('/')[-1], incomplete.rstrip('/').split('/')[-1]
+
+        response = self.client.post(
+            reverse('post_create', args=[self.category.slug]),
+            {'title': '이어올리기', 'content': '내용', 'upload_ids': [complete_id, incomplete_id, 'not-a-uuid']},
+        )
+        self.assertEqual(response.status_code, 302)
+        post_file = PostFile.objects.get()
+        self.assertEqual(post_file.original_name, '큰 파일.bin')
+        with post_file.file.open('rb') as f:
+            self.assertEqual(f.read(), self.CONTENT)
+        # 완료된 세션만 확정되고 정리된다
+        self.assertEqual(list(UploadSession.objects.values_list('id', flat=True)), [uuid.UUID(incomplete_id)])
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), ATTACHMENT_STORAGE_MODE='content')
+class BlobRefCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('blob-owner')
+        cls.post = Post.objects.create(
+            title='blob', content='내용', author=cls.user, category=Category.objects.create(name='blob', slug='blob'),
+        )
+
+    def attach(self, content, name='a.txt'):
+        return PostFile.objects.create(post=self.post, file=SimpleUploadedFile(name, content), original_name=name)
+
+    def test_identical_content_is_stored_once(self):
+        first = self.attach(b'same content', 'a.txt')
+        second = self.attach(b'same content', 'b.txt')
+        self.assertEqual(first.blob_id, second.blob_id)
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual(Blob.objects.get().ref_count, 2)
+        other = self.attach(b'other content')
+        self.assertEqual(Blob.objects.get(pk=other.blob_id).ref_count, 1)
+
+    def test_acquire_ignores_non_blob_names(self):
+        self.assertIsNone(Blob.acquire('uploads/file/2024/01/01/a.txt', 10))
+        self.assertFalse(Blob.objects.exists())
+
+    def test_release_deletes_file_with_last_reference(self):
+        first = self.attach(b'shared')
+        second = self.attach(b'shared')
+        storage, name = first.file.storage, first.file.name
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(Blob.objects.get().ref_count, 1)
+        self.assertTrue(storage.exists(name))
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(Blob.objects.exists())
+        self.assertFalse(storage.exists(name))
+
+    def test_bulk_release_subtracts_per_blob(self):
+        shared = [self.attach(b'shared') for _ in range(3)]
+        single = self.attach(b'single')
+        kept = self.attach(b'kept')
+        storage = single.file.storage
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with Blob.bulk_release():
+                PostFile.objects.filter(pk__in=[shared[0].pk, shared[1].pk, single.pk]).delete()
+        # 파일 삭제는 커밋 후 한 번에
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(Blob.objects.get(pk=shared[0].blob_id).ref_count, 1)
+        self.assertFalse(Blob.objects.filter(pk=single.blob_id).exists())
+        self.assertFalse(storage.exists(single.file.name))
+        self.assertTrue(storage.exists(shared[2].file.name))
+        self.assertEqual(Blob.objects.get(pk=kept.blob_id).ref_count, 1)
+
+    def test_bulk_release_never_goes_negative(self):
+        post_file = self.attach(b'once')
+        with self.captureOnCommitCallbacks(execute=True):
+            with Blob.bulk_release():
+                post_file.delete()
+                # 참조 수보다 많이 해제해도 0 에서 멈춘다
+                Blob.release(post_file.blob_id)
+        self.assertFalse(Blob.objects.filter(pk=post_file.blob_id).exists())
+
+    def test_nested_bulk_release_is_handled_by_outer_block(self):
+        post_file = self.attach(b'nested')
+        with self.captureOnCommitCallbacks(execute=True):
+            with Blob.bulk_release():
+                with Blob.bulk_release():
+                    post_file.delete()
+                # 안쪽 블록이 끝나도 아직 차감되지 않는다
+                self.assertEqual(Blob.objects.get(pk=post_file.blob_id).ref_count, 1)
+        self.assertFalse(Blob.objects.filter(pk=post_file.blob_id).exists())
+
+
+
+@override_settings(
+    MEDIA_ROOT=tempfile.mkdtemp(), ATTACHMENT_STORAGE_MODE='content', JOBS_ALWAYS_EAGER=False,
+    MODERATION_BATCH_SIZE=2, JOBS_OVERDUE_WARNING=300,
+)
+class DeleteUsersTaskTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser('mod-admin', 'mod@example.com', 'password')
+        cls.category = Category.objects.create(name='삭제', slug='delete')
+        cls.spammers = [User.objects.create_user(f'spammer-{index}') for index in range(3)]
+        cls.keeper = User.objects.create_user('keeper')
+
+    def post(self, author, *contents):
+        post = Post.objects.create(title='스팸광고 글', content='내용', author=author, category=self.category)
+        for index, content in enumerate(contents):
+            PostFile.objects.create(post=post, file=SimpleUploadedFile(f'{index}.txt', content), original_name=f'{index}.txt')
+        return post
+
+    def test_deletes_posts_files_and_index_per_batch(self):
+        for spammer in self.spammers:
+            self.post(spammer, b'spam only', b'shared')
+        kept = self.post(self.keeper, b'shared')
+        storage = kept.postfile_set.get().file.storage
+        spam_name = PostFile.objects.filter(blob__ref_count=3).first().file.name
+        self.assertEqual(len(search.search_post_ids('스팸광고')), 4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            delete_users_task([user.pk for user in self.spammers])
+
+        self.assertFalse(User.objects.filter(pk__in=[user.pk for user in self.spammers]).exists())
+        self.assertEqual(list(Post.objects.values_list('pk', flat=True)), [kept.pk])
+        self.assertEqual(search.search_post_ids('스팸광고'), [kept.pk])
+        # 남은 글이 참조하는 blob 만 남는다
+        self.assertEqual(list(Blob.objects.values_list('ref_count', flat=True)), [1])
+        self.assertFalse(storage.exists(spam_name))
+        self.assertTrue(storage.exists(kept.postfile_set.get().file.name))
+
+    def test_queries_do_not_grow_with_posts(self):
+        counts = []
+        for posts in (1, 5):
+            user = User.objects.create_user(f'bulk-{posts}')
+            for _ in range(posts):
+                self.post(user, b'a', b'b')
+            recorder = QueryRecorder()
+            with self.captureOnCommitCallbacks(execute=True), connection.execute_wrapper(recorder):
+                delete_users_task([user.pk])
+            counts.append(len(recorder.queries))
+        self.assertEqual(counts[0], counts[1], recorder.report())
+
+    def test_admin_warns_when_worker_is_idle(self):
+        self.client.force_login(self.admin_user)
+        url = reverse('admin:myapp_userprofile_changelist')
+        profile = UserProfile.objects.create(user=self.spammers[0], ip_address='192.0.2.1')
+        data = {'action': 'delete_user_only', '_selected_action': [profile.pk]}
+        with self.assertLogs('myapp.admin'):
+            response = self.client.post(url, data, follow=True)
+        self.assertNotContains(response, 'runworker)가 실행 중인지')
+        # 워커가 없어 예약된 삭제가 그대로 밀려 있다
+        Job.objects.update(run_at=timezone.now() - timedelta(seconds=600))
+        with self.assertLogs('myapp.admin'):
+            response = self.client.post(url, data, follow=True)
+        self.assertContains(response, 'runworker)가 실행 중인지')
+        self.assertTrue(User.objects.filter(pk=self.spammers[0].pk).exists())
+
+class FileTypeTests(SimpleTestCase):
+    def test_sniff(self):
+        cases = {
+            b'\x89PNG\r\n\x1a\n' + b'\x00' * 8: ('image', 'image/png'),
+            b'\xff\xd8\xff\xe0': ('image', 'image/jpeg'),
+            b'RIFF\x00\x00\x00\x00WEBPVP8 ': ('image', 'image/webp'),
+            b'RIFF\x00\x00\x00\x00WAVEfmt ': ('audio', 'audio/wav'),
+            b'%PDF-1.7': ('pdf', 'application/pdf'),
+            b'PK\x03\x04': ('archive', 'application/zip'),
+            b'\x00' * 257 + b'ustar\x00': ('archive', 'application/x-tar'),
+            # 긴 시그니처가 먼저 - ftypM4A 는 일반 ftyp(mp4) 보다 우선
+            b'\x00\x00\x00\x20ftypM4A ': ('audio', 'audio/mp4'),
+            b'\x00\x00\x00\x20ftypisom': ('video', 'video/mp4'),
+            b'MZ\x90\x00': ('executable', 'application/vnd.microsoft.portable-executable'),
+        }
+        for head, expected in cases.items():
+            with self.subTest(head=head[:12]):
+                self.assertEqual(filetypes.sniff(head), expected)
+
+    def test_sniff_unknown(self):
+        for head in (None, b'', b'plain text', b'\x89PN', b'RIFF'):
+            with self.subTest(head=head):
+                self.assertIsNone(filetypes.sniff(head))
+
+    def test_classify_by_extension_without_content(self):
+        self.assertEqual(filetypes.classify('Photo.JPG'), ('image', 'image/jpeg'))
+        self.assertEqual(filetypes.classify('notes.md')[0], 'text')
+        self.assertEqual(filetypes.classify('noextension'), ('file', 'application/octet-stream'))
+        self.assertEqual(filetypes.classify_extension('ARCHIVE.TAR'), 'archive')
+
+    def test_content_wins_over_extension(self):
+        self.assertEqual(filetypes.classify('photo.txt', b'\x89PNG\r\n\x1a\n'), ('image', 'image/png'))
+        self.assertEqual(filetypes.classify('cute-cat.jpg', b'MZ\x90\x00')[0], 'executable')
+        # 알 수 없는 내용이면 확장자 분류
+        self.assertEqual(filetypes.classify('notes.txt', b'hello'), ('text', 'text/plain'))
+
+    def test_container_formats_keep_extension_type(self):
+        self.assertEqual(filetypes.classify('report.docx', b'PK\x03\x04')[0], 'document')
+        self.assertEqual(filetypes.classify('sheet.xlsx', b'PK\x03\x04')[0], 'spreadsheet')
+        self.assertEqual(filetypes.classify('legacy.xls', b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1')[0], 'spreadsheet')
+        self.assertEqual(filetypes.classify('clip.ogv', b'OggS\x00')[0], 'video')
+        self.assertEqual(filetypes.classify('bundle.zip', b'PK\x03\x04'), ('archive', 'application/zip'))
+
+    def test_upload_folder(self):
+        self.assertEqual(filetypes.upload_folder('image'), 'images')
+        self.assertEqual(filetypes.upload_folder('spreadsheet'), 'documents')
+        self.assertEqual(filetypes.upload_folder('file'), 'others')
+
+
+# JobQueueTests 가 쓰는 작업 - 실행된 인자를 기록
+EXECUTED_JOBS = []
+
+
+@jobs.task('tests.record')
+def record_job(value):
+    if value == 'boom':
+        raise ValueError('실패하는 작업')
+    EXECUTED_JOBS.append(value)
+
+
+@override_settings(JOBS_ALWAYS_EAGER=False, JOBS_RETRY_BACKOFF=10)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        EXECUTED_JOBS.clear()
+
+    def test_enqueue_unknown_task(self):
+        with self.assertRaises(LookupError):
+            jobs.enqueue('tests.missing')
+        self.assertFalse(Job.objects.exists())
+
+    def test_enqueue_stores_job(self):
+        job = jobs.enqueue('tests.record', 'a', priority=5, delay=60)
+        job.refresh_from_db()
+        self.assertEqual((job.task, job.args, job.priority, job.status), ('tests.record', ['a'], 5, Job.STATUS_QUEUED))
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=50))
+
+    @override_settings(JOBS_ALWAYS_EAGER=True)
+    def test_eager_mode_runs_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertIsNone(jobs.enqueue('tests.record', 'eager'))
+            self.assertEqual(EXECUTED_JOBS, [])
+        self.assertEqual(EXECUTED_JOBS, ['eager'])
+        self.assertFalse(Job.objects.exists())
+
+    def test_claim_order_and_limit(self):
+        low = jobs.enqueue('tests.record', 'low')
+        high = jobs.enqueue('tests.record', 'high', priority=10)
+        jobs.enqueue('tests.record', 'later', priority=20, delay=3600)
+        claimed = jobs.claim_jobs('worker-1', 1, 60)
+        self.assertEqual([job.pk for job in claimed], [high.pk])
+        self.assertEqual((claimed[0].status, claimed[0].locked_by, claimed[0].attempts), (Job.STATUS_RUNNING, 'worker-1', 1))
+        # 이미 잠긴 작업은 다른 워커가 가져가지 않는다, 아직 때가 안 된 작업도
+        self.assertEqual([job.pk for job in jobs.claim_jobs('worker-2', 10, 60)], [low.pk])
+        self.assertEqual(jobs.claim_jobs('worker-3', 10, 60), [])
+
+    def test_expired_lock_is_reclaimed(self):
+        job = jobs.enqueue('tests.record', 'stuck')
+        jobs.claim_jobs('dead-worker', 1, 60)
+        Job.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        claimed = jobs.claim_jobs('worker-2', 1, 60)
+        self.assertEqual([(c.pk, c.locked_by, c.attempts) for c in claimed], [(job.pk, 'worker-2', 2)])
+
+    def test_job_that_keeps_killing_the_worker_fails(self):
+        job = jobs.enqueue('tests.record', 'oom', max_attempts=2)
+        for worker in ('worker-1', 'worker-2'):
+            self.assertEqual([c.pk for c in jobs.claim_jobs(worker, 1, 60)], [job.pk])
+            # 워커가 죽어 잠금만 남는다
+            Job.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(jobs.claim_jobs('worker-3', 1, 60), [])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.locked_until), (Job.STATUS_FAILED, 2, None))
+        self.assertIn('재시도 횟수', job.last_error)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_retry_with_exponential_backoff(self):
+        job = jobs.enqueue('tests.record', 'boom', max_attempts=3)
+        for attempt, backoff in ((1, 10), (2, 20)):
+            with self.subTest(attempt=attempt):
+                Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+                [claimed] = jobs.claim_jobs('worker', 1, 60)
+                self.assertEqual(claimed.attempts, attempt)
+                before = timezone.now()
+                jobs.mark_failed(claimed, 'error')
+                job.refresh_from_db()
+                self.assertEqual(job.status, Job.STATUS_QUEUED)
+                self.assertIsNone(job.locked_until)
+                delay = (job.run_at - before).total_seconds()
+                self.assertGreaterEqual(delay, backoff * 0.8 - 1)
+                self.assertLessEqual(delay, backoff * 1.2 + 1)
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        [claimed] = jobs.claim_jobs('worker', 1, 60)
+        jobs.mark_failed(claimed, 'last error')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.last_error), (Job.STATUS_FAILED, 'last error'))
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(jobs.claim_jobs('worker', 1, 60), [])
+
+    def test_run_task_and_mark_done(self):
+        job = jobs.enqueue('tests.record', 'ok')
+        [claimed] = jobs.claim_jobs('worker', 1, 60)
+        jobs.run_task(claimed.task, claimed.args, claimed.kwargs, claimed.pk)
+        jobs.mark_done(claimed)
+        job.refresh_from_db()
+        self.assertEqual(EXECUTED_JOBS, ['ok'])
+        self.assertEqual(job.status, Job.STATUS_DONE)
+
+    def test_run_task_failure_carries_traceback(self):
+        with self.assertRaises(jobs.TaskError) as raised:
+            jobs.run_task('tests.record', ['boom'], {})
+        self.assertIn('ValueError: 실패하는 작업', str(raised.exception))
+
+
+class ClientIPTests(SimpleTestCase):
+    def ip(self, remote_addr, forwarded=None):
+        headers = {'HTTP_X_FORWARDED_FOR': forwarded} if forwarded is not None else {}
+        return get_client_ip(RequestFactory().get('/', REMOTE_ADDR=remote_addr, **headers))
+
+    @override_settings(TRUSTED_PROXIES=[])
+    def test_forwarded_for_ignored_without_trusted_proxies(self):
+        self.assertEqual(self.ip('203.0.113.5', '1.2.3.4'), '203.0.113.5')
+        self.assertEqual(self.ip('127.0.0.1', '1.2.3.4'), '127.0.0.1')
+
+    @override_settings(TRUSTED_PROXIES=['127.0.0.1', '10.0.0.0/8'])
+    def test_forwarded_for_from_trusted_proxy(self):
+        self.assertEqual(self.ip('127.0.0.1', '198.51.100.7'), '198.51.100.7')
+        # 클라이언트가 꾸민 앞쪽 값은 건너뛰고 프록시가 덧붙인 마지막 신뢰 불가 주소를 쓴다
+        self.assertEqual(self.ip('127.0.0.1', '1.2.3.4, 198.51.100.7, 10.1.2.3'), '198.51.100.7')
+        self.assertEqual(self.ip('127.0.0.1'), '127.0.0.1')
+        self.assertEqual(self.ip('203.0.113.5', '1.2.3.4'), '203.0.113.5')
+
+
+class BlockedIPUniquenessTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser('blocker', 'blocker@example.com', 'password')
+
+    def block(self, ip, prefix_length=None):
+        return BlockedIP.objects.create(ip_address=ip, prefix_length=prefix_length, blocked_by=self.admin_user)
+
+    def test_same_address_with_different_prefixes(self):
+        self.block('10.0.0.0', 24)
+        self.block('10.0.0.0', 32)
+        self.block('10.0.0.0')
+        self.assertEqual(BlockedIP.objects.filter(ip_address='10.0.0.0').count(), 3)
+
+    def test_duplicates_are_rejected(self):
+        self.block('10.0.0.0', 24)
+        self.block('10.0.0.1')
+        for prefix_length, ip in ((24, '10.0.0.0'), (None, '10.0.0.1')):
+            with self.subTest(prefix_length=prefix_length), self.assertRaises(IntegrityError), transaction.atomic():
+                self.block(ip, prefix_length)
+
+    def test_validation_message(self):
+        self.block('10.0.0.1')
+        with self.assertRaises(ValidationError):
+            BlockedIP(ip_address='10.0.0.1', blocked_by=self.admin_user).validate_constraints()
+
+
+class PrefixTreeTests(SimpleTestCase):
+    def test_cidr_matching(self):
+        tree = PrefixTree(32)
+        tree.insert(ipaddress.ip_network('10.0.0.0/8'), 'ten')
+        tree.insert(ipaddress.ip_network('192.168.1.0/24'), 'lan')
+        tree.insert(ipaddress.ip_network('203.0.113.7/32'), 'host')
+        cases = {
+            '10.0.0.0': 'ten', '10.255.255.255': 'ten', '11.0.0.0': None,
+            '192.168.1.200': 'lan', '192.168.2.1': None,
+            '203.0.113.7': 'host', '203.0.113.8': None,
+        }
+        for ip, expected in cases.items():
+            with self.subTest(ip=ip):
+                self.assertEqual(tree.lookup(ipaddress.ip_address(ip)), expected)
+
+    def test_wider_range_wins(self):
+        tree = PrefixTree(32)
+        tree.insert(ipaddress.ip_network('10.1.0.0/16'), 'narrow')
+        tree.insert(ipaddress.ip_network('10.0.0.0/8'), 'wide')
+        self.assertEqual(tree.lookup(ipaddress.ip_address('10.1.2.3')), 'wide')
+
+    def test_zero_prefix_matches_everything(self):
+        tree = PrefixTree(128)
+        tree.insert(ipaddress.ip_network('::/0'), 'all')
+        self.assertEqual(tree.lookup(ipaddress.ip_address('2001:db8::1')), 'all')
+
+    def test_ipv6(self):
+        tree = PrefixTree(128)
+        tree.insert(ipaddress.ip_network('2001:db8::/32'), 'doc')
+        self.assertEqual(tree.lookup(ipaddress.ip_address('2001:db8:ffff::1')), 'doc')
+        self.assertIsNone(tree.lookup(ipaddress.ip_address('2001:db9::1')))
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'blocked-ip-tests'}},
+    BLOCKED_IP_RECHECK_SECONDS=0,
+    TRUSTED_PROXIES=[],
+)
+class BlockedIPIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser('ip-admin', 'ip-admin@example.com', 'password')
+
+    def setUp(self):
+        # 롤백된 차단 목록이 프로세스 전역 인덱스에 남아 다른 테스트를 막지 않도록
+        self.addCleanup(blocked_ips.invalidate)
+
+    def block(self, ip, prefix_length=None, reason='테스트'):
+        return BlockedIP.objects.create(
+            ip_address=ip, prefix_length=prefix_length, reason=reason, blocked_by=self.admin_user,
+        )
+
+    def test_lookup(self):
+        self.block('198.51.100.0', 24, '대역')
+        self.block('203.0.113.9', reason='단일')
+        self.block('2001:db8::', 32, 'v6')
+        index = BlockedIPIndex()
+        self.assertEqual(index.lookup('198.51.100.77'), '대역')
+        self.assertEqual(index.lookup('203.0.113.9'), '단일')
+        self.assertIsNone(index.lookup('203.0.113.10'))
+        self.assertEqual(index.lookup('2001:db8::abcd'), 'v6')
+        # IPv4-mapped IPv6 도 IPv4 로 검사
+        self.assertEqual(index.lookup('::ffff:203.0.113.9'), '단일')
+        self.assertIsNone(index.lookup('not an ip'))
+        self.assertIsNone(index.lookup(None))
+
+    def test_lookup_does_not_query_until_invalidated(self):
+        index = BlockedIPIndex()
+        self.assertFalse(index.is_blocked('192.0.2.1'))
+        with self.assertNumQueries(0):
+            self.assertFalse(index.is_blocked('192.0.2.1'))
+
+    def test_invalidate_reaches_other_workers(self):
+        worker_a, worker_b = BlockedIPIndex(), BlockedIPIndex()
+        self.assertFalse(worker_a.is_blocked('192.0.2.1'))
+        self.assertFalse(worker_b.is_blocked('192.0.2.1'))
+        # post_save 시그널이 커밋 후 공유 캐시의 버전을 바꾼다
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.block('192.0.2.0', 28)
+        # 커밋 전 - 다른 워커가 이전 목록을 새 버전으로 읽어 고정하지 않도록 버전은 그대로
+        self.assertFalse(worker_a.is_blocked('192.0.2.1'))
+        for callback in callbacks:
+            callback()
+        self.assertTrue(worker_a.is_blocked('192.0.2.1'))
+        self.assertTrue(worker_b.is_blocked('192.0.2.15'))
+        with self.captureOnCommitCallbacks(execute=True):
+            BlockedIP.objects.all().delete()
+        self.assertFalse(worker_b.is_blocked('192.0.2.1'))
+
+    def test_middleware_blocks_range(self):
+        self.block('192.0.2.0', 24, '스팸')
+        blocked_ips.invalidate()
+        response = self.client.get(reverse('login'), REMOTE_ADDR='192.0.2.50')
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('스팸', response.content.decode())
+        # 클라이언트가 보낸 X-Forwarded-For 로는 피할 수 없다
+        response = self.client.get(reverse('login'), REMOTE_ADDR='192.0.2.50', HTTP_X_FORWARDED_FOR='1.2.3.4')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.client.get(reverse('login'), REMOTE_ADDR='192.0.3.1').status_code, 200)
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'pagination-tests'}},
+    POST_LIST_OFFSET_PAGES=3,
+)
+class KeysetPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('pager', 'pager@example.com', 'password')
+        category = Category.objects.create(name='페이지', slug='pages')
+        Post.objects.bulk_create([
+            Post(title=f'글 {index}', content='내용', author=cls.user, category=category) for index in range(25)
+        ])
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_page_numbers_up_to_limit(self):
+        paginator = KeysetPaginator(Post.objects.all(), 10, max_offset_pages=3)
+        page = paginator.get_page({'page': '3'})
+        self.assertEqual(page.number, 3)
+        self.assertEqual(len(page), 5)
+        self.assertFalse(page.has_next())
+        self.assertTrue(page.has_previous())
+        # 잘못된 번호는 첫 페이지
+        for value in ('0', '-2', 'abc'):
+            self.assertEqual(paginator.get_page({'page': value}).number, 1)
+
+    def walk_forward(self, paginator):
+        """첫 페이지부터 ?after= 로 끝까지 읽은 페이지 목록"""
+        pages = [paginator.get_page({})]
+        while pages[-1].has_next():
+            pages.append(paginator.get_page({'after': pages[-1].next_cursor()}))
+        return pages
+
+    def ids(self, page):
+        return [post.pk for post in page]
+
+    def test_after_and_before_cursors(self):
+        paginator = KeysetPaginator(Post.objects.all(), 10)
+        expected = list(Post.objects.order_by('-is_pinned', '-created_at', '-id').values_list('id', flat=True))
+        pages = self.walk_forward(paginator)
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        self.assertEqual(sum(map(self.ids, pages), []), expected)
+
+        # 마지막 페이지에서 ?before= 로 되돌아가면 같은 페이지들이 나온다
+        middle = paginator.get_page({'before': pages[-1].previous_cursor()})
+        self.assertEqual(self.ids(middle), self.ids(pages[1]))
+        self.assertTrue(middle.has_previous())
+        first = paginator.get_page({'before': middle.previous_cursor()})
+        self.assertEqual(self.ids(first), self.ids(pages[0]))
+        self.assertFalse(first.has_previous())
+        self.assertEqual(first.number, 1)
+
+    def test_ties_on_created_at_are_broken_by_id(self):
+        # 같은 시각에 쓴 글이 페이지 경계에 걸쳐도 빠지거나 겹치지 않아야 한다
+        Post.objects.update(created_at=timezone.now())
+        pinned = Post.objects.order_by('id').first()
+        Post.objects.filter(pk=pinned.pk).update(is_pinned=True)
+        paginator = KeysetPaginator(Post.objects.all(), 10)
+        ids = sum(map(self.ids, self.walk_forward(paginator)), [])
+        others = sorted(Post.objects.exclude(pk=pinned.pk).values_list('id', flat=True), reverse=True)
+        self.assertEqual(ids, [pinned.pk] + others)
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        paginator = KeysetPaginator(Post.objects.all(), 10)
+        first = self.ids(paginator.get_page({}))
+        for value in ('garbage', 'MXxub3QtYS1kYXRlfDE', encode_cursor(Post.objects.first())[:-3] + '!!!'):
+            self.assertEqual(self.ids(paginator.get_page({'after': value})), first)
+
+    def test_page_number_past_limit_is_404(self):
+        self.assertEqual(self.client.get(reverse('post_list'), {'page': '3'}).status_code, 200)
+        self.assertEqual(self.client.get(reverse('post_list'), {'page': '4'}).status_code, 404)
+        url = reverse('post_list', kwargs={'category_slug': 'pages'})
+        self.assertEqual(self.client.get(url, {'page': '100'}).status_code, 404)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'conditional-tests'}})
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('reader', 'reader@example.com', 'password')
+        cls.category = Category.objects.create(name='조건부', slug='conditional')
+        cls.post = Post.objects.create(title='조건부 GET', content='내용', author=cls.user, category=cls.category)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_post_detail_if_none_match(self):
+        url = reverse('post_detail', args=[self.post.pk])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertIn('private', response['Cache-Control'])
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+        # 글이 바뀌면 검증값도 바뀐다
+        self.post.title = '수정된 제목'
+        self.post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_post_detail_if_modified_since(self):
+        url = reverse('post_detail', args=[self.post.pk])
+        response = self.client.get(url)
+        self.assertEqual(response['Last-Modified'], http_date(int(self.post.updated_at.timestamp())))
+        updated = self.post.updated_at.timestamp()
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(updated + 10)).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(updated - 10)).status_code, 200)
+        # If-None-Match 가 있으면 If-Modified-Since 는 무시한다
+        response = self.client.get(url, HTTP_IF_NONE_MATCH='"other"', HTTP_IF_MODIFIED_SINCE=http_date(updated + 10))
+        self.assertEqual(response.status_code, 200)
+
+    def test_post_list_if_none_match(self):
+        for url in (reverse('post_list'), reverse('post_list', kwargs={'category_slug': 'conditional'})):
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+                # 다른 페이지 주소는 다른 검증값
+                self.assertNotEqual(self.client.get(url, {'page': '2'})['ETag'], etag)
+
+        etag = self.client.get(reverse('post_list'))['ETag']
+        Post.objects.create(title='새 글', content='내용', author=self.user, category=self.category)
+        response = self.client.get(reverse('post_list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '새 글')
+
+    def test_anonymous_is_not_revalidated(self):
+        self.client.logout()
+        response = self.client.get(reverse('post_detail', args=[self.post.pk]))
+        self.assertFalse(response.has_header('ETag'))
+
+
+@override_settings(
+    METRICS_DIR=tempfile.mkdtemp(), METRICS_TOKEN='secret-token', METRICS_ALLOWED_IPS=['127.0.0.1'],
+    TRUSTED_PROXIES=[],
+)
+class MetricsAccessTests(TestCase):
+    def get(self, **extra):
+        return self.client.get(reverse('metrics'), **extra)
+
+    def test_staff(self):
+        self.assertEqual(self.get(REMOTE_ADDR='192.0.2.1').status_code, 403)
+        self.client.force_login(User.objects.create_user('staff', is_staff=True))
+        response = self.get(REMOTE_ADDR='192.0.2.1')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('null1_http_requests_total', response.content.decode())
+
+    def test_bearer_token(self):
+        self.assertEqual(self.get(REMOTE_ADDR='192.0.2.1', HTTP_AUTHORIZATION='Bearer secret-token').status_code, 200)
+        self.assertEqual(self.get(REMOTE_ADDR='192.0.2.1', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEqual(self.get(REMOTE_ADDR='192.0.2.1', HTTP_AUTHORIZATION='Basic secret-token').status_code, 403)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_empty_token_never_matches(self):
+        self.assertEqual(self.get(REMOTE_ADDR='192.0.2.1', HTTP_AUTHORIZATION='Bearer ').status_code, 403)
+
+    def test_allowed_ip_only_without_proxy(self):
+        self.assertEqual(self.get(REMOTE_ADDR='127.0.0.1').status_code, 200)
+        # 같은 호스트의 nginx 를 거친 외부 요청
+        self.assertEqual(self.get(REMOTE_ADDR='127.0.0.1', HTTP_X_FORWARDED_FOR='203.0.113.5').status_code, 403)
+        self.assertEqual(self.get(REMOTE_ADDR='127.0.0.1', HTTP_X_REAL_IP='203.0.113.5').status_code, 403)
+        with self.settings(TRUSTED_PROXIES=['127.0.0.1']):
+            self.assertEqual(self.get(REMOTE_ADDR='127.0.0.1').status_code, 403)
+
+    @override_settings(METRICS_ALLOWED_IPS=[])
+    def test_no_ip_allowed_by_default(self):
+        self.assertEqual(self.get(REMOTE_ADDR='127.0.0.1').status_code, 403)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), ATTACHMENT_STORAGE_MODE='content', RESUMABLE_UPLOAD_DIR=tempfile.mkdtemp())
+class MediaGCTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('gc-owner')
+        cls.post = Post.objects.create(
+            title='gc', content='내용', author=cls.user, category=Category.objects.create(name='gc', slug='gc'),
+        )
+
+    def attach(self, content):
+        return PostFile.objects.create(post=self.post, file=SimpleUploadedFile('a.txt', content), original_name='a.txt')
+
+    def run_gc(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('media_gc', delete_dangling=True, min_age=0, stdout=StringIO(), stderr=StringIO())
+
+    def test_deletes_rows_whose_file_is_missing(self):
+        kept = self.attach(b'kept')
+        missing = self.attach(b'missing')
+        missing.file.storage.delete(missing.file.name)
+        self.run_gc()
+        self.assertEqual(list(PostFile.objects.values_list('pk', flat=True)), [kept.pk])
+
+    def test_file_created_during_scan_is_not_dangling(self):
+        scan = MediaGCCommand.scan
+        created = []
+
+        def scan_while_uploading(command, pool, root):
+            yield from scan(command, pool, root)
+            # 탐색이 끝난 뒤 (폴더를 이미 지나친 다음) 새 첨부파일이 생긴다
+            created.append(self.attach(b'uploaded during scan'))
+
+        with mock.patch.object(MediaGCCommand, 'scan', scan_while_uploading):
+            self.run_gc()
+        self.assertTrue(PostFile.objects.filter(pk=created[0].pk).exists())
+
+    def test_file_restored_before_delete_is_kept(self):
+        post_file = self.attach(b'restored')
+        storage, name = post_file.file.storage, post_file.file.name
+        storage.delete(name)
+        find_dangling = MediaGCCommand.find_dangling
+
+        def restore_after_check(command, post_files, found):
+            dangling = find_dangling(command, post_files, found)
+            storage.save(name, SimpleUploadedFile('a.txt', b'restored'))
+            return dangling
+
+        with mock.patch.object(MediaGCCommand, 'find_dangling', restore_after_check):
+            self.run_gc()
+        self.assertTrue(PostFile.objects.filter(pk=post_file.pk).exists())
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class MigrateToBlobsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('migrate-owner')
+        cls.post = Post.objects.create(
+            title='migrate', content='내용', author=cls.user, category=Category.objects.create(name='mig', slug='mig'),
+        )
+
+    def attach(self, content, name='a.txt'):
+        """blob 없이 날짜별 폴더에 저장된 예전 첨부파일"""
+        name = f'uploads/file/2024/01/01/{name}'
+        path = os.path.join(settings.MEDIA_ROOT, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return PostFile.objects.bulk_create([PostFile(post=self.post, file=name, original_name=os.path.basename(name))])[0]
+
+    def migrate(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('migrate_to_blobs', stdout=StringIO(), stderr=StringIO())
+
+    def test_moves_and_deduplicates(self):
+        first, second = self.attach(b'same', 'a.txt'), self.attach(b'same', 'b.txt')
+        sources = [post_file.file.path for post_file in (first, second)]
+        self.migrate()
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual(Blob.objects.get().ref_count, 2)
+        self.assertTrue(os.path.exists(first.file.path))
+        self.assertFalse(any(os.path.exists(source) for source in sources))
+
+    def add_thumbnails(self, post_file):
+        for name in thumbnail_names(post_file.file.name):
+            os.makedirs(os.path.dirname(os.path.join(settings.MEDIA_ROOT, name)), exist_ok=True)
+            with open(os.path.join(settings.MEDIA_ROOT, name), 'wb') as f:
+                f.write(b'thumb')
+        PostFile.objects.filter(pk=post_file.pk).update(file_type='image', thumbnails_ready=True)
+
+    @override_settings(JOBS_ALWAYS_EAGER=False)
+    def test_thumbnails_move_with_blob(self):
+        post_file = self.attach(b'image', 'photo.jpg')
+        self.add_thumbnails(post_file)
+        old_thumbs = thumbnail_names(post_file.file.name)
+        self.migrate()
+        post_file.refresh_from_db()
+        self.assertTrue(post_file.thumbnails_ready)
+        for name in thumbnail_names(post_file.file.name):
+            self.assertTrue(os.path.exists(os.path.join(settings.MEDIA_ROOT, name)))
+        self.assertFalse(any(os.path.exists(os.path.join(settings.MEDIA_ROOT, name)) for name in old_thumbs))
+        self.assertFalse(Job.objects.exists())
+
+    @override_settings(JOBS_ALWAYS_EAGER=False)
+    def test_missing_thumbnails_are_regenerated(self):
+        post_file = self.attach(b'image without thumbs', 'photo.jpg')
+        PostFile.objects.filter(pk=post_file.pk).update(file_type='image', thumbnails_ready=True)
+        self.migrate()
+        post_file.refresh_from_db()
+        self.assertFalse(post_file.thumbnails_ready)
+        job = Job.objects.get()
+        self.assertEqual((job.task, job.args), ('thumbnails.generate', [post_file.pk]))
+
+    def test_source_survives_failed_update(self):
+        post_file = self.attach(b'keep me')
+        source = post_file.file.path
+        with mock.patch.object(Blob, 'acquire', side_effect=RuntimeError('db down')):
+            with self.assertRaises(RuntimeError):
+                self.migrate()
+        post_file.refresh_from_db()
+        self.assertEqual(post_file.file.path, source)
+        self.assertTrue(os.path.exists(source))
+        # 다시 실행하면 이어서 옮긴다
+        self.migrate()
+        post_file.refresh_from_db()
+        self.assertIsNotNone(post_file.blob_id)
+        self.assertFalse(os.path.exists(source))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'fragment-tests'}})
+class FragmentCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('fragment-admin', 'fragment@example.com', 'password')
+        cls.category = Category.objects.create(name='처음 이름', slug='fragment')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_category_change_shows_after_commit(self):
+        self.assertContains(self.client.get(reverse('home')), '처음 이름')
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.category.name = '바뀐 이름'
+            self.category.save()
+        # 커밋 전에는 버전이 그대로 - 동시 요청이 이전 행을 새 버전으로 캐시하지 않도록
+        self.assertContains(self.client.get(reverse('home')), '처음 이름')
+        for callback in callbacks:
+            callback()
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, '바뀐 이름')
+        self.assertNotContains(response, '처음 이름')
+
+    def test_announcement_shows_on_next_render(self):
+        self.client.get(reverse('post_list'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Announcement.objects.create(title='새 공지사항', content='내용', author=self.user)
+        self.assertContains(self.client.get(reverse('post_list')), '새 공지사항')
+        with self.captureOnCommitCallbacks(execute=True):
+            Announcement.objects.all().delete()
+        self.assertNotContains(self.client.get(reverse('post_list')), '새 공지사항')
+
+    def test_renders_from_cache_until_invalidated(self):
+        self.client.get(reverse('home'))
+        # 캐시를 거치지 않고 바꾼 행은 다음 무효화 전까지 보이지 않는다
+        Category.objects.filter(pk=self.category.pk).update(name='몰래 바꾼 이름')
+        self.assertContains(self.client.get(reverse('home')), '처음 이름')
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('searcher', 'searcher@example.com', 'password')
+        cls.news = Category.objects.create(name='뉴스', slug='news')
+        cls.free = Category.objects.create(name='자유', slug='free')
+
+    def write(self, title, content='내용', category=None, author=None):
+        return Post.objects.create(title=title, content=content, author=author or self.user, category=category or self.news)
+
+    def test_matching_and_ranking(self):
+        in_content = self.write('공지', '게시판 이용 안내')
+        in_title = self.write('게시판 규칙')
+        with_particle = self.write('게시판에서 생긴 일', category=self.free)
+        self.write('무관한 글', '다른 이야기')
+        ids = search.search_post_ids('게시판')
+        # 제목 일치가 본문 일치보다 앞, 조사가 붙은 단어도 접두사로 찾는다
+        self.assertEqual(set(ids), {in_content.pk, in_title.pk, with_particle.pk})
+        self.assertEqual(ids[-1], in_content.pk)
+        # 여러 단어는 모두 포함해야 한다
+        self.assertEqual(search.search_post_ids('게시판 규칙'), [in_title.pk])
+        self.assertEqual(search.search_post_ids('없는단어'), [])
+
+    def test_query_syntax_is_ignored(self):
+        post = self.write('따옴표 "검색" 테스트')
+        # FTS 문법 문자는 버리고 단어만 쓴다 (OR / NEAR 도 연산자가 아닌 단어)
+        self.assertEqual(search.search_post_ids('"검색*) ^테스트'), [post.pk])
+        self.assertEqual(search.search_post_ids('검색 OR 없는단어'), [])
+        self.assertEqual(search.search_post_ids('  ** '), [])
+        self.assertEqual(len(search.parse_terms(' '.join(f'단어{i}' for i in range(20)))), search.MAX_TERMS)
+
+    def test_category_filter(self):
+        news = self.write('검색 대상 뉴스')
+        free = self.write('검색 대상 자유', category=self.free)
+        self.assertEqual(set(search.search_post_ids('검색 대상')), {news.pk, free.pk})
+        self.assertEqual(search.search_post_ids('검색 대상', category=self.free), [free.pk])
+
+    def test_index_follows_save_and_delete(self):
+        post = self.write('처음제목')
+        self.assertEqual(search.search_post_ids('처음제목'), [post.pk])
+        post.title = '바뀐제목'
+        post.save()
+        self.assertEqual(search.search_post_ids('처음제목'), [])
+        self.assertEqual(search.search_post_ids('바뀐제목'), [post.pk])
+        post_id = post.pk
+        post.delete()
+        self.assertEqual(search.search_post_ids('바뀐제목'), [])
+        # 색인에서도 지워졌는지 (게시물 행 없이 색인만 남지 않았는지)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {search.FTS_TABLE} WHERE rowid = %s', [post_id])
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+    def admin_search(self, term):
+        model_admin = PostAdmin(Post, admin.site)
+        request = RequestFactory().get('/', {'q': term})
+        request.user = self.user
+        queryset, may_have_duplicates = model_admin.get_search_results(request, Post.objects.all(), term)
+        self.assertFalse(may_have_duplicates)
+        return queryset
+
+    def test_admin_search_uses_index(self):
+        matched = self.write('관리자 검색어')
+        self.write('다른 글')
+        other_author = User.objects.create_user('검색어')
+        by_author = self.write('작성자 이름으로', author=other_author)
+        with mock.patch('myapp.admin.search_post_ids', wraps=search.search_post_ids) as search_post_ids:
+            queryset = self.admin_search('검색어')
+        search_post_ids.assert_called_once_with('검색어')
+        self.assertEqual(set(queryset.values_list('pk', flat=True)), {matched.pk, by_author.pk})
+        self.assertEqual(self.admin_search('').count(), Post.objects.count())
+
+    @override_settings(SEARCH_MAX_RESULTS=3)
+    def test_admin_search_is_capped(self):
+        posts = [self.write(f'많은 결과 {index}') for index in range(5)]
+        ids = set(self.admin_search('많은 결과').values_list('pk', flat=True))
+        # 관련도가 같으면 최신(id 큰) 글부터 SEARCH_MAX_RESULTS 개
+        self.assertEqual(ids, {post.pk for post in posts[-3:]})
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'session-tests'}},
+    SESSION_REFRESH_INTERVAL=3600,
+)
+class SessionRefreshTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('session-user', password='password')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        # 첫 요청이 연장 시각을 기록한다
+        response = self.client.get(reverse('home'))
+        self.assertIn(settings.SESSION_COOKIE_NAME, response.cookies)
+        self.refreshed_at = self.client.session[REFRESHED_AT_KEY]
+
+    def expire_date(self):
+        return Session.objects.get(session_key=self.client.session.session_key).expire_date
+
+    def test_get_inside_window_does_not_write_session(self):
+        before = self.expire_date()
+        with mock.patch('myapp.sessions.time.time', return_value=self.refreshed_at + 3599):
+            response = self.client.get(reverse('home'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+        self.assertEqual(self.expire_date(), before)
+        self.assertEqual(self.client.session[REFRESHED_AT_KEY], self.refreshed_at)
+
+    def test_get_past_window_extends_session(self):
+        before = self.expire_date()
+        later = self.refreshed_at + 3600
+        with mock.patch('myapp.sessions.time.time', return_value=later):
+            response = self.client.get(reverse('home'))
+        self.assertIn(settings.SESSION_COOKIE_NAME, response.cookies)
+        self.assertEqual(self.client.session[REFRESHED_AT_KEY], later)
+        self.assertGreaterEqual(self.expire_date(), before)
+
+    def test_anonymous_request_creates_no_session(self):
+        self.client.logout()
+        response = self.client.get(reverse('login'))
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+
+
+class StopFlushLoop(Exception):
+    pass
+
+
+@override_settings(LOGIN_AUDIT_FLUSH_INTERVAL=60, LOGIN_AUDIT_BATCH_SIZE=3)
+class LoginAuditBufferTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('audit-alice')
+        cls.bob = User.objects.create_user('audit-bob')
+        UserProfile.objects.create(user=cls.alice, ip_address='192.0.2.1', last_login_ip='192.0.2.1')
+
+    def setUp(self):
+        # 테스트에서는 백그라운드 스레드를 띄우지 않는다
+        patcher = mock.patch.object(LoginAuditBuffer, '_ensure_thread')
+        self.ensure_thread = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.buffer = LoginAuditBuffer()
+
+    def test_buffers_until_batch_size(self):
+        now = timezone.now()
+        self.buffer.record(self.alice.pk, '198.51.100.1', now)
+        self.buffer.record(self.bob.pk, '198.51.100.2', now)
+        self.ensure_thread.assert_called()
+        self.alice.refresh_from_db()
+        self.assertIsNone(self.alice.last_login)
+        # 같은 사용자의 기록은 하나로 합쳐지므로 세 번째 사용자가 와야 배치가 찬다
+        self.buffer.record(self.alice.pk, '198.51.100.3', now + timedelta(seconds=1))
+        self.assertIsNone(User.objects.get(pk=self.alice.pk).last_login)
+        self.buffer.record(User.objects.create_user('audit-carol').pk, '198.51.100.4', now)
+        self.assertEqual(User.objects.get(pk=self.alice.pk).last_login, now + timedelta(seconds=1))
+        self.assertEqual(UserProfile.objects.get(user=self.alice).last_login_ip, '198.51.100.3')
+
+    def test_flushes_on_interval(self):
+        now = timezone.now()
+        self.buffer.record(self.alice.pk, '198.51.100.1', now)
+        with mock.patch('myapp.audit.time.sleep', side_effect=[None, StopFlushLoop]) as sleep, \
+                mock.patch('myapp.audit.connections'):
+            with self.assertRaises(StopFlushLoop):
+                self.buffer._run()
+        sleep.assert_called_with(60)
+        self.assertEqual(User.objects.get(pk=self.alice.pk).last_login, now)
+
+    @override_settings(LOGIN_AUDIT_FLUSH_INTERVAL=0)
+    def test_zero_interval_writes_immediately(self):
+        now = timezone.now()
+        self.buffer.record(self.bob.pk, '198.51.100.9', now)
+        self.ensure_thread.assert_not_called()
+        self.assertEqual(User.objects.get(pk=self.bob.pk).last_login, now)
+        # 프로필이 없던 사용자는 프로필을 만든다
+        profile = UserProfile.objects.get(user=self.bob)
+        self.assertEqual((profile.ip_address, profile.last_login_ip), ('198.51.100.9', '198.51.100.9'))
+
+    def test_unchanged_and_older_entries_are_skipped(self):
+        now = timezone.now()
+        User.objects.filter(pk=self.alice.pk).update(last_login=now)
+        # 다른 워커가 이미 더 최근 (또는 같은) 시각을 기록했다
+        self.buffer.record(self.alice.pk, '198.51.100.5', now - timedelta(minutes=1))
+        self.assertEqual(self.buffer.flush(), 0)
+        self.assertEqual(UserProfile.objects.get(user=self.alice).last_login_ip, '192.0.2.1')
+        self.assertEqual(User.objects.get(pk=self.alice.pk).last_login, now)
+        # 같은 사용자의 더 오래된 기록은 버퍼에서도 최신 기록을 덮지 않는다
+        self.buffer.record(self.bob.pk, '198.51.100.6', now)
+        self.buffer.record(self.bob.pk, '198.51.100.7', now - timedelta(minutes=1))
+        self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(UserProfile.objects.get(user=self.bob).last_login_ip, '198.51.100.6')
+        self.assertEqual(self.buffer.flush(), 0)
+
+    def test_failed_flush_keeps_entries(self):
+        now = timezone.now()
+        self.buffer.record(self.alice.pk, '198.51.100.8', now)
+        with mock.patch.object(LoginAuditBuffer, '_write', side_effect=RuntimeError('db down')), \
+                self.assertLogs('myapp.audit', 'WARNING'):
+            self.assertEqual(self.buffer.flush(), 0)
+        self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(UserProfile.objects.get(user=self.alice).last_login_ip, '198.51.100.8')
+
+
+@override_settings(REPLICA_PIN_SECONDS=10)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        # 테스트 DB 에는 복제본이 없으므로 설정된 것처럼
+        for target in ('myapp.routers.replica_available', 'myapp.middleware.replica_available'):
+            patcher = mock.patch(target, return_value=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def route(self, request):
+        """read_replica 로 감싼 뷰 안에서 (Post 읽기, User 읽기, Post 쓰기) 가 가는 DB"""
+        @read_replica
+        def view(request):
+            return (
+                self.router.db_for_read(Post), self.router.db_for_read(User), self.router.db_for_write(Post),
+            )
+        return view(request)
+
+    def test_reads_go_to_replica_and_writes_to_default(self):
+        self.assertEqual(self.route(self.factory.get('/')), ('replica', 'default', 'default'))
+        # 감싸지 않은 뷰 / 요청 밖에서는 모두 기본 DB
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_async_view(self):
+        @read_replica
+        async def view(request):
+            return self.router.db_for_read(Post)
+        self.assertEqual(async_to_sync(view)(self.factory.get('/')), 'replica')
+
+    def test_pin_cookie_keeps_reads_on_default(self):
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        self.assertEqual(self.route(request), ('default', 'default', 'default'))
+
+    def pin(self, method, status=200):
+        middleware = ReplicaPinMiddleware(lambda request: HttpResponse(status=status))
+        return middleware(getattr(self.factory, method)('/')).cookies.get(PIN_COOKIE)
+
+    def test_successful_write_sets_expiring_pin(self):
+        cookie = self.pin('post', status=302)
+        self.assertEqual(cookie['max-age'], 10)
+        self.assertTrue(cookie['httponly'])
+        self.assertIsNone(self.pin('get'))
+        self.assertIsNone(self.pin('post', status=403))
+
+    def test_reads_return_to_replica_when_pin_expires(self):
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        self.assertEqual(self.route(request)[0], 'default')
+        # 브라우저는 max-age 가 지나면 쿠키를 보내지 않는다
+        self.assertEqual(self.route(self.factory.get('/'))[0], 'replica')
+
+    def test_no_replica_configured(self):
+        with mock.patch('myapp.routers.replica_available', return_value=False):
+            self.assertEqual(self.route(self.factory.get('/'))[0], 'default')
+        with mock.patch('myapp.middleware.replica_available', return_value=False):
+            self.assertIsNone(self.pin('post'))
+
+
+class SQLitePragmaTests(SimpleTestCase):
+    def test_pragmas_applied_on_new_connection(self):
+        connection_created.connect(apply_pragmas, dispatch_uid='test_sqlite_pragmas')
+        self.addCleanup(connection_created.disconnect, dispatch_uid='test_sqlite_pragmas')
+        path = os.path.join(tempfile.mkdtemp(), 'pragma.sqlite3')
+        wrapper = SQLiteDatabaseWrapper({**connection.settings_dict, 'NAME': path}, alias='pragma-test')
+        self.addCleanup(wrapper.close)
+        with wrapper.cursor() as cursor:
+            values = {}
+            for name in ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'temp_store'):
+                cursor.execute(f'PRAGMA {name}')
+                values[name] = cursor.fetchone()[0]
+        self.assertEqual(values, {
+            'journal_mode': 'wal',
+            'synchronous': 1,  # NORMAL
+            'busy_timeout': 5000,
+            'cache_size': -64000,
+            'temp_store': 2,  # MEMORY
+        })
+
+
+@override_settings(SQLITE_LOCK_RETRIES=3, SQLITE_LOCK_RETRY_DELAY=0.01)
+class RetryOnLockedTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch('myapp.sqlite.time.sleep')
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def flaky(self, failures, error='database is locked'):
+        calls = []
+
+        @retry_on_locked
+        def func():
+            calls.append(1)
+            if len(calls) <= failures:
+                raise OperationalError(error)
+            return 'ok'
+        return func, calls
+
+    def test_retries_until_lock_released(self):
+        func, calls = self.flaky(2)
+        self.assertEqual(func(), 'ok')
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(self.sleep.call_count, 2)
+        # 지수 백오프 (지터 0.5~1.5배)
+        first, second = (c.args[0] for c in self.sleep.call_args_list)
+        self.assertTrue(0.005 <= first <= 0.015)
+        self.assertTrue(0.01 <= second <= 0.03)
+
+    def test_reraises_after_retry_limit(self):
+        func, calls = self.flaky(10)
+        with self.assertRaisesMessage(OperationalError, 'database is locked'):
+            func()
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(self.sleep.call_count, 3)
+
+    def test_other_errors_not_retried(self):
+        func, calls = self.flaky(1, error='no such table: myapp_post')
+        with self.assertRaises(OperationalError):
+            func()
+        self.assertEqual(len(calls), 1)
+        self.sleep.assert_not_called()
+
+    def test_not_retried_inside_atomic_block(self):
+        func, calls = self.flaky(1)
+        with mock.patch.object(connection, 'in_atomic_block', True):
+            with self.assertRaises(OperationalError):
+                func()
+        self.assertEqual(len(calls), 1)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class JsonLoggingTests(SimpleTestCase):
+    def setUp(self):
+        self.logger = logging.getLogger('myapp.tests.log')
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.handler = ListHandler()
+        self.handler.addFilter(log.RequestContextFilter())
+        self.logger.addHandler(self.handler)
+        self.addCleanup(self.logger.removeHandler, self.handler)
+
+    def formatted(self, record):
+        return json.loads(log.JsonFormatter().format(record))
+
+    def test_record_format(self):
+        token = log.request_id.set('req-1')
+        self.addCleanup(log.request_id.reset, token)
+        user = User(pk=7, username='alice')
+        log.log_event(self.logger, 'upload.saved', user=user, size=123, name='사진.png')
+        data = self.formatted(self.handler.records[0])
+        self.assertRegex(data.pop('time'), r'^\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d\.\d{3}\+00:00$')
+        self.assertEqual(data, {
+            'level': 'INFO',
+            'logger': 'myapp.tests.log',
+            'event': 'upload.saved',
+            'request_id': 'req-1',
+            'size': 123,
+            'name': '사진.png',
+            'user_id': 7,
+            'username': 'alice',
+        })
+
+    def test_exception_and_no_request_id(self):
+        try:
+            raise ValueError('망가짐')
+        except ValueError as e:
+            log.log_event(self.logger, 'job.failed', level=logging.ERROR, exc_info=e)
+        data = self.formatted(self.handler.records[0])
+        self.assertNotIn('request_id', data)
+        self.assertEqual(data['level'], 'ERROR')
+        self.assertIn('ValueError: 망가짐', data['exception'])
+
+    @override_settings(LOG_SAMPLE_RATES={'upload.saved': 0.25})
+    def test_sampling(self):
+        with mock.patch('myapp.log.random.random', side_effect=[0.1, 0.3, 0.9, 0.2]):
+            for _ in range(4):
+                log.log_event(self.logger, 'upload.saved')
+        self.assertEqual(len(self.handler.records), 2)
+        self.assertEqual(self.formatted(self.handler.records[0])['sample_rate'], 0.25)
+        # 비율이 없는 이벤트와 WARNING 이상은 항상 남고 sample_rate 도 붙지 않는다
+        with mock.patch('myapp.log.random.random', return_value=0.9) as sample:
+            log.log_event(self.logger, 'auth.login')
+            log.log_event(self.logger, 'upload.saved', level=logging.WARNING)
+        sample.assert_not_called()
+        self.assertEqual(len(self.handler.records), 4)
+        self.assertNotIn('sample_rate', self.formatted(self.handler.records[3]))
+
+    def test_queue_drops_when_full_and_reports_count(self):
+        stream = StringIO()
+        handler = log.QueuedStreamHandler(stream=stream, maxsize=2)
+        handler.setFormatter(log.JsonFormatter())
+        self.addCleanup(handler.close)
+        # 백그라운드 스레드가 멈춘 상태 (stdout 이 막힌 경우)
+        with mock.patch.object(handler, '_ensure_listener'):
+            for i in range(5):
+                handler.handle(logging.makeLogRecord({'name': 'myapp', 'msg': f'event.{i}', 'levelno': logging.INFO, 'levelname': 'INFO'}))
+        self.assertEqual(handler.dropped, 3)
+        self.assertEqual(handler.queue.qsize(), 2)
+        self.assertEqual(stream.getvalue(), '')
+
+        handler.handle(logging.makeLogRecord({'name': 'myapp', 'msg': 'event.5', 'levelno': logging.INFO, 'levelname': 'INFO'}))
+        handler.close()
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual([line['event'] for line in lines], ['log.dropped', 'event.0', 'event.1', 'event.5'])
+        self.assertEqual(lines[0]['level'], 'WARNING')
+        self.assertEqual(lines[0]['count'], 3)
+        self.assertEqual(handler.dropped, 0)
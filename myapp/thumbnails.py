@@ -0,0 +1,100 @@
+import io
+import os
+
+from django.conf import settings
+from django.core import checks
+from django.core.files.base import ContentFile
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow 가 없으면 썸네일을 만들지 않고 원본을 보여준다
+    Image = None
+
+THUMBNAIL_FORMAT = 'WEBP'
+THUMBNAIL_EXTENSION = '.webp'
+THUMBNAIL_QUALITY = 80
+
+
+@checks.register()
+def check_pillow(app_configs, **kwargs):
+    """Pillow 없이 배포하면 썸네일 / 이미지 크기가 조용히 빠지므로 manage.py check 에서 경고"""
+    if Image is not None:
+        return []
+    return [checks.Warning(
+        'Pillow 가 설치되어 있지 않아 썸네일을 만들지 않고 이미지 크기도 기록하지 않습니다.',
+        hint='pip install -r requirements.txt',
+        id='myapp.W001',
+    )]
+
+
+def thumbnail_name(name, size):
+    """원본 옆 thumbs/ 폴더의 썸네일 경로 (uploads/images/.../thumbs/a_small.webp)"""
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(directory, 'thumbs', f'{stem}_{size}{THUMBNAIL_EXTENSION}')
+
+
+def thumbnail_owner(name):
+    """썸네일 경로에서 원본의 (폴더, 확장자 뺀 파일명) - 썸네일 경로가 아니면 None"""
+    directory, filename = os.path.split(name)
+    parent, folder = os.path.split(directory)
+    if folder != 'thumbs' or not filename.endswith(THUMBNAIL_EXTENSION):
+        return None
+    stem = filename[:-len(THUMBNAIL_EXTENSION)].rpartition('_')[0]
+    return parent, stem
+
+
+def thumbnail_names(name):
+    """설정된 모든 크기의 썸네일 경로"""
+    return [thumbnail_name(name, size) for size in settings.THUMBNAIL_SIZES]
+
+
+def render_thumbnails(storage, name):
+    """원본 이미지로 크기별 썸네일을 만들어 저장 (이미 있으면 건너뜀)"""
+    if Image is None:
+        return False
+
+    missing = {
+        size: thumbnail_name(name, size)
+        for size in settings.THUMBNAIL_SIZES
+        if not storage.exists(thumbnail_name(name, size))
+    }
+    if not missing:
+        return True
+
+    try:
+        with storage.open(name, 'rb') as f, Image.open(f) as original:
+            original = ImageOps.exif_transpose(original)
+            if original.mode not in ('RGB', 'RGBA'):
+                original = original.convert('RGBA' if 'A' in original.getbands() else 'RGB')
+            for size, target in missing.items():
+                max_px = settings.THUMBNAIL_SIZES[size]
+                image = original.copy()
+                image.thumbnail((max_px, max_px))
+                buffer = io.BytesIO()
+                image.save(buffer, THUMBNAIL_FORMAT, quality=THUMBNAIL_QUALITY)
+                storage.save(target, ContentFile(buffer.getvalue()))
+    except (OSError, ValueError, Image.DecompressionBombError):
+        # SVG 등 Pillow 가 읽지 못하는 이미지는 원본을 그대로 사용
+        return False
+    return True
+
+
+def generate_thumbnails(post_file_id):
+    """PostFile 하나의 썸네일 생성 후 thumbnails_ready 표시"""
+    from .models import Post, PostFile
+
+    post_file = PostFile.objects.filter(pk=post_file_id).first()
+    if post_file is None or post_file.get_file_type() != 'image':
+        return False
+    if render_thumbnails(post_file.file.storage, post_file.file.name):
+        PostFile.objects.filter(pk=post_file_id).update(thumbnails_ready=True)
+        Post.touch([post_file.post_id])
+        return True
+    return False
+
+
+def delete_thumbnails(storage, name):
+    """원본에 딸린 썸네일 삭제"""
+    for target in thumbnail_names(name):
+        storage.delete(target)
@@ -0,0 +1,188 @@
+import base64
+import logging
+import os
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+
+from .log import elapsed_ms, log_event
+from .metrics import add_upload
+from .models import PostFile, UploadSession
+from .sqlite import retry_on_locked
+
+logger = logging.getLogger(__name__)
+
+# PATCH 본문을 읽어 디스크에 쓰는 단위
+READ_BLOCK_SIZE = 1024 * 1024
+
+
+class UploadError(Exception):
+    """업로드 프로토콜 오류 (status 는 응답 코드)"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class CompletedUpload(File):
+    """다 받은 임시 파일을 스토리지로 넘기기 위한 래퍼
+
+    temporary_file_path()가 있으면 FileSystemStorage 가 파일을 복사하지 않고
+    이동(rename)만 하므로 대용량 파일도 확정이 즉시 끝난다.
+    """
+
+    def __init__(self, path, name):
+        super().__init__(open(path, 'rb'), name=name)
+        self._path = path
+
+    def temporary_file_path(self):
+        return self._path
+
+
+def parse_upload_metadata(header):
+    """tus 형식의 Upload-Metadata 헤더 ("key base64,key base64") 파싱"""
+    metadata = {}
+    for pair in (header or '').split(','):
+        key, _, value = pair.strip().partition(' ')
+        if not key:
+            continue
+        try:
+            metadata[key] = base64.b64decode(value).decode('utf-8') if value else ''
+        except (ValueError, UnicodeDecodeError):
+            raise UploadError('Upload-Metadata 형식이 잘못되었습니다.')
+    return metadata
+
+
+def create_session(user, filename, length):
+    """업로드 세션 생성 및 빈 임시 파일 준비"""
+    filename = os.path.basename(filename or '').strip()
+    if not filename:
+        raise UploadError('파일명이 필요합니다.')
+    if length < 0:
+        raise UploadError('Upload-Length 가 잘못되었습니다.')
+    if length > settings.RESUMABLE_UPLOAD_MAX_SIZE:
+        raise UploadError('파일이 너무 큽니다.', status=413)
+
+    session = UploadSession.objects.create(user=user, filename=filename, length=length)
+    os.makedirs(settings.RESUMABLE_UPLOAD_DIR, exist_ok=True)
+    open(session.get_temp_path(), 'wb').close()
+    return session
+
+
+@retry_on_locked
+def _advance_offset(session_id, offset, new_offset):
+    """같은 offset 으로 동시에 들어온 PATCH 는 한쪽만 반영"""
+    return UploadSession.objects.filter(pk=session_id, offset=offset).update(
+        offset=new_offset, updated_at=timezone.now()
+    )
+
+
+def _check_chunk(session, offset, content_length):
+    """PATCH 를 받기 전 검사 - 남은 길이 반환
+
+    클라이언트가 알고 있는 offset 과 서버 offset 이 다르면 409 를 돌려
+    HEAD 로 현재 위치를 다시 확인하게 한다. 청크 하나는 RESUMABLE_UPLOAD_CHUNK_SIZE 까지
+    (ASGI 는 본문 전체를 받아 둔 뒤 뷰를 호출하므로 스트리밍되지 않는다).
+    """
+    if offset != session.offset:
+        raise UploadError('Upload-Offset 이 일치하지 않습니다.', status=409)
+
+    chunk_size = settings.RESUMABLE_UPLOAD_CHUNK_SIZE
+    if content_length is not None and content_length > chunk_size:
+        raise UploadError(f'청크는 {chunk_size} 바이트까지 보낼 수 있습니다.', status=413)
+    remaining = session.length - offset
+    if content_length is not None and content_length > remaining:
+        raise UploadError('업로드 길이를 초과했습니다.', status=413)
+    return min(remaining, chunk_size)
+
+
+def _write_chunk(path, offset, stream, remaining):
+    """offset 위치부터 본문을 임시 파일에 쓰고 쓴 바이트 수 반환 (파일 입출력만, DB 없음)"""
+    written = 0
+    started = time.perf_counter()
+    with open(path, 'r+b') as f:
+        f.seek(offset)
+        while True:
+            try:
+                chunk = stream.read(READ_BLOCK_SIZE)
+            except OSError:
+                # 연결이 끊겨도 이미 받은 바이트까지는 반영해 이어올릴 수 있게 한다
+                break
+            if not chunk:
+                break
+            if written + len(chunk) > remaining:
+                raise UploadError('업로드 길이를 초과했습니다.', status=413)
+            f.write(chunk)
+            written += len(chunk)
+    add_upload(written, time.perf_counter() - started)
+    return written
+
+
+def append_chunk(session, offset, stream, content_length=None):
+    """offset 위치에 청크를 기록하고 새 offset 반환"""
+    remaining = _check_chunk(session, offset, content_length)
+    new_offset = offset + _write_chunk(session.get_temp_path(), offset, stream, remaining)
+    if not _advance_offset(session.pk, offset, new_offset):
+        raise UploadError('다른 요청이 먼저 기록했습니다.', status=409)
+    session.offset = new_offset
+    return new_offset
+
+
+async def aappend_chunk(session, offset, stream, content_length=None):
+    """append_chunk 의 비동기 버전 - 디스크 쓰기는 이벤트 루프를 막지 않도록 별도 스레드에서"""
+    remaining = _check_chunk(session, offset, content_length)
+    written = await sync_to_async(_write_chunk, thread_sensitive=False)(
+        session.get_temp_path(), offset, stream, remaining
+    )
+    new_offset = offset + written
+    if not await sync_to_async(_advance_offset)(session.pk, offset, new_offset):
+        raise UploadError('다른 요청이 먼저 기록했습니다.', status=409)
+    session.offset = new_offset
+    return new_offset
+
+
+def discard_session(session):
+    """세션과 임시 파일 삭제"""
+    try:
+        os.remove(session.get_temp_path())
+    except FileNotFoundError:
+        pass
+    session.delete()
+
+
+def finalize_uploads(post, user, upload_ids):
+    """완료된 업로드 세션들을 게시물의 PostFile 로 확정"""
+    valid_ids = []
+    for upload_id in upload_ids:
+        try:
+            valid_ids.append(uuid.UUID(str(upload_id)))
+        except ValueError:
+            continue
+
+    post_files = []
+    sessions = UploadSession.objects.filter(id__in=valid_ids, user=user)
+    for session in sessions:
+        if not session.is_complete():
+            continue
+        started = time.perf_counter()
+        upload = CompletedUpload(session.get_temp_path(), session.filename)
+        try:
+            post_files.append(PostFile.objects.create(
+                post=post,
+                file=upload,
+                original_name=session.filename
+            ))
+        finally:
+            upload.close()
+        log_event(
+            logger, 'upload.saved', user=user, post_id=post.pk, file_name=session.filename,
+            bytes=session.length, duration_ms=elapsed_ms(started), upload_id=str(session.pk),
+        )
+        # 중복 내용(blob)이라 이동되지 않은 임시 파일도 함께 정리
+        discard_session(session)
+    return post_files
+
@@ -14,4 +14,9 @@ urlpatterns = [
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
     path('post/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('search/', views.post_search, name='post_search'),
+    path('file/<int:file_id>/', views.file_download, name='file_download'),
+    path('upload/', views.upload_create, name='upload_create'),
+    path('upload/<uuid:upload_id>/', views.upload_detail, name='upload_detail'),
+    path('metrics/', views.metrics_view, name='metrics'),
 ]
@@ -0,0 +1,47 @@
+import ipaddress
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+
+@lru_cache(maxsize=8)
+def _proxy_networks(proxies):
+    return [ipaddress.ip_network(proxy.strip(), strict=False) for proxy in proxies if proxy.strip()]
+
+
+def is_trusted_proxy(ip):
+    """TRUSTED_PROXIES (IP / CIDR 목록) 에 든 주소인지"""
+    try:
+        address = ipaddress.ip_address((ip or '').strip())
+    except ValueError:
+        return False
+    if address.version == 6 and address.ipv4_mapped:
+        address = address.ipv4_mapped
+    return any(address in network for network in _proxy_networks(tuple(settings.TRUSTED_PROXIES)))
+
+
+def get_client_ip(request):
+    """클라이언트의 실제 IP 주소를 가져오는 함수
+
+    X-Forwarded-For 는 클라이언트가 마음대로 보낼 수 있으므로 REMOTE_ADDR 가 TRUSTED_PROXIES 일 때만 읽고,
+    오른쪽(가장 가까운 프록시)부터 신뢰하는 프록시를 건너뛴 첫 주소를 쓴다. 그 밖에는 REMOTE_ADDR.
+    """
+    remote_addr = request.META.get('REMOTE_ADDR')
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if not x_forwarded_for or not is_trusted_proxy(remote_addr):
+        return remote_addr
+    hops = [hop.strip() for hop in x_forwarded_for.split(',') if hop.strip()]
+    for hop in reversed(hops):
+        if not is_trusted_proxy(hop):
+            return hop
+    return hops[0] if hops else remote_addr
+
+
+async def aget_user(request):
+    """비동기 뷰에서 request.user 를 스레드에서 미리 불러온다
+
+    request.auser() 는 따로 캐시하므로 템플릿이 request.user 를 쓰면 사용자를 한 번 더 조회한다.
+    """
+    await sync_to_async(lambda: request.user.is_authenticated)()
+    return request.user
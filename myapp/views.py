@@ -1,60 +1,101 @@
 # myapp/views.py
-from django.shortcuts import render, redirect, get_object_or_404
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.contrib.auth import login, authenticate
 from django.contrib.auth.decorators import login_required, user_passes_test
-from .models import Post, Announcement, Category, UserProfile, BlockedIP, PostFile
+from .models import Post, Category, UserProfile, PostFile, UploadSession
 from .forms import UserRegisterForm, PostForm, AnnouncementForm
 from django.contrib import messages
-from django.http import HttpResponseForbidden
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
 from django.core.paginator import Paginator
 from django.contrib.auth.models import User
 from django.contrib.auth import logout
+from django.contrib.auth.views import redirect_to_login
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods, require_POST, require_safe
+from django.urls import reverse
+from . import fragments, metrics
+from .conditional import post_detail_etag, post_detail_last_modified, post_list_etag, revalidate
+from .pagination import KeysetPaginator
+from .routers import read_replica
+from .search import search_post_ids
+from .serving import serve_post_file
+from .log import elapsed_ms, log_event
+from .utils import aget_user, get_client_ip, is_trusted_proxy
+from .uploads import UploadError, aappend_chunk, create_session, discard_session, finalize_uploads, parse_upload_metadata
+import logging
 import os
+import secrets
+import time
 
-def get_client_ip(request):
-    """클라이언트의 실제 IP 주소를 가져오는 함수"""
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
+logger = logging.getLogger(__name__)
 
 def is_admin(user):
     return user.is_superuser
 
-def home(request):
-    if not request.user.is_authenticated:
+# 읽기 뷰(home / post_list / post_detail)는 비동기 - ASGI 서버에서는 느린 클라이언트가 스레드를 잡지 않는다.
+# 템플릿은 조각 캐시 / 지연 로더가 캐시와 DB 를 읽으므로 스레드에서 렌더링한다.
+arender = sync_to_async(render)
+
+@read_replica
+async def home(request):
+    user = await aget_user(request)
+    if not user.is_authenticated:
         return redirect('login')
-    announcements = Announcement.objects.all().order_by('-created_at')
-    categories = Category.objects.all()
-    return render(request, 'index.html', {'announcements': announcements, 'categories': categories})
+    # 공지사항 / 카테고리는 캐시된 조각 - 템플릿 조각 캐시가 비었을 때만 불린다
+    return await arender(request, 'index.html', {
+        'announcements': fragments.announcements_loader(settings.HOME_ANNOUNCEMENT_LIMIT),
+        'categories': fragments.get_categories,
+    })
 
-def post_list(request, category_slug=None):
-    if not request.user.is_authenticated:
+@read_replica
+@revalidate(post_list_etag)
+async def post_list(request, category_slug=None):
+    user = await aget_user(request)
+    if not user.is_authenticated:
         return redirect('login')
-    categories = Category.objects.all()
-    announcements = Announcement.objects.all().order_by('-created_at')[:5]
     category = None
     
     if category_slug:
-        category = get_object_or_404(Category, slug=category_slug)
-        posts = Post.objects.filter(category=category).order_by('-is_pinned', '-created_at')
+        category = await sync_to_async(fragments.get_category)(category_slug)
+        posts = Post.objects.for_list().filter(category=category)
     else:
-        posts = Post.objects.all().order_by('-is_pinned', '-created_at')
+        posts = Post.objects.for_list()
     
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # COUNT(*)/OFFSET 없이 커서(?after=, ?before=)로 페이지 이동
+    paginator = KeysetPaginator(posts, 10, max_offset_pages=settings.POST_LIST_OFFSET_PAGES)
+    page_obj = await paginator.aget_page(request.GET)
     
-    return render(request, 'post_list.html', {
+    return await arender(request, 'post_list.html', {
         'posts': page_obj,
-        'categories': categories,
-        'announcements': announcements,
+        'categories': fragments.get_categories,
+        'announcements': fragments.announcements_loader(5),
         'category': category
     })
 
+@login_required
+def post_search(request):
+    """게시물 전문 검색 (관련도 순, ?category= 로 카테고리 제한)"""
+    query = request.GET.get('q', '').strip()
+    category = None
+    category_slug = request.GET.get('category')
+    if category_slug:
+        category = fragments.get_category(category_slug)
+    
+    # 색인에서 관련도 순 id 목록을 받아 현재 페이지 게시물만 조회
+    paginator = Paginator(search_post_ids(query, category) if query else [], 10)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    posts_by_id = Post.objects.for_list().in_bulk(page_obj.object_list)
+    page_obj.object_list = [posts_by_id[pk] for pk in page_obj.object_list if pk in posts_by_id]
+    
+    return render(request, 'post_search.html', {
+        'query': query,
+        'posts': page_obj,
+        'categories': fragments.get_categories(),
+        'category': category,
+    })
+
 @login_required
 @csrf_exempt  # CSRF 보호 해제
 def post_create(request, category_slug):
@@ -75,6 +116,7 @@ def post_create(request, category_slug):
             
             for file in files:
                 if file and file.size > 0:
+                    started = time.perf_counter()
                     try:
                         post_file = PostFile.objects.create(
                             post=post,
@@ -82,11 +124,20 @@ def post_create(request, category_slug):
                             original_name=file.name
                         )
                         uploaded_count += 1
-                        print(f"파일 업로드 성공: {file.name} ({file.size} bytes)")
+                        log_event(
+                            logger, 'upload.saved', user=request.user, post_id=post.id, file_name=file.name,
+                            bytes=file.size, duration_ms=elapsed_ms(started),
+                        )
                     except Exception as file_error:
-                        print(f"파일 업로드 실패: {file.name} - {str(file_error)}")
+                        log_event(
+                            logger, 'upload.failed', logging.WARNING, user=request.user, post_id=post.id,
+                            file_name=file.name, bytes=file.size, duration_ms=elapsed_ms(started), error=str(file_error),
+                        )
                         continue
             
+            # 이어올리기 API로 미리 올린 파일 확정
+            uploaded_count += len(finalize_uploads(post, request.user, request.POST.getlist('upload_ids')))
+            
             if uploaded_count > 0:
                 messages.success(request, f'게시물이 작성되었습니다! ({uploaded_count}개 파일 업로드됨)')
             else:
@@ -96,7 +147,7 @@ def post_create(request, category_slug):
             
         except Exception as e:
             messages.error(request, f'게시물 작성 중 오류: {str(e)}')
-            print(f"게시물 작성 오류: {str(e)}")
+            log_event(logger, 'post.create_failed', logging.ERROR, user=request.user, error=str(e), exc_info=True)
     
     form = PostForm(initial={'category': category})
     return render(request, 'post_create.html', {'form': form, 'category': category})
@@ -117,14 +168,9 @@ def announcement_create(request):
     return render(request, 'post_create.html', {'form': form})
 
 def register(request):
+    # IP 차단은 BlockedIPMiddleware 에서 처리
     client_ip = get_client_ip(request)
     
-    # IP 차단 체크
-    blocked_ip = BlockedIP.objects.filter(ip_address=client_ip).first()
-    if blocked_ip:
-        messages.error(request, f'차단된 IP에서는 회원가입을 할 수 없습니다. (사유: {blocked_ip.reason})')
-        return redirect('login')
-    
     if request.method == 'POST':
         form = UserRegisterForm(request.POST)
         if form.is_valid():
@@ -143,35 +189,22 @@ def register(request):
     return render(request, 'register.html', {'form': form})
 
 def login_view(request):
-    client_ip = get_client_ip(request)
-    
-    # IP 차단 체크
-    blocked_ip = BlockedIP.objects.filter(ip_address=client_ip).first()
-    if blocked_ip:
-        messages.error(request, f'차단된 IP에서는 로그인을 할 수 없습니다. (사유: {blocked_ip.reason})')
-        return render(request, 'login.html')
-    
+    # IP 차단은 BlockedIPMiddleware 에서 처리
     if request.method == 'POST':
         username = request.POST['username']
         password = request.POST['password']
+        started = time.perf_counter()
         user = authenticate(request, username=username, password=password)
         if user is not None:
-            # 로그인 IP 업데이트
-            try:
-                profile = UserProfile.objects.get(user=user)
-                profile.last_login_ip = client_ip
-                profile.save()
-            except UserProfile.DoesNotExist:
-                # 프로필이 없는 경우 생성
-                UserProfile.objects.create(
-                    user=user,
-                    ip_address=client_ip,
-                    last_login_ip=client_ip
-                )
-            
+            # 로그인 IP / 시각은 user_logged_in 시그널에서 버퍼에 기록 (myapp.audit)
             login(request, user)
+            log_event(logger, 'auth.login', user=user, ip=get_client_ip(request), duration_ms=elapsed_ms(started))
             return redirect('home')
         else:
+            log_event(
+                logger, 'auth.login_failed', logging.WARNING, username=username, ip=get_client_ip(request),
+                duration_ms=elapsed_ms(started),
+            )
             messages.error(request, '아이디 또는 비밀번호가 잘못되었습니다.')
     return render(request, 'login.html')
 
@@ -203,6 +236,7 @@ def post_create_general(request):
             
             for file in files:
                 if file and file.size > 0:
+                    started = time.perf_counter()
                     try:
                         post_file = PostFile.objects.create(
                             post=post,
@@ -210,11 +244,20 @@ def post_create_general(request):
                             original_name=file.name
                         )
                         uploaded_count += 1
-                        print(f"파일 업로드 성공: {file.name} ({file.size} bytes)")
+                        log_event(
+                            logger, 'upload.saved', user=request.user, post_id=post.id, file_name=file.name,
+                            bytes=file.size, duration_ms=elapsed_ms(started),
+                        )
                     except Exception as file_error:
-                        print(f"파일 업로드 실패: {file.name} - {str(file_error)}")
+                        log_event(
+                            logger, 'upload.failed', logging.WARNING, user=request.user, post_id=post.id,
+                            file_name=file.name, bytes=file.size, duration_ms=elapsed_ms(started), error=str(file_error),
+                        )
                         continue
             
+            # 이어올리기 API로 미리 올린 파일 확정
+            uploaded_count += len(finalize_uploads(post, request.user, request.POST.getlist('upload_ids')))
+            
             if uploaded_count > 0:
                 messages.success(request, f'게시물이 작성되었습니다! ({uploaded_count}개 파일 업로드됨)')
             else:
@@ -224,7 +267,7 @@ def post_create_general(request):
             
         except Exception as e:
             messages.error(request, f'게시물 작성 중 오류: {str(e)}')
-            print(f"게시물 작성 오류: {str(e)}")
+            log_event(logger, 'post.create_failed', logging.ERROR, user=request.user, error=str(e), exc_info=True)
     
     form = PostForm()
     return render(request, 'post_create.html', {'form': form, 'is_general': True})
@@ -235,9 +278,127 @@ def logout_view(request):
     messages.success(request, '안전하게 로그아웃되었습니다.')
     return redirect('login')
 
-@login_required
-def post_detail(request, post_id):
+@read_replica
+@revalidate(post_detail_etag, post_detail_last_modified)
+async def post_detail(request, post_id):
     """게시물 상세 페이지"""
-    post = get_object_or_404(Post, id=post_id)
-    return render(request, 'post_detail.html', {'post': post})
+    # login_required 는 request.auser() 로 따로 조회하므로 템플릿과 같은 사용자 객체를 쓰도록 직접 확인
+    user = await aget_user(request)
+    if not user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+    post = await aget_object_or_404(Post.objects.for_detail(), id=post_id)
+    return await arender(request, 'post_detail.html', {'post': post})
+
+
+@login_required
+@require_safe
+def file_download(request, file_id):
+    """첨부파일 전송 (Range / 이어받기 지원, ?download=1 이면 다운로드, ?size=medium 이면 썸네일)"""
+    post_file = get_object_or_404(PostFile, id=file_id)
+    return serve_post_file(
+        request, post_file,
+        as_attachment='download' in request.GET,
+        thumbnail=request.GET.get('size'),
+    )
+
+
+# 프록시를 거친 요청에 붙는 헤더 - 같은 호스트의 nginx 뒤에서는 모든 요청의 REMOTE_ADDR 가 127.0.0.1 이다
+PROXY_HEADERS = ('HTTP_X_FORWARDED_FOR', 'HTTP_FORWARDED', 'HTTP_X_REAL_IP')
+
+def _metrics_allowed(request):
+    """스태프, METRICS_TOKEN 베어러 토큰, 또는 프록시를 거치지 않고 METRICS_ALLOWED_IPS 에서 직접 온 요청"""
+    if request.user.is_staff:
+        return True
+    token = settings.METRICS_TOKEN
+    scheme, _, credentials = request.headers.get('Authorization', '').partition(' ')
+    if token and scheme.lower() == 'bearer' and secrets.compare_digest(credentials.strip().encode(), token.encode()):
+        return True
+    remote_addr = request.META.get('REMOTE_ADDR')
+    if remote_addr not in settings.METRICS_ALLOWED_IPS or is_trusted_proxy(remote_addr):
+        return False
+    return not any(header in request.META for header in PROXY_HEADERS)
+
+@require_safe
+def metrics_view(request):
+    """Prometheus 지표 - 모든 워커의 뷰별 요청 수 / 지연 히스토그램 / SQL / 템플릿 / 저장소 / 업로드"""
+    if not _metrics_allowed(request):
+        return HttpResponseForbidden('권한이 없습니다.')
+    return HttpResponse(
+        metrics.render_prometheus(metrics.collect()), content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+# 이어올리기(resumable) 업로드 API - tus 프로토콜 방식
+TUS_VERSION = '1.0.0'
+
+def _upload_response(session, status=204):
+    """tus 스타일 업로드 상태 헤더를 담은 응답"""
+    response = HttpResponse(status=status)
+    response['Tus-Resumable'] = TUS_VERSION
+    response['Upload-Offset'] = session.offset
+    response['Upload-Length'] = session.length
+    response['Cache-Control'] = 'no-store'
+    return response
+
+def _upload_error(error):
+    """업로드 오류 JSON 응답"""
+    response = JsonResponse({'error': str(error)}, status=error.status)
+    response['Tus-Resumable'] = TUS_VERSION
+    return response
+
+@login_required
+@csrf_exempt  # CSRF 보호 해제
+@require_POST
+def upload_create(request):
+    """이어올리기 세션 생성 (Upload-Length, Upload-Metadata: filename <base64>)"""
+    try:
+        metadata = parse_upload_metadata(request.headers.get('Upload-Metadata'))
+        try:
+            length = int(request.headers.get('Upload-Length', ''))
+        except ValueError:
+            raise UploadError('Upload-Length 헤더가 필요합니다.')
+        session = create_session(request.user, metadata.get('filename'), length)
+    except UploadError as e:
+        return _upload_error(e)
+
+    url = reverse('upload_detail', args=[session.id])
+    response = _upload_response(session, status=201)
+    response['Location'] = url
+    response['Upload-Chunk-Size'] = settings.RESUMABLE_UPLOAD_CHUNK_SIZE
+    return response
+
+@login_required
+@csrf_exempt  # CSRF 보호 해제
+@require_http_methods(['HEAD', 'GET', 'PATCH', 'DELETE'])
+async def upload_detail(request, upload_id):
+    """이어올리기 세션 조회(HEAD) / 청크 기록(PATCH) / 취소(DELETE)
+
+    비동기 뷰 - PATCH 본문은 ASGI 핸들러가 청크 전체를 받아 둔 뒤 넘겨 주고, 그 청크를
+    업로드 파일로 옮겨 쓰는 동안 이벤트 루프(다른 업로드 / 요청)를 막지 않는다.
+    """
+    user = await request.auser()
+    session = await aget_object_or_404(UploadSession, id=upload_id, user=user)
+
+    if request.method == 'DELETE':
+        await sync_to_async(discard_session)(session)
+        return HttpResponse(status=204)
+
+    if request.method == 'PATCH':
+        if request.content_type != 'application/offset+octet-stream':
+            return HttpResponse(status=415)
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+        except ValueError:
+            return _upload_error(UploadError('Upload-Offset 헤더가 필요합니다.'))
+        try:
+            content_length = int(request.headers.get('Content-Length') or 0)
+            if content_length < 0:
+                raise ValueError(content_length)
+        except ValueError:
+            return _upload_error(UploadError('Content-Length 헤더가 올바르지 않습니다.'))
+        try:
+            await aappend_chunk(session, offset, request, content_length or None)
+        except UploadError as e:
+            return _upload_error(e)
 
+    return _upload_response(session, status=204 if request.method == 'PATCH' else 200)
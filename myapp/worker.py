@@ -0,0 +1,20 @@
+# runworker 의 프로세스 풀에서 실행되는 함수들
+# (spawn 된 자식 프로세스가 import 하므로 모듈 최상단에서 모델을 import 하지 않는다)
+
+
+def init_process():
+    """자식 프로세스 시작 시 Django 초기화"""
+    import django
+    django.setup()
+
+
+def execute(job_id, task_name, args, kwargs):
+    """자식 프로세스에서 작업 하나 실행"""
+    from django.db import close_old_connections
+    from .jobs import run_task
+
+    close_old_connections()
+    try:
+        run_task(task_name, args, kwargs, job_id=job_id)
+    finally:
+        close_old_connections()